@@ -0,0 +1,197 @@
+"""Registro binario por decisión: nodos, tiempo, profundidad, fallback y jugada.
+
+``DecisionLog`` guarda cada decisión del jugador en arrays numpy
+preasignados (se duplican al llenarse) en lugar de listas de Python, y
+``save`` los escribe en un ``.npz``. Los resultados JSON/JSONL solo llevan
+el nombre del fichero (``decisions_file``); ``results.append_record`` escribe
+el ``.npz`` en ``<log>.decisions/`` al guardar cada partida, incluso si la
+partida se jugó en otro proceso o máquina (los arrays viajan en el registro).
+
+Columnas (``FIELDS``): ``nodes``, ``evaluations``, ``expansions``,
+``cutoffs`` y ``tt_hits`` (int64, contadores del ``SearchStats`` del agente,
+``src.agents.searchStats``), ``wall_time`` (float64, segundos de
+``getAction``), ``depth`` (int16, profundidad completada en turnos),
+``fallback`` (bool, la decisión vino del reflejo por tiempo), ``source``
+(int8, índice en ``SOURCES``) y ``action`` (int8, índice en
+``arrayState.ACTIONS``). Los agentes sin ``stats`` dejan -1 en las columnas
+que no exponen.
+
+``latency_summary`` resume los tiempos de una partida (p50/p90/p99, máximo,
+decisiones por encima de ``time_limit`` e histograma en cubos fijos
+``LATENCY_EDGES``) y ``merge_latency`` junta los de un lote sumando los
+histogramas; ``export_histogram`` los escribe en CSV.
+"""
+import os
+
+import numpy as np
+
+from src.gameClass.arrayState import ACTION_INDEX
+from src.agents.searchStats import SOURCES, SOURCE_INDEX
+
+FIELDS = {
+    'nodes': np.int64,
+    'evaluations': np.int64,
+    'expansions': np.int64,
+    'cutoffs': np.int64,
+    'tt_hits': np.int64,
+    'wall_time': np.float64,
+    'depth': np.int16,
+    'fallback': np.bool_,
+    'source': np.int8,
+    'action': np.int8,
+}
+SEARCH_COUNTERS = ('evaluations', 'expansions', 'cutoffs', 'tt_hits')
+
+
+class DecisionLog:
+    """Arrays tipados de las decisiones de una partida."""
+    def __init__(self, capacity=256):
+        self.size = 0
+        self._data = {name: np.zeros(capacity, dtype=dtype) for name, dtype in FIELDS.items()}
+
+    def __len__(self):
+        return self.size
+
+    def append(self, nodes, wall_time, depth=-1, fallback=False, action=None, evaluations=None,
+               expansions=None, cutoffs=None, tt_hits=None, source=None):
+        i = self.size
+        if i == len(self._data['nodes']):
+            for name, arr in self._data.items():
+                grown = np.zeros(2 * len(arr), dtype=arr.dtype)
+                grown[:i] = arr
+                self._data[name] = grown
+        data = self._data
+        data['nodes'][i] = -1 if nodes is None else nodes
+        data['wall_time'][i] = wall_time
+        data['depth'][i] = -1 if depth is None else depth
+        data['fallback'][i] = fallback
+        data['action'][i] = ACTION_INDEX.get(action, -1)
+        data['evaluations'][i] = -1 if evaluations is None else evaluations
+        data['expansions'][i] = -1 if expansions is None else expansions
+        data['cutoffs'][i] = -1 if cutoffs is None else cutoffs
+        data['tt_hits'][i] = -1 if tt_hits is None else tt_hits
+        data['source'][i] = SOURCE_INDEX.get(source, -1)
+        self.size = i + 1
+
+    def record(self, stats, wall_time, action=None, fallback=False):
+        """Anota una decisión a partir del ``SearchStats`` del agente (None si no tiene)."""
+        if stats is None:
+            self.append(None, wall_time, fallback=fallback, action=action)
+            return
+        self.append(stats.nodes, wall_time, stats.depth, stats.fallback is not None, action,
+                    stats.evaluations, stats.expansions, stats.cutoffs, stats.tt_hits, stats.source)
+
+    def arrays(self):
+        """Copias recortadas al número de decisiones (``dict`` nombre -> array)."""
+        return {name: arr[:self.size].copy() for name, arr in self._data.items()}
+
+    def __getitem__(self, name):
+        return self._data[name][:self.size]
+
+
+# Bordes fijos del histograma de latencias: 8 cubos por década de 0.1 ms a 1000 s,
+# iguales en todas las partidas para poder sumarlos
+LATENCY_EDGES = np.logspace(-4, 3, 8 * 7 + 1)
+PERCENTILES = (50, 90, 99)
+
+
+def latency_summary(wall_time, time_limit=None):
+    """Percentiles, máximo, fracción por encima de ``time_limit`` e histograma de una partida."""
+    wall_time = np.asarray(wall_time, dtype=np.float64)
+    n = len(wall_time)
+    counts = np.bincount(np.clip(np.searchsorted(LATENCY_EDGES, wall_time, side='right') - 1,
+                                 0, len(LATENCY_EDGES) - 2), minlength=len(LATENCY_EDGES) - 1)
+    summary = {'count': n, 'histogram': counts.tolist()}
+    if n:
+        for q, value in zip(PERCENTILES, np.percentile(wall_time, PERCENTILES)):
+            summary[f'p{q}'] = float(value)
+        summary['max'] = float(wall_time.max())
+        summary['mean'] = float(wall_time.mean())
+    over = int(np.count_nonzero(wall_time > time_limit)) if time_limit and n else 0
+    summary['time_limit'] = time_limit
+    summary['over_time_limit'] = over
+    summary['over_time_limit_fraction'] = over / n if n else 0.0
+    return summary
+
+
+def histogram_percentile(counts, q):
+    """Percentil ``q`` aproximado (borde superior del cubo) de un histograma en ``LATENCY_EDGES``."""
+    counts = np.asarray(counts)
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    i = int(np.searchsorted(np.cumsum(counts), q / 100 * total))
+    return float(LATENCY_EDGES[min(i, len(counts) - 1) + 1])
+
+
+def merge_latency(summaries):
+    """Latencia de un lote a partir de las de sus partidas.
+
+    Los percentiles salen del histograma sumado (borde superior del cubo,
+    error de ~33% como mucho); máximo, media y fracción fuera de tiempo son exactos.
+    """
+    summaries = [s for s in summaries if s and s.get('count')]
+    counts = np.zeros(len(LATENCY_EDGES) - 1, dtype=np.int64)
+    n = over = 0
+    total_time = 0.0
+    worst = 0.0
+    for s in summaries:
+        counts += np.asarray(s['histogram'], dtype=np.int64)
+        n += s['count']
+        over += s.get('over_time_limit', 0)
+        total_time += s['mean'] * s['count']
+        worst = max(worst, s['max'])
+    merged = {'count': n, 'histogram': counts.tolist()}
+    if n:
+        for q in PERCENTILES:
+            merged[f'p{q}'] = min(histogram_percentile(counts, q), worst)
+        merged['max'] = worst
+        merged['mean'] = total_time / n
+    merged['over_time_limit'] = over
+    merged['over_time_limit_fraction'] = over / n if n else 0.0
+    return merged
+
+
+def export_histogram(path, latencies):
+    """CSV ``serie,desde,hasta,decisiones`` con los histogramas ``{nombre: latencia}``."""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('series,low,high,count\n')
+        for name, latency in latencies.items():
+            for low, high, count in zip(LATENCY_EDGES[:-1], LATENCY_EDGES[1:], latency['histogram']):
+                if count:
+                    f.write(f"{name},{low:.6g},{high:.6g},{count}\n")
+
+
+def search_summary(arrays):
+    """Totales de los contadores de búsqueda, profundidad media y jugadas por origen."""
+    searched = arrays['nodes'] >= 0
+    summary = {name: int(arrays[name][searched].sum()) for name in SEARCH_COUNTERS}
+    depth = arrays['depth'][searched]
+    summary['mean_depth'] = float(depth.mean()) if len(depth) else 0.0
+    sources = np.bincount(arrays['source'][arrays['source'] >= 0], minlength=len(SOURCES))
+    summary['sources'] = {name: int(n) for name, n in zip(SOURCES, sources) if n}
+    return summary
+
+
+def save_decisions(path, arrays):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    np.savez_compressed(path, **arrays)
+
+
+def load_decisions(path):
+    """``dict`` nombre -> array de un ``.npz`` guardado con ``save_decisions``."""
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def decisions_dir(jsonl_path):
+    """Directorio de los ``.npz`` de un log de resultados: ``<log sin extensión>.decisions``."""
+    return os.path.splitext(jsonl_path)[0] + '.decisions'
+
+
+def load_game_decisions(jsonl_path, record):
+    """Arrays de la partida ``record`` de un log (None si no tiene fichero de decisiones)."""
+    name = record.get('decisions_file')
+    if name is None:
+        return None
+    return load_decisions(os.path.join(decisions_dir(jsonl_path), name))
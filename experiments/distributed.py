@@ -0,0 +1,371 @@
+"""Partidas de experimentos repartidas entre máquinas con un broker TCP.
+
+El broker (``Broker``) escucha con ``multiprocessing.connection`` y reparte
+tareas ``(config, game_index)`` de ``experiments.sweep``; los trabajadores
+(``run_worker``) se conectan, piden tareas, las juegan con ``play_config``
+y devuelven el registro. Por la red solo viaja la configuración (el dict de
+``results.experiment_config``, con el mapa como índice) y el registro; cada
+trabajador reconstruye el layout y la semilla de la partida, así que
+juega exactamente la misma partida que en local.
+
+- Identificador de partida: ``<hash de configuración>:<game_index>``.
+- Entrega al menos una vez: una tarea entregada sigue siendo del trabajador
+  mientras mande latidos (``heartbeat``); si deja de mandarlos durante
+  ``heartbeat_timeout`` o se cae la conexión, vuelve a la cola.
+- Sin duplicados: el broker solo guarda el primer resultado de cada
+  identificador (un trabajador lento que termina después del reparto se ignora).
+- Autenticación: ``multiprocessing.connection`` deserializa con pickle cada
+  mensaje, así que quien conozca la clave puede ejecutar código en el broker
+  y en los trabajadores. No hay clave por defecto: se pasa con ``--authkey``
+  o en la variable de entorno ``BATTLECITY_AUTHKEY`` (``resolve_authkey``).
+  El broker escucha en localhost salvo que se le dé otra dirección, y avisa
+  si escucha en una que no es de loopback.
+
+Para probar en una sola máquina, ``run_distributed(..., local_workers=N)``
+arranca el broker en localhost y N trabajadores en procesos locales (sin
+clave, se genera una al azar para esa ejecución)::
+
+    export BATTLECITY_AUTHKEY=$(python -c "import secrets; print(secrets.token_hex(32))")
+    # en la máquina del barrido
+    python -m experiments.sweep --agent expectimax alphabeta --level 1 2 3 4 --broker 0.0.0.0:6200
+    # en cada máquina trabajadora (mismo código, cwd con el paquete y misma BATTLECITY_AUTHKEY)
+    python -m experiments.distributed worker maquina-barrido:6200
+"""
+import os
+import time
+import secrets
+import warnings
+import ipaddress
+import queue
+import socket
+import argparse
+import threading
+import collections
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+from pathlib import Path
+
+from experiments.loader import get_map
+from experiments.results import config_hash, append_record
+
+AUTHKEY_ENV = 'BATTLECITY_AUTHKEY'
+HEARTBEAT = 5.0
+HEARTBEAT_TIMEOUT = 30.0
+
+
+def game_id(config, game_index):
+    return f"{config_hash(config)}:{game_index}"
+
+
+def parse_address(text):
+    """``'host:puerto'`` -> ``(host, puerto)``; sin host (``':6200'``, ``'6200'``) es localhost."""
+    host, _, port = text.rpartition(':')
+    return host or 'localhost', int(port)
+
+
+def resolve_authkey(authkey=None):
+    """Clave de autenticación en bytes: ``authkey`` o, si es None, la variable ``BATTLECITY_AUTHKEY``.
+
+    Lanza ``ValueError`` si no hay ninguna: no existe clave por defecto.
+    """
+    if authkey is None:
+        authkey = os.environ.get(AUTHKEY_ENV) or None
+    if authkey is None:
+        raise ValueError(f"Falta la clave del broker: use --authkey o la variable de entorno {AUTHKEY_ENV}")
+    return authkey.encode() if isinstance(authkey, str) else bytes(authkey)
+
+
+def is_loopback(host):
+    """True si ``host`` resuelve a una dirección de loopback."""
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+class Broker:
+    """Cola de tareas con latidos, reparto al menos una vez y resultados sin duplicados.
+
+    ``results()`` devuelve los registros según llegan (cada uno se añade
+    antes a ``jsonl_path``) hasta que no queda ninguna tarea.
+    """
+    def __init__(self, tasks, jsonl_path, address=('localhost', 0), authkey=None,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT):
+        self.jsonl_path = jsonl_path
+        self.heartbeat_timeout = heartbeat_timeout
+        self._tasks = {}
+        for config, i in tasks:
+            self._tasks[game_id(config, i)] = (config, i)
+        self._queue = collections.deque(self._tasks)
+        self._leases = {}           # game_id -> (trabajador, último latido)
+        self._done = set()
+        self._lock = threading.Lock()
+        self._results = queue.Queue()
+        self._closed = threading.Event()
+        if not is_loopback(address[0]):
+            warnings.warn(f"El broker escucha en {address[0]}:{address[1]}, accesible desde la red: "
+                          "cualquiera con la clave puede ejecutar código en él y en los trabajadores",
+                          stacklevel=2)
+        self._listener = Listener(address, authkey=resolve_authkey(authkey))
+        self.address = self._listener.address
+        self.workers = {}           # nombre -> último mensaje
+        self.requeued = 0
+        self.duplicates = 0
+
+    def start(self):
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        threading.Thread(target=self._watchdog, daemon=True).start()
+        return self
+
+    @property
+    def remaining(self):
+        with self._lock:
+            return len(self._tasks) - len(self._done)
+
+    def _accept_loop(self):
+        while not self._closed.is_set():
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError):
+                if self._closed.is_set():
+                    return
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _next_task(self, worker):
+        with self._lock:
+            while self._queue:
+                gid = self._queue.popleft()
+                if gid not in self._done and gid not in self._leases:
+                    self._leases[gid] = (worker, time.time())
+                    config, i = self._tasks[gid]
+                    return {'type': 'task', 'game_id': gid, 'config': config, 'game_index': i}
+            if len(self._done) == len(self._tasks):
+                return {'type': 'shutdown'}
+            # Quedan tareas en otros trabajadores: si alguno cae, volverán a la cola
+            return {'type': 'wait', 'seconds': 1.0}
+
+    def _requeue(self, gid):
+        # Llamar con el lock tomado
+        if gid in self._leases and gid not in self._done:
+            del self._leases[gid]
+            self._queue.append(gid)
+            self.requeued += 1
+
+    def _finish(self, gid, record):
+        with self._lock:
+            if gid in self._done or gid not in self._tasks:
+                self.duplicates += 1
+                return
+            self._done.add(gid)
+            self._leases.pop(gid, None)
+            append_record(self.jsonl_path, record)
+            last = len(self._done) == len(self._tasks)
+        self._results.put(record)
+        if last:
+            self._results.put(None)
+
+    def _serve(self, conn):
+        worker = None
+        try:
+            while not self._closed.is_set():
+                msg = conn.recv()
+                kind = msg.get('type')
+                if kind == 'hello':
+                    worker = msg['worker']
+                    self.workers[worker] = time.time()
+                elif kind == 'request':
+                    self.workers[worker] = time.time()
+                    conn.send(self._next_task(worker))
+                elif kind == 'heartbeat':
+                    self.workers[worker] = time.time()
+                    with self._lock:
+                        if msg['game_id'] in self._leases:
+                            self._leases[msg['game_id']] = (worker, time.time())
+                elif kind == 'result':
+                    self._finish(msg['game_id'], msg['record'])
+                    conn.send({'type': 'ack', 'game_id': msg['game_id']})
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+            # Conexión perdida: sus tareas vuelven a la cola sin esperar al vigilante
+            with self._lock:
+                for gid, (owner, _) in list(self._leases.items()):
+                    if owner == worker:
+                        self._requeue(gid)
+
+    def _watchdog(self):
+        while not self._closed.wait(min(1.0, self.heartbeat_timeout / 4)):
+            now = time.time()
+            with self._lock:
+                for gid, (_, last) in list(self._leases.items()):
+                    if now - last > self.heartbeat_timeout:
+                        self._requeue(gid)
+
+    def results(self):
+        if not self._tasks:
+            return
+        while True:
+            record = self._results.get()
+            if record is None:
+                return
+            yield record
+
+    def close(self, grace=2.0):
+        """Cierra el broker; si ya no quedan tareas, antes da ``grace`` segundos
+        para que los trabajadores en espera reciban ``shutdown``."""
+        if self.workers and not self.remaining:
+            time.sleep(grace)
+        self._closed.set()
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+
+
+def run_worker(address, authkey=None, name=None, heartbeat=HEARTBEAT, base_path=None,
+               max_tasks=None, retry=5.0, debug=False):
+    """Pide tareas al broker y las juega hasta que el broker dice que no quedan.
+
+    Si se pierde la conexión vuelve a conectarse cada ``retry`` segundos; el
+    resultado que no llegó a confirmarse se reenvía (el broker descarta duplicados).
+    """
+    from experiments.sweep import play_config
+
+    authkey = resolve_authkey(authkey)
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    base = Path(base_path) if base_path is not None else Path.cwd()
+    layouts = {}
+    unacked = None
+    played = 0
+    while max_tasks is None or played < max_tasks:
+        try:
+            conn = Client(address, authkey=authkey)
+        except (ConnectionError, OSError):
+            time.sleep(retry)
+            continue
+        send_lock = threading.Lock()
+
+        def send(msg):
+            with send_lock:
+                conn.send(msg)
+
+        try:
+            send({'type': 'hello', 'worker': name})
+            if unacked is not None:
+                send(unacked)
+                conn.recv()
+                unacked = None
+            while max_tasks is None or played < max_tasks:
+                send({'type': 'request'})
+                msg = conn.recv()
+                if msg['type'] == 'shutdown':
+                    return played
+                if msg['type'] == 'wait':
+                    time.sleep(msg['seconds'])
+                    continue
+                config, i, gid = msg['config'], msg['game_index'], msg['game_id']
+                if config['map_index'] not in layouts:
+                    layouts[config['map_index']] = get_map(base, config['map_index'])
+
+                stop = threading.Event()
+
+                def beat():
+                    while not stop.wait(heartbeat):
+                        try:
+                            send({'type': 'heartbeat', 'game_id': gid})
+                        except (OSError, EOFError):
+                            return
+
+                beater = threading.Thread(target=beat, daemon=True)
+                beater.start()
+                try:
+                    record = play_config(config, layouts[config['map_index']], i, debug)
+                finally:
+                    stop.set()
+                    beater.join()
+                record['worker'] = name
+                unacked = {'type': 'result', 'game_id': gid, 'record': record}
+                send(unacked)
+                conn.recv()
+                unacked = None
+                played += 1
+                if debug:
+                    print(f"[worker {name}] {gid} -> {record['result']}")
+        except (EOFError, OSError):
+            time.sleep(retry)
+        finally:
+            conn.close()
+    return played
+
+
+def _local_worker(address, authkey, heartbeat):
+    run_worker(address, authkey, name=f"local:{os.getpid()}", heartbeat=heartbeat, retry=0.5)
+
+
+def run_distributed(tasks, jsonl_path, address=('localhost', 0), authkey=None, local_workers=0,
+                    heartbeat_timeout=HEARTBEAT_TIMEOUT, debug=False):
+    """Como ``sweep.run_tasks``, pero las partidas las juegan trabajadores conectados al broker.
+
+    ``local_workers`` procesos de esta máquina se conectan también (con
+    ``address=('localhost', 0)`` y trabajadores locales es el sustituto local
+    del broker para pruebas). ``authkey`` se resuelve con ``resolve_authkey``;
+    si falta y el broker escucha en loopback se usa una clave aleatoria.
+    """
+    try:
+        authkey = resolve_authkey(authkey)
+    except ValueError:
+        if not is_loopback(address[0]):
+            raise
+        authkey = secrets.token_bytes(32)
+    broker = Broker(tasks, jsonl_path, address, authkey, heartbeat_timeout).start()
+    if debug:
+        print(f"[broker] escuchando en {broker.address[0]}:{broker.address[1]}, {len(tasks)} tareas")
+    host, port = broker.address
+    local_address = ('localhost' if host in ('0.0.0.0', '') else host, port)
+    # No daemónicos: los agentes Lazy SMP y YBWC arrancan sus propios procesos,
+    # y ``finally`` ya los espera (o los termina) al salir
+    procs = [multiprocessing.Process(target=_local_worker,
+                                     args=(local_address, authkey, min(HEARTBEAT, heartbeat_timeout / 4)))
+             for _ in range(local_workers)]
+    for p in procs:
+        p.start()
+    try:
+        yield from broker.results()
+    finally:
+        broker.close()
+        for p in procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Trabajador de experimentos distribuidos')
+    sub = parser.add_subparsers(dest='command', required=True)
+    w = sub.add_parser('worker', help='conectarse a un broker y jugar sus partidas')
+    w.add_argument('address', help='host:puerto del broker')
+    w.add_argument('--authkey', default=None, help=f'clave del broker (por defecto ${AUTHKEY_ENV})')
+    w.add_argument('--name', default=None)
+    w.add_argument('--heartbeat', type=float, default=HEARTBEAT)
+    w.add_argument('--processes', type=int, default=1, help='trabajadores en esta máquina')
+    w.add_argument('--debug', action='store_true')
+    args = parser.parse_args()
+
+    address = parse_address(args.address)
+    try:
+        authkey = resolve_authkey(args.authkey)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.processes == 1:
+        n = run_worker(address, authkey, name=args.name, heartbeat=args.heartbeat, debug=args.debug)
+        print(f"{n} partidas jugadas")
+    else:
+        procs = [multiprocessing.Process(target=run_worker, args=(address, authkey),
+                                         kwargs={'heartbeat': args.heartbeat, 'debug': args.debug})
+                 for _ in range(args.processes)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
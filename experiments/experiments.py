@@ -1,82 +1,113 @@
 import json
 from pathlib import Path
-from statistics import mean
 from experiments.loader import get_map, load_game_assets
-from experiments.agent_expectimax import make_agent
-from experiments.utils import run_single_game, evaluate_result
+from experiments.parallel import iter_games
+from experiments.registry import make_agent
+from experiments.sequential import PrecisionStopper
+from experiments.results import (config_hash, experiment_config, completed_games, append_record, drop_config,
+                                 read_records, summarize)
+from src.agents.openingBook import OpeningBook
+from src.agents.positionCache import PositionCache
 
 
-def run_experiments(num_games=10, depth=3, time_limit=8, debug=False, map_index=0, base_path=None):
-    """Corre num_games partidas en el mapa map_index usando Expectimax.
+def run_experiments(num_games=10, depth=3, time_limit=8, debug=False, map_index=0, base_path=None,
+                    opening_book=None, log_path=None, position_cache=None, workers=1, seed=None, resume=False,
+                    agent='expectimax', max_workers=None, precision=None, confidence=0.95, min_games=10):
+    """Corre num_games partidas en el mapa map_index (0..3 -> level1..level4).
     Guarda resultados en JSON y devuelve la lista [wins, losses, draws].
+    agent: nombre del agente en ``experiments.registry.AGENTS`` (por defecto Expectimax).
+    max_workers: hilos/procesos de búsqueda de los agentes paralelos.
+    opening_book: OpeningBook (o ruta) que consultan los agentes antes de buscar.
+    log_path: fichero donde se registran las posiciones de todas las partidas
+        (con varios procesos, uno por partida: ``<nombre>.g<i><ext>``).
+    position_cache: PositionCache (o ruta sqlite) con jugadas de ejecuciones anteriores.
+    workers: procesos entre los que se reparten las partidas (ver ``experiments.parallel``).
+    seed: semilla base; la partida i usa ``seed + i`` y da las mismas estadísticas
+        en serie o en paralelo.
+    resume: si es True, salta las partidas que ya están en el log JSONL con la
+        misma configuración; si no, las de esa configuración se descartan y se
+        juegan de nuevo. Cada partida se añade al log al terminar
+        (``experiments.results``), así que un corte solo pierde las que estaban en curso.
+    precision: si se da, el lote para en cuanto los intervalos (al ``confidence``)
+        de las tasas de victoria, derrota y empate tienen semianchura <= precision,
+        tras al menos ``min_games`` partidas (``experiments.sequential``). El JSON
+        incluye ``early_stop`` con las partidas ahorradas.
     """
     base = Path(base_path) if base_path is not None else Path.cwd()
     # Preparar recursos (placeholder)
     load_game_assets(base)
 
     layout = get_map(base, map_index)
+    config_values = experiment_config(map_index, agent, depth, time_limit, seed=seed, max_workers=max_workers,
+                                      opening_book=opening_book)
+    config = config_hash(config_values)
+    if isinstance(opening_book, (str, Path)):
+        opening_book = OpeningBook.load(str(opening_book))
+    if isinstance(position_cache, (str, Path)) and workers == 1:
+        position_cache = PositionCache(str(position_cache))
 
-    wins = losses = draws = 0
-    per_game_stats = []
-
-    for i in range(num_games):
-        agent = make_agent(depth=depth, time_limit=time_limit, debug=debug)
-        # Pedimos estadísticas por simulación
-        out = run_single_game(layout, agent, debug=debug, return_stats=True)
-        if isinstance(out, tuple) and len(out) == 2:
-            result, stats = out
-        else:
-            result = out
-            stats = None
-
-        w,l,d = evaluate_result(result)
-        wins += w; losses += l; draws += d
-
-        if stats is not None:
-            stats_record = {'game_index': i, 'result': result}
-            stats_record.update(stats)
-            per_game_stats.append(stats_record)
+    out_dir = base / 'experiments_results'
+    out_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"results_map{map_index}_{agent}_depth{depth}"
+    out_path = out_dir / f"{stem}.json"
+    jsonl_path = str(out_dir / f"{stem}.jsonl")
 
-        if debug:
-            print(f"[experiment] Juego {i+1}/{num_games} -> {result} | stats: {stats}")
+    if resume:
+        done_games = completed_games(jsonl_path, config)
+    else:
+        drop_config(jsonl_path, config)
+        done_games = set()
+    pending = [i for i in range(num_games) if i not in done_games]
+    if done_games and debug:
+        print(f"[experiment] Reanudando {config}: {num_games - len(pending)} partidas ya hechas")
 
-    results = [wins, losses, draws]
+    stopper = None
+    if precision is not None:
+        stopper = PrecisionStopper(precision, confidence, min_games)
+        for record in read_records(jsonl_path, config):
+            if record['game_index'] < num_games:
+                stopper.update(record['result'])
+        if stopper.done:
+            pending = []
 
-    # Guardar en disco
-    out_dir = base / 'experiments_results'
-    out_dir.mkdir(parents=True, exist_ok=True)
-    fname = f"results_map{map_index}_expectimax_depth{depth}.json"
-    out_path = out_dir / fname
-    # Guardar también las estadísticas detalladas
-    out_data = {
-        'summary': {
-            'wins': wins,
-            'losses': losses,
-            'draws': draws,
-            'num_games': num_games,
-        },
-        'per_game': per_game_stats,
-    }
+    # Los registros llegan según terminan las partidas y se escriben en el acto
+    games = iter_games(layout, pending, seed=seed, workers=workers, agent_factory=make_agent,
+                       agent_kwargs={'agent': agent, 'depth': depth, 'time_limit': time_limit,
+                                     'max_workers': max_workers, 'debug': debug},
+                       debug=debug, opening_book=opening_book, position_cache=position_cache, log_path=log_path)
+    try:
+        for done, stats_record in enumerate(games, start=1):
+            stats_record['config'] = config
+            stats_record['config_values'] = config_values
+            append_record(jsonl_path, stats_record)
 
-    # Agregar agregados si hay stats
-    if per_game_stats:
-        durations = [g['duration'] for g in per_game_stats]
-        avg_nodes = [g['avg_nodes_per_search'] for g in per_game_stats]
-        total_nodes = sum(g.get('total_nodes', 0) for g in per_game_stats)
-        total_decisions = sum(g.get('decision_count', 0) for g in per_game_stats)
-        out_data['aggregate'] = {
-            'mean_duration_per_simulation': mean(durations) if durations else 0.0,
-            'mean_avg_nodes_per_search': mean(avg_nodes) if avg_nodes else 0.0,
-            'overall_total_nodes': total_nodes,
-            'overall_total_decisions': total_decisions,
-            'overall_avg_nodes_per_search': (total_nodes / total_decisions) if total_decisions > 0 else 0.0,
-        }
+            if debug:
+                print(f"[experiment] Juego {done}/{len(pending)} (#{stats_record['game_index']}) -> "
+                      f"{stats_record['result']} | stats: {stats_record}")
+            if stopper is not None:
+                stopper.update(stats_record['result'])
+                if stopper.done:
+                    break
+    finally:
+        # Cancela las partidas que no han empezado si se para antes
+        games.close()
 
+    # El resumen sale siempre del log, incluidas las partidas de ejecuciones anteriores
+    records = [r for r in read_records(jsonl_path, config) if r['game_index'] < num_games]
+    out_data = summarize(records)
+    out_data['config'] = config_values
+    if stopper is not None:
+        out_data['early_stop'] = stopper.report(num_games)
     with open(out_path, 'w', encoding='utf-8') as f:
         json.dump(out_data, f, indent=2)
 
+    summary = out_data['summary']
+    results = [summary['wins'], summary['losses'], summary['draws']]
     print(f"Resultados guardados en {out_path}")
-    print(f"Victorias: {wins}, Derrotas: {losses}, Empates: {draws}")
+    print(f"Victorias: {results[0]}, Derrotas: {results[1]}, Empates: {results[2]}")
+    if stopper is not None and stopper.n < num_games:
+        print(f"Parada temprana tras {stopper.n} partidas (±{stopper.half_width():.3f}): "
+              f"{num_games - stopper.n} ahorradas")
     return results
 
 
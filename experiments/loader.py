@@ -3,19 +3,19 @@ from pathlib import Path
 
 def get_map(base_path: Path, index: int = 0):
     """Devuelve el layout (lista de strings) del mapa solicitado.
-    Actualmente solo soporta index==0 -> level1.
+    index 0..3 -> level1..level4.
     """
     base = Path(base_path)
     try:
         # importar desde src.gameClass.scenarios
-        from src.gameClass.scenarios.level1 import get_level1
+        from src.gameClass.scenarios import level1, level2, level3, level4
     except Exception as e:
-        raise ImportError("No se pudo importar level1 desde src.gameClass.scenarios: " + str(e))
+        raise ImportError("No se pudieron importar los niveles desde src.gameClass.scenarios: " + str(e))
 
-    if index == 0:
-        return get_level1()
-    else:
-        raise IndexError("Sólo existe el mapa índice 0 en este helper (level1)")
+    levels = (level1.get_level1, level2.get_level2, level3.get_level3, level4.get_level4)
+    if 0 <= index < len(levels):
+        return levels[index]()
+    raise IndexError(f"No existe el mapa índice {index} (hay {len(levels)}: level1..level{len(levels)})")
 
 
 def load_game_assets(base_path: Path):
@@ -0,0 +1,98 @@
+"""Partidas de un experimento repartidas entre procesos.
+
+Cada partida es una tarea independiente: el proceso que la juega crea su
+propio agente y siembra ``random`` (el azar de los enemigos y del fallback)
+con la semilla de la partida antes de empezar. Por eso una partida con la
+misma semilla da las mismas estadísticas en serie o en paralelo, salvo la
+duración y, si la búsqueda tiene límite de tiempo, lo que dependa del reloj.
+
+``iter_games`` devuelve los resultados según van terminando; con
+``workers=1`` juega en este proceso con el mismo código.
+"""
+import os
+import concurrent.futures
+from pathlib import Path
+
+from experiments.registry import make_agent
+from experiments.utils import run_single_game
+from experiments.decisions import DecisionLog
+
+
+def game_seed(base_seed, game_index):
+    """Semilla de la partida ``game_index`` (None si el experimento no está sembrado)."""
+    return None if base_seed is None else base_seed + game_index
+
+
+def game_log_path(log_path, game_index, per_game):
+    """Registro de la partida: uno por partida en paralelo (los procesos no comparten fichero)."""
+    if log_path is None or not per_game:
+        return log_path
+    path = Path(log_path)
+    return str(path.with_name(f"{path.stem}.g{game_index}{path.suffix}"))
+
+
+def play_game(layout, game_index, seed=None, agent_factory=make_agent, agent_kwargs=None, max_ticks=None,
+              debug=False, opening_book=None, position_cache=None, log_path=None, enemy_script='attack_base'):
+    """Juega una partida y devuelve su registro ``{'game_index', 'seed', 'result', ...stats, 'decisions'}``.
+
+    ``opening_book`` y ``position_cache`` pueden ser objetos o rutas; en otro
+    proceso la caché se abre de nuevo desde su ruta.
+    """
+    agent = agent_factory(**(agent_kwargs or {}))
+    if isinstance(opening_book, (str, Path)):
+        from src.agents.openingBook import OpeningBook
+        opening_book = OpeningBook.load(str(opening_book))
+    if isinstance(position_cache, (str, Path)):
+        from src.agents.positionCache import PositionCache
+        position_cache = PositionCache(str(position_cache))
+    if opening_book is not None:
+        agent.opening_book = opening_book
+    if position_cache is not None:
+        agent.position_cache = position_cache
+    decisions = DecisionLog()
+    try:
+        result, stats = run_single_game(layout, agent, max_ticks=max_ticks, debug=debug, return_stats=True,
+                                        log_path=log_path, seed=seed, enemy_script=enemy_script,
+                                        decisions=decisions)
+    finally:
+        # Agentes con procesos o memoria compartida propios (Lazy SMP, YBWC)
+        close = getattr(agent, 'close', None)
+        if close is not None:
+            close()
+    record = {'game_index': game_index, 'seed': seed, 'result': result}
+    record.update(stats)
+    # Arrays por decisión: ``results.append_record`` los guarda aparte en .npz
+    record['decisions'] = decisions.arrays()
+    return record
+
+
+def iter_games(layout, game_indices, seed=None, workers=1, agent_factory=make_agent, agent_kwargs=None,
+               max_ticks=None, debug=False, opening_book=None, position_cache=None, log_path=None):
+    """Juega las partidas ``game_indices`` y va devolviendo sus registros al terminar.
+
+    ``agent_factory`` tiene que poderse enviar a otro proceso (una función de
+    módulo, como ``make_agent``). Una ``PositionCache`` se pasa a los
+    procesos por su ruta.
+    """
+    game_indices = list(game_indices)
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    common = dict(agent_factory=agent_factory, agent_kwargs=agent_kwargs, max_ticks=max_ticks, debug=debug,
+                  opening_book=opening_book)
+    if workers == 1:
+        for i in game_indices:
+            yield play_game(layout, i, seed=game_seed(seed, i), position_cache=position_cache,
+                            log_path=log_path, **common)
+        return
+
+    if position_cache is not None and not isinstance(position_cache, (str, Path)):
+        position_cache = position_cache.path
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_game, layout, i, seed=game_seed(seed, i), position_cache=position_cache,
+                                   log_path=game_log_path(log_path, i, True), **common)
+                   for i in game_indices]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,59 @@
+"""Ratings incrementales Elo y Glicko (Glicko-1) para torneos.
+
+Cada partida es un enfrentamiento entre dos nombres con puntuación 1
+(victoria), 0.5 (empate) o 0 (derrota) para el primero. Las dos tablas se
+actualizan partida a partida (en Glicko cada partida es su propio periodo),
+así que se pueden reconstruir repitiendo el log en orden.
+"""
+import math
+
+_Q = math.log(10) / 400
+
+
+class Elo:
+    """Elo clásico con factor ``k`` fijo."""
+    def __init__(self, k=16, initial=1500.0):
+        self.k = k
+        self.initial = initial
+        self.ratings = {}
+
+    def rating(self, name):
+        return self.ratings.get(name, self.initial)
+
+    @staticmethod
+    def expected(ra, rb):
+        return 1.0 / (1.0 + 10 ** ((rb - ra) / 400))
+
+    def update(self, a, b, score):
+        ra, rb = self.rating(a), self.rating(b)
+        delta = self.k * (score - self.expected(ra, rb))
+        self.ratings[a] = ra + delta
+        self.ratings[b] = rb - delta
+
+
+def _g(rd):
+    return 1.0 / math.sqrt(1 + 3 * _Q * _Q * rd * rd / (math.pi * math.pi))
+
+
+class Glicko:
+    """Glicko-1: rating y desviación (RD), que baja con cada partida hasta ``min_rd``."""
+    def __init__(self, initial=1500.0, initial_rd=350.0, min_rd=30.0):
+        self.initial = initial
+        self.initial_rd = initial_rd
+        self.min_rd = min_rd
+        self.ratings = {}
+
+    def rating(self, name):
+        return self.ratings.get(name, (self.initial, self.initial_rd))
+
+    def _updated(self, r, rd, r_opp, rd_opp, score):
+        g = _g(rd_opp)
+        e = 1.0 / (1.0 + 10 ** (-g * (r - r_opp) / 400))
+        d2 = 1.0 / (_Q * _Q * g * g * e * (1 - e))
+        inv = 1.0 / (rd * rd) + 1.0 / d2
+        return r + _Q / inv * g * (score - e), max(self.min_rd, math.sqrt(1.0 / inv))
+
+    def update(self, a, b, score):
+        (ra, rda), (rb, rdb) = self.rating(a), self.rating(b)
+        self.ratings[a] = self._updated(ra, rda, rb, rdb, score)
+        self.ratings[b] = self._updated(rb, rdb, ra, rda, 1.0 - score)
@@ -0,0 +1,51 @@
+"""Agentes de ``src/agents`` por nombre, para barridos y experimentos.
+
+Los nombres son los de ``visual_test.py --algorithm`` más las variantes
+paralelas y el reflejo. ``make_agent`` es una función de módulo, así que
+se puede pasar como ``agent_factory`` a ``experiments.parallel``.
+"""
+from src.agents.minimax import MinimaxAgent, AlphaBetaAgent, ParallelAlphaBetaAgent
+from src.agents.expectimax import ExpectimaxAgent, ParallelExpectimaxAgent
+from src.agents.jitExpectimax import JitExpectimaxAgent
+from src.agents.lazySmp import LazySMPAlphaBetaAgent
+from src.agents.ybwc import YBWCAlphaBetaAgent
+from src.agents.reflexAgent import ReflexTankAgent
+
+
+def _minimax(depth, time_limit, max_workers, debug):
+    agent = MinimaxAgent(depth=depth)
+    # El constructor no acepta time_limit (igual que en visual_test.py)
+    agent.time_limit = time_limit
+    return agent
+
+
+AGENTS = {
+    'minimax': _minimax,
+    'alphabeta': lambda depth, time_limit, max_workers, debug:
+        AlphaBetaAgent(depth=depth, time_limit=time_limit),
+    'alphabeta_parallel': lambda depth, time_limit, max_workers, debug:
+        ParallelAlphaBetaAgent(depth=depth, time_limit=time_limit, max_workers=max_workers),
+    'alphabeta_lazysmp': lambda depth, time_limit, max_workers, debug:
+        LazySMPAlphaBetaAgent(depth=depth, time_limit=time_limit, num_workers=max_workers),
+    'alphabeta_ybwc': lambda depth, time_limit, max_workers, debug:
+        YBWCAlphaBetaAgent(depth=depth, time_limit=time_limit, num_workers=max_workers),
+    'expectimax': lambda depth, time_limit, max_workers, debug:
+        ExpectimaxAgent(depth=depth, time_limit=time_limit, debug=debug),
+    'expectimax_parallel': lambda depth, time_limit, max_workers, debug:
+        ParallelExpectimaxAgent(depth=depth, time_limit=time_limit, debug=debug, max_workers=max_workers),
+    'expectimax_jit': lambda depth, time_limit, max_workers, debug:
+        JitExpectimaxAgent(depth=depth, time_limit=time_limit, debug=debug),
+    'reflex': lambda depth, time_limit, max_workers, debug: ReflexTankAgent('offensive'),
+}
+
+# Agentes que reparten la búsqueda entre hilos o procesos propios (usan max_workers)
+PARALLEL_AGENTS = ('alphabeta_parallel', 'alphabeta_lazysmp', 'alphabeta_ybwc', 'expectimax_parallel')
+
+
+def make_agent(agent='expectimax', depth=3, time_limit=8, max_workers=None, debug=False):
+    """Instancia el agente ``agent`` (clave de ``AGENTS``)."""
+    try:
+        factory = AGENTS[agent]
+    except KeyError:
+        raise ValueError(f"Agente desconocido: {agent!r} (disponibles: {', '.join(AGENTS)})")
+    return factory(depth, time_limit, max_workers, debug)
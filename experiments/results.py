@@ -0,0 +1,204 @@
+"""Resultados de experimentos en JSONL: una línea por partida, escrita al terminarla.
+
+Cada línea es el registro de ``experiments.parallel.play_game`` más el campo
+``config`` (``config_hash`` de la configuración del experimento). Un corte a
+mitad de campaña solo pierde las partidas en curso, y ``completed_games``
+permite reanudar saltando las que ya están en el fichero con la misma
+configuración. ``summarize`` reconstruye desde el log el ``summary`` y el
+bloque ``aggregate`` del JSON de ``run_experiments``::
+
+    python -m experiments.results experiments_results/results_map0_expectimax_depth3.jsonl
+"""
+import os
+import json
+import hashlib
+import argparse
+from statistics import mean
+
+from experiments.decisions import save_decisions, decisions_dir, merge_latency, export_histogram, SEARCH_COUNTERS
+
+
+def config_hash(config):
+    """Hash corto y estable de un dict de configuración (claves ordenadas)."""
+    data = json.dumps(config, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()[:12]
+
+
+def experiment_config(map_index, agent, depth, time_limit, seed=None, max_workers=None, max_ticks=None,
+                      opening_book=None, enemy_script='attack_base'):
+    """Valores que cambian el resultado de una partida (no cuántas se juegan ni las cachés)."""
+    return {
+        'map_index': map_index,
+        'agent': agent,
+        'depth': depth,
+        'time_limit': time_limit,
+        'seed': seed,
+        'max_workers': max_workers,
+        'max_ticks': max_ticks,
+        'opening_book': str(opening_book) if isinstance(opening_book, (str, os.PathLike))
+                        else (None if opening_book is None else type(opening_book).__name__),
+        'enemy_script': enemy_script if isinstance(enemy_script, str) else list(enemy_script),
+    }
+
+
+def read_records(path, config=None):
+    """Registros del log (solo los de ``config`` si se da); ignora una última línea a medias."""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if config is None or record.get('config') == config:
+                records.append(record)
+    return records
+
+
+def completed_games(path, config):
+    """Índices de las partidas ya guardadas para ``config``."""
+    return {r['game_index'] for r in read_records(path, config)}
+
+
+def append_record(path, record):
+    """Añade una línea y la fuerza a disco antes de seguir.
+
+    Los arrays por decisión (``record['decisions']``) se guardan en
+    ``<log>.decisions/<config>-<partida>.npz`` y en el registro queda solo
+    ``decisions_file``.
+    """
+    arrays = record.pop('decisions', None)
+    if arrays is not None:
+        name = f"{record.get('config', 'game')}-{record['game_index']}.npz"
+        save_decisions(os.path.join(decisions_dir(path), name), arrays)
+        record['decisions_file'] = name
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def drop_config(path, config):
+    """Quita del log las partidas de ``config`` (empezar de cero sin reanudar)."""
+    if not os.path.exists(path):
+        return
+    keep = [r for r in read_records(path) if r.get('config') != config]
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for record in keep:
+            f.write(json.dumps(record) + '\n')
+    os.replace(tmp, path)
+
+
+def summarize(records):
+    """``{'summary', 'per_game', 'aggregate'}`` como en el JSON de ``run_experiments``.
+
+    Si una partida aparece varias veces (reanudaciones solapadas) cuenta la última;
+    las de configuraciones distintas con el mismo índice se cuentan por separado.
+    """
+    by_game = {}
+    for record in records:
+        by_game[(record.get('config') or '', record['game_index'])] = record
+    per_game = [by_game[i] for i in sorted(by_game)]
+    wins = sum(1 for g in per_game if g['result'] == 'win')
+    losses = sum(1 for g in per_game if g['result'] == 'loss')
+    draws = len(per_game) - wins - losses
+    out_data = {
+        'summary': {
+            'wins': wins,
+            'losses': losses,
+            'draws': draws,
+            'num_games': len(per_game),
+        },
+        'per_game': per_game,
+    }
+
+    # Agregar agregados si hay stats
+    if per_game:
+        durations = [g['duration'] for g in per_game]
+        avg_nodes = [g['avg_nodes_per_search'] for g in per_game]
+        total_nodes = sum(g.get('total_nodes', 0) for g in per_game)
+        total_decisions = sum(g.get('decision_count', 0) for g in per_game)
+        out_data['aggregate'] = {
+            'mean_duration_per_simulation': mean(durations) if durations else 0.0,
+            'mean_avg_nodes_per_search': mean(avg_nodes) if avg_nodes else 0.0,
+            'overall_total_nodes': total_nodes,
+            'overall_total_decisions': total_decisions,
+            'overall_avg_nodes_per_search': (total_nodes / total_decisions) if total_decisions > 0 else 0.0,
+        }
+        searches = [g['search'] for g in per_game if 'search' in g]
+        if searches:
+            search = {name: sum(g[name] for g in searches) for name in SEARCH_COUNTERS}
+            sources = {}
+            for g in searches:
+                for name, n in g['sources'].items():
+                    sources[name] = sources.get(name, 0) + n
+            search['sources'] = sources
+            out_data['aggregate']['search'] = search
+        caches = [g['eval_cache'] for g in per_game if 'eval_cache' in g]
+        if caches:
+            hits = sum(c['hits'] for c in caches)
+            lookups = hits + sum(c['misses'] for c in caches)
+            out_data['aggregate']['eval_cache_hit_rate'] = hits / lookups if lookups else 0.0
+            out_data['aggregate']['eval_cache_evictions'] = sum(c['evictions'] for c in caches)
+        latencies = [g['latency'] for g in per_game if 'latency' in g]
+        if latencies:
+            latency = merge_latency(latencies)
+            out_data['aggregate']['latency'] = latency
+            fallbacks = sum(g.get('fallbacks', 0) for g in per_game)
+            out_data['aggregate']['fallbacks'] = fallbacks
+            out_data['aggregate']['fallback_rate'] = fallbacks / latency['count'] if latency['count'] else 0.0
+    return out_data
+
+
+def rebuild_summary(jsonl_path, json_path=None, config=None):
+    """Reconstruye el JSON de resultados a partir del log; devuelve los datos.
+
+    Si el log mezcla varias configuraciones hay que elegir una con ``config``
+    (``ValueError`` con los hashes presentes si no se da).
+    """
+    records = read_records(jsonl_path, config)
+    configs = sorted({r.get('config') or '' for r in records})
+    if config is None and len(configs) > 1:
+        raise ValueError(f"{jsonl_path} tiene {len(configs)} configuraciones, elige una con --config: "
+                         + ', '.join(configs))
+    out_data = summarize(records)
+    if records and 'config_values' in records[-1]:
+        out_data['config'] = records[-1]['config_values']
+    if json_path is not None:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(out_data, f, indent=2)
+    return out_data
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Reconstruye el resumen JSON de un log de resultados JSONL')
+    parser.add_argument('jsonl')
+    parser.add_argument('--config', default=None,
+                        help='hash de configuración (obligatorio si el log tiene varias)')
+    parser.add_argument('--out', '-o', default=None, help='JSON de salida (por defecto, junto al log)')
+    parser.add_argument('--histogram', default=None, help='CSV con el histograma de latencias por configuración')
+    args = parser.parse_args()
+
+    out = args.out or os.path.splitext(args.jsonl)[0] + '.json'
+    try:
+        data = rebuild_summary(args.jsonl, out, args.config)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"Resumen guardado en {out}: {data['summary']}")
+    latency = data.get('aggregate', {}).get('latency')
+    if latency and latency['count']:
+        print(f"Latencia: p50={latency['p50']:.3f}s p90={latency['p90']:.3f}s p99={latency['p99']:.3f}s "
+              f"max={latency['max']:.3f}s, fuera de tiempo {100 * latency['over_time_limit_fraction']:.1f}%, "
+              f"fallbacks {data['aggregate']['fallbacks']}")
+    if args.histogram:
+        groups = {}
+        for record in read_records(args.jsonl, args.config):
+            groups.setdefault(record.get('config', 'all'), []).append(record.get('latency'))
+        export_histogram(args.histogram, {name: merge_latency(lats) for name, lats in groups.items()})
+        print(f"Histograma guardado en {args.histogram}")
@@ -0,0 +1,326 @@
+"""Parada temprana de lotes de partidas (tests secuenciales).
+
+Dos reglas:
+
+- ``PrecisionStopper``: para cuando los intervalos de Wilson de las tasas de
+  victoria, derrota y empate tienen todos una semianchura <= ``precision``.
+  Es la que usa ``run_experiments(precision=...)``.
+- ``PairedSPRT``: comparación A/B con partidas emparejadas (la partida i de
+  A y la de B usan la misma semilla). Solo informan los pares en los que un
+  agente puntúa más que el otro (victoria 1, empate 0.5, derrota 0); sobre
+  ellos se hace un SPRT de Wald con H0: p = 0.5 - delta (mejor B) frente a
+  H1: p = 0.5 + delta (mejor A), siendo p la probabilidad de que gane A un
+  par distinto. Además, si el intervalo de la diferencia media de
+  puntuación cae entero dentro de ``±margin``, los agentes se dan por
+  equivalentes. Con la misma semilla los enemigos tiran los mismos números
+  (``experiments.utils.game_rng``), así que los pares comparten el azar;
+  ``paired_differences`` mide cuánto reduce eso la varianza.
+  ``compare_agents`` la usa::
+
+    python -m experiments.sequential expectimax alphabeta --depth 3 --time-limit 2 --max-games 200
+
+Las dos cuentan las partidas ahorradas respecto al máximo del lote. Con
+varios procesos las partidas terminan desordenadas; las reglas solo miran
+resultados ya terminados, que siguen siendo independientes entre sí.
+"""
+import math
+import argparse
+import concurrent.futures
+from pathlib import Path
+from statistics import NormalDist
+
+from experiments.loader import get_map
+from experiments.parallel import play_game, game_seed
+from experiments.registry import AGENTS, make_agent
+
+SCORES = {'win': 1.0, 'draw': 0.5, 'loss': 0.0}
+
+
+def z_value(confidence):
+    """Cuantil normal bilateral de ``confidence`` (1.96 para 0.95)."""
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+def wilson_interval(successes, n, confidence=0.95):
+    """Intervalo de Wilson ``(bajo, alto)`` de una proporción."""
+    if n == 0:
+        return 0.0, 1.0
+    z = z_value(confidence)
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+class PrecisionStopper:
+    """Para cuando las tres tasas (victoria/derrota/empate) se conocen con ``precision``."""
+    rule = 'precision'
+
+    def __init__(self, precision=0.05, confidence=0.95, min_games=10):
+        self.precision = precision
+        self.confidence = confidence
+        self.min_games = min_games
+        self.counts = {'win': 0, 'loss': 0, 'draw': 0}
+
+    @property
+    def n(self):
+        return sum(self.counts.values())
+
+    def update(self, result):
+        self.counts[result if result in self.counts else 'draw'] += 1
+
+    def intervals(self):
+        return {k: wilson_interval(c, self.n, self.confidence) for k, c in self.counts.items()}
+
+    def half_width(self):
+        return max((hi - lo) / 2 for lo, hi in self.intervals().values())
+
+    @property
+    def done(self):
+        return self.n >= self.min_games and self.half_width() <= self.precision
+
+    def report(self, max_games):
+        return {
+            'rule': self.rule,
+            'precision': self.precision,
+            'confidence': self.confidence,
+            'stopped_early': self.done and self.n < max_games,
+            'games_played': self.n,
+            'games_saved': max(0, max_games - self.n),
+            'half_width': self.half_width(),
+            'intervals': self.intervals(),
+        }
+
+
+class PairedSPRT:
+    """SPRT sobre pares de partidas A/B con la misma semilla.
+
+    ``decision`` es ``'A'``, ``'B'``, ``'equal'`` o None (seguir jugando).
+    """
+    rule = 'sprt'
+
+    def __init__(self, delta=0.1, alpha=0.05, beta=0.05, margin=0.05, min_pairs=10):
+        if not 0 < delta < 0.5:
+            raise ValueError("delta tiene que estar en (0, 0.5)")
+        self.delta = delta
+        self.alpha = alpha
+        self.beta = beta
+        self.margin = margin
+        self.min_pairs = min_pairs
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self._win = math.log((0.5 + delta) / (0.5 - delta))
+        self.llr = 0.0
+        self.pairs = 0
+        self.a_better = 0
+        self.b_better = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def update(self, result_a, result_b):
+        diff = SCORES.get(result_a, 0.5) - SCORES.get(result_b, 0.5)
+        self.pairs += 1
+        self._sum += diff
+        self._sum_sq += diff * diff
+        if diff > 0:
+            self.a_better += 1
+            self.llr += self._win
+        elif diff < 0:
+            self.b_better += 1
+            self.llr -= self._win
+
+    def mean_difference(self):
+        """Diferencia media de puntuación A - B y su intervalo al 1 - alpha."""
+        n = self.pairs
+        if n == 0:
+            return 0.0, (-1.0, 1.0)
+        mean = self._sum / n
+        if n < 2:
+            return mean, (-1.0, 1.0)
+        var = max(0.0, (self._sum_sq - n * mean * mean) / (n - 1))
+        half = z_value(1 - self.alpha) * math.sqrt(var / n)
+        return mean, (mean - half, mean + half)
+
+    @property
+    def decision(self):
+        if self.llr >= self.upper:
+            return 'A'
+        if self.llr <= self.lower:
+            return 'B'
+        if self.pairs >= self.min_pairs:
+            lo, hi = self.mean_difference()[1]
+            if -self.margin <= lo and hi <= self.margin:
+                return 'equal'
+        return None
+
+    @property
+    def done(self):
+        return self.decision is not None
+
+    def report(self, max_pairs):
+        mean, interval = self.mean_difference()
+        return {
+            'rule': self.rule,
+            'decision': self.decision,
+            'delta': self.delta,
+            'alpha': self.alpha,
+            'beta': self.beta,
+            'margin': self.margin,
+            'llr': self.llr,
+            'bounds': (self.lower, self.upper),
+            'pairs': self.pairs,
+            'a_better': self.a_better,
+            'b_better': self.b_better,
+            'mean_score_difference': mean,
+            'difference_interval': interval,
+            'games_played': 2 * self.pairs,
+            'games_saved': 2 * max(0, max_pairs - self.pairs),
+        }
+
+
+def paired_differences(records_a, records_b, confidence=0.95):
+    """Diferencias de puntuación A - B entre partidas con el mismo ``game_index`` (y semilla).
+
+    Además de la media y su intervalo, compara el error estándar emparejado
+    con el que tendrían las mismas partidas sin emparejar: ``variance_ratio``
+    es cuántas veces menos partidas hacen falta para la misma precisión.
+    """
+    by_index = {r['game_index']: r for r in records_b}
+    diffs, a_scores, b_scores = [], [], []
+    for record in records_a:
+        other = by_index.get(record['game_index'])
+        if other is None or other.get('seed') != record.get('seed'):
+            continue
+        a, b = SCORES.get(record['result'], 0.5), SCORES.get(other['result'], 0.5)
+        a_scores.append(a)
+        b_scores.append(b)
+        diffs.append(a - b)
+    n = len(diffs)
+    if n < 2:
+        return {'pairs': n, 'mean_difference': diffs[0] if diffs else 0.0, 'interval': (-1.0, 1.0)}
+
+    def variance(xs):
+        m = sum(xs) / len(xs)
+        return sum((x - m) ** 2 for x in xs) / (len(xs) - 1)
+
+    mean = sum(diffs) / n
+    paired_se = math.sqrt(variance(diffs) / n)
+    unpaired_se = math.sqrt((variance(a_scores) + variance(b_scores)) / n)
+    half = z_value(confidence) * paired_se
+    return {
+        'pairs': n,
+        'mean_difference': mean,
+        'interval': (mean - half, mean + half),
+        'paired_se': paired_se,
+        'unpaired_se': unpaired_se,
+        'variance_ratio': (unpaired_se / paired_se) ** 2 if paired_se > 0 else math.inf,
+    }
+
+
+def compare_agents(agent_a, agent_b, max_games=200, depth=3, time_limit=8, map_index=0, seed=0, workers=1,
+                   max_workers=None, max_ticks=None, delta=0.1, alpha=0.05, beta=0.05, margin=0.05, min_pairs=10,
+                   base_path=None, debug=False):
+    """Juega pares A/B (misma semilla por par) hasta que ``PairedSPRT`` decide o se llega a ``max_games`` pares.
+
+    Devuelve el informe de ``PairedSPRT.report`` con los resultados de cada par.
+    """
+    base = Path(base_path) if base_path is not None else Path.cwd()
+    layout = get_map(base, map_index)
+    test = PairedSPRT(delta=delta, alpha=alpha, beta=beta, margin=margin, min_pairs=min_pairs)
+    common = dict(agent_factory=make_agent, max_ticks=max_ticks, debug=debug)
+
+    def kwargs(agent):
+        return {'agent': agent, 'depth': depth, 'time_limit': time_limit, 'max_workers': max_workers,
+                'debug': debug}
+
+    pending = {}
+    pairs = []
+
+    def finish(record, side):
+        i = record['game_index']
+        other = pending.pop(i, None)
+        if other is None:
+            pending[i] = (side, record['result'])
+            return
+        results = {side: record['result'], other[0]: other[1]}
+        test.update(results['A'], results['B'])
+        pairs.append({'game_index': i, 'A': results['A'], 'B': results['B']})
+        if debug:
+            print(f"[compare] par #{i}: A={results['A']} B={results['B']} llr={test.llr:.2f}")
+
+    if workers == 1:
+        for i in range(max_games):
+            for side, agent in (('A', agent_a), ('B', agent_b)):
+                finish(play_game(layout, i, seed=game_seed(seed, i), agent_kwargs=kwargs(agent), **common), side)
+            if test.done:
+                break
+    else:
+        # Se mantienen ``workers`` partidas en vuelo y se lanzan pares nuevos solo mientras no haya decisión
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            tasks = ((i, side, agent) for i in range(max_games) for side, agent in (('A', agent_a), ('B', agent_b)))
+            running = {}
+
+            def submit():
+                for i, side, agent in tasks:
+                    future = executor.submit(play_game, layout, i, seed=game_seed(seed, i),
+                                             agent_kwargs=kwargs(agent), **common)
+                    running[future] = side
+                    return True
+                return False
+
+            for _ in range(workers):
+                submit()
+            try:
+                while running:
+                    finished, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in finished:
+                        finish(future.result(), running.pop(future))
+                    if test.done:
+                        break
+                    for _ in finished:
+                        submit()
+            finally:
+                for future in running:
+                    future.cancel()
+
+    report = test.report(max_games)
+    report['agents'] = {'A': agent_a, 'B': agent_b}
+    report['per_pair'] = sorted(pairs, key=lambda p: p['game_index'])
+    report['paired'] = paired_differences(
+        [{'game_index': p['game_index'], 'result': p['A']} for p in pairs],
+        [{'game_index': p['game_index'], 'result': p['B']} for p in pairs], 1 - alpha)
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Comparación A/B con SPRT y partidas emparejadas')
+    parser.add_argument('agent_a', choices=list(AGENTS))
+    parser.add_argument('agent_b', choices=list(AGENTS))
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--time-limit', type=float, default=8)
+    parser.add_argument('--level', type=int, default=1, choices=[1, 2, 3, 4])
+    parser.add_argument('--max-games', type=int, default=200, help='máximo de pares')
+    parser.add_argument('--delta', type=float, default=0.1)
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+    parser.add_argument('--margin', type=float, default=0.05)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--max-ticks', type=int, default=None)
+    parser.add_argument('--debug', action='store_true')
+    args = parser.parse_args()
+
+    report = compare_agents(args.agent_a, args.agent_b, max_games=args.max_games, depth=args.depth,
+                            time_limit=args.time_limit, map_index=args.level - 1, seed=args.seed,
+                            workers=args.workers, max_ticks=args.max_ticks, delta=args.delta, alpha=args.alpha,
+                            beta=args.beta, margin=args.margin, debug=args.debug)
+    lo, hi = report['difference_interval']
+    print(f"Decisión: {report['decision'] or 'sin decidir'} tras {report['pairs']} pares "
+          f"(A mejor en {report['a_better']}, B mejor en {report['b_better']}, LLR={report['llr']:.2f})")
+    print(f"Diferencia media de puntuación A-B: {report['mean_score_difference']:+.3f} [{lo:+.3f}, {hi:+.3f}]")
+    paired = report['paired']
+    if 'variance_ratio' in paired:
+        print(f"Error estándar emparejado {paired['paired_se']:.3f} frente a {paired['unpaired_se']:.3f} sin "
+              f"emparejar (x{paired['variance_ratio']:.1f} menos partidas para la misma precisión)")
+    print(f"Partidas jugadas: {report['games_played']}, ahorradas: {report['games_saved']}")
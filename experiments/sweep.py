@@ -0,0 +1,296 @@
+"""Barrido de parámetros: agente, profundidad, límite de tiempo, max_workers y nivel.
+
+La rejilla es un dict de listas (``DEFAULT_GRID``); cada combinación es una
+configuración y cada partida de cada configuración, una tarea del mismo
+``ProcessPoolExecutor``, así que los procesos no se quedan parados entre
+configuraciones. Los resultados se añaden partida a partida a un JSONL
+(``experiments.results``) con el hash de la configuración: al repetir el
+barrido solo se juegan las partidas que faltan. Al final se escribe una tabla
+CSV con una fila por configuración y, con ``--baseline``, la diferencia
+emparejada (misma semilla por partida) frente a un agente de referencia::
+
+    python -m experiments.sweep --agent expectimax alphabeta --depth 2 3 --level 1 2 3 4 --games 10
+"""
+import os
+import csv
+import argparse
+import itertools
+import concurrent.futures
+from pathlib import Path
+
+from experiments.loader import get_map
+from experiments.parallel import play_game, game_seed
+from experiments.registry import AGENTS, PARALLEL_AGENTS, make_agent
+from experiments.sequential import paired_differences
+from experiments.distributed import run_distributed, parse_address
+from experiments.results import (config_hash, experiment_config, completed_games, append_record, drop_config,
+                                 read_records, summarize)
+
+DEFAULT_GRID = {
+    'agent': ['expectimax'],
+    'depth': [3],
+    'time_limit': [8],
+    'max_workers': [None],
+    'level': [1],
+}
+
+TABLE_COLUMNS = ('agent', 'level', 'depth', 'time_limit', 'max_workers', 'games', 'wins', 'losses', 'draws',
+                 'win_rate', 'mean_duration', 'avg_nodes_per_search', 'latency_p50', 'latency_p90',
+                 'latency_p99', 'latency_max', 'over_time_limit', 'fallbacks', 'config',
+                 'paired_diff', 'paired_low', 'paired_high', 'variance_ratio')
+
+
+def expand_grid(grid, seed=None, max_ticks=None, enemy_script='attack_base'):
+    """Configuraciones (``experiment_config``) de todas las combinaciones de ``grid``.
+
+    ``max_workers`` no cambia nada en los agentes secuenciales, así que para
+    ellos se fija a None y no se repiten configuraciones.
+    """
+    grid = dict(DEFAULT_GRID, **grid)
+    for agent in grid['agent']:
+        if agent not in AGENTS:
+            raise ValueError(f"Agente desconocido: {agent!r} (disponibles: {', '.join(AGENTS)})")
+    configs = []
+    seen = set()
+    for agent, depth, time_limit, max_workers, level in itertools.product(
+            grid['agent'], grid['depth'], grid['time_limit'], grid['max_workers'], grid['level']):
+        if agent not in PARALLEL_AGENTS:
+            max_workers = None
+        config = experiment_config(int(level) - 1, agent, depth, time_limit, seed=seed, max_workers=max_workers,
+                                   max_ticks=max_ticks, enemy_script=enemy_script)
+        key = config_hash(config)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+def play_config(config, layout, game_index, debug=False):
+    """Juega la partida ``game_index`` de una configuración; el registro lleva su hash."""
+    record = play_game(layout, game_index, seed=game_seed(config['seed'], game_index), agent_factory=make_agent,
+                       agent_kwargs={'agent': config['agent'], 'depth': config['depth'],
+                                     'time_limit': config['time_limit'], 'max_workers': config['max_workers'],
+                                     'debug': debug},
+                       max_ticks=config['max_ticks'], debug=debug, enemy_script=config['enemy_script'])
+    record['config'] = config_hash(config)
+    record['config_values'] = config
+    return record
+
+
+def run_tasks(tasks, layouts, jsonl_path, workers=1, debug=False):
+    """Juega las tareas ``(config, game_index)`` y devuelve sus registros según terminan.
+
+    Cada registro se añade a ``jsonl_path`` antes de devolverlo.
+    """
+    if workers == 1:
+        for config, i in tasks:
+            record = play_config(config, layouts[config['map_index']], i, debug)
+            append_record(jsonl_path, record)
+            yield record
+        return
+    if not tasks:
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_config, config, layouts[config['map_index']], i, debug)
+                   for config, i in tasks]
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                record = future.result()
+                append_record(jsonl_path, record)
+                yield record
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def schedule(tasks, layouts, jsonl_path, workers=1, broker=None, debug=False, authkey=None):
+    """``run_tasks`` en esta máquina o, con ``broker='host:puerto'``, ``distributed.run_distributed``."""
+    if broker is None:
+        return run_tasks(tasks, layouts, jsonl_path, workers, debug)
+    return run_distributed(tasks, jsonl_path, parse_address(broker), authkey=authkey, local_workers=workers,
+                           debug=debug)
+
+
+def pending_tasks(configs, num_games, jsonl_path, base, resume=True):
+    """Tareas ``(config, game_index)`` que faltan en el log y layouts por ``map_index``."""
+    tasks = []
+    layouts = {}
+    for config in configs:
+        key = config_hash(config)
+        if resume:
+            done = completed_games(jsonl_path, key)
+        else:
+            drop_config(jsonl_path, key)
+            done = set()
+        if config['map_index'] not in layouts:
+            layouts[config['map_index']] = get_map(base, config['map_index'])
+        tasks.extend((config, i) for i in range(num_games) if i not in done)
+    return tasks, layouts
+
+
+def default_workers(configs):
+    """Núcleos divididos entre el mayor ``max_workers`` de los agentes paralelos."""
+    per_task = max([c['max_workers'] or 1 for c in configs if c['agent'] in PARALLEL_AGENTS] or [1])
+    return max(1, (os.cpu_count() or 1) // per_task)
+
+
+def sweep_table(jsonl_path, configs, num_games, baseline=None):
+    """Una fila por configuración con el resumen de sus primeras ``num_games`` partidas.
+
+    Con ``baseline`` (nombre de agente) se añade la diferencia emparejada de
+    puntuación frente a ese agente con el mismo nivel, profundidad y tiempo
+    (``sequential.paired_differences``; las semillas coinciden por partida).
+    """
+    by_config = {}
+    for record in read_records(jsonl_path):
+        if record['game_index'] < num_games:
+            by_config.setdefault(record.get('config'), []).append(record)
+    rows = []
+    for config in configs:
+        key = config_hash(config)
+        data = summarize(by_config.get(key, []))
+        summary = data['summary']
+        aggregate = data.get('aggregate', {})
+        games = summary['num_games']
+        rows.append({
+            'agent': config['agent'],
+            'level': config['map_index'] + 1,
+            'depth': config['depth'],
+            'time_limit': config['time_limit'],
+            'max_workers': config['max_workers'],
+            'games': games,
+            'wins': summary['wins'],
+            'losses': summary['losses'],
+            'draws': summary['draws'],
+            'win_rate': summary['wins'] / games if games else 0.0,
+            'mean_duration': aggregate.get('mean_duration_per_simulation', 0.0),
+            'avg_nodes_per_search': aggregate.get('overall_avg_nodes_per_search', 0.0),
+            'config': key,
+        })
+        latency = aggregate.get('latency')
+        if latency and latency['count']:
+            rows[-1].update({
+                'latency_p50': latency['p50'],
+                'latency_p90': latency['p90'],
+                'latency_p99': latency['p99'],
+                'latency_max': latency['max'],
+                'over_time_limit': latency['over_time_limit_fraction'],
+                'fallbacks': aggregate['fallbacks'],
+            })
+        if baseline is not None and config['agent'] != baseline:
+            base_config = dict(config, agent=baseline,
+                               max_workers=config['max_workers'] if baseline in PARALLEL_AGENTS else None)
+            paired = paired_differences(data['per_game'],
+                                        summarize(by_config.get(config_hash(base_config), []))['per_game'])
+            if paired['pairs']:
+                rows[-1].update({
+                    'paired_diff': paired['mean_difference'],
+                    'paired_low': paired['interval'][0],
+                    'paired_high': paired['interval'][1],
+                    'variance_ratio': paired.get('variance_ratio', ''),
+                })
+    return rows
+
+
+def write_table(rows, path):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=TABLE_COLUMNS, restval='')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def format_table(rows):
+    """Tabla de texto para la consola."""
+    lines = [f"{'agente':22s} {'nivel':>5s} {'prof':>4s} {'t':>6s} {'hilos':>5s} {'games':>5s} "
+             f"{'V':>3s} {'D':>3s} {'E':>3s} {'%V':>6s} {'s/partida':>9s} {'nodos/dec':>10s} "
+             f"{'p99 s':>7s} {'%>t':>5s}"]
+    for r in rows:
+        lines.append(f"{r['agent']:22s} {r['level']:5d} {r['depth']:4d} {r['time_limit']:6g} "
+                     f"{str(r['max_workers'] or '-'):>5s} {r['games']:5d} {r['wins']:3d} {r['losses']:3d} "
+                     f"{r['draws']:3d} {100 * r['win_rate']:5.1f}% {r['mean_duration']:9.2f} "
+                     f"{r['avg_nodes_per_search']:10.1f}"
+                     + (f" {r['latency_p99']:7.3f} {100 * r['over_time_limit']:4.1f}%"
+                        if 'latency_p99' in r else f" {'-':>7s} {'-':>5s}")
+                     + (f"  A-base {r['paired_diff']:+.2f} [{r['paired_low']:+.2f}, {r['paired_high']:+.2f}]"
+                        if 'paired_diff' in r else ''))
+    return '\n'.join(lines)
+
+
+def run_sweep(grid=None, num_games=10, workers=None, seed=0, max_ticks=None, base_path=None, out=None,
+              resume=True, debug=False, baseline=None, broker=None,
+              authkey=None):
+    """Juega las partidas que faltan de cada configuración de ``grid`` y devuelve la tabla.
+
+    workers: procesos del barrido. Por defecto, los núcleos divididos entre el
+        mayor ``max_workers`` de la rejilla, para no sobresuscribir la máquina
+        con agentes que ya reparten su búsqueda.
+    out: ruta base de los resultados (``<out>.jsonl`` y ``<out>.csv``); por
+        defecto ``experiments_results/sweep``.
+    resume: si es False, se descartan y se repiten las partidas ya guardadas
+        de estas configuraciones.
+    baseline: agente de referencia para las diferencias emparejadas de la tabla.
+    broker: dirección ``'host:puerto'`` en la que escuchar para repartir las
+        partidas entre trabajadores remotos (``experiments.distributed``);
+        ``workers`` pasa a ser el número de trabajadores locales que se conectan.
+    authkey: clave del broker (``distributed.resolve_authkey``: por defecto
+        la variable ``BATTLECITY_AUTHKEY``).
+    """
+    base = Path(base_path) if base_path is not None else Path.cwd()
+    configs = expand_grid(grid or {}, seed=seed, max_ticks=max_ticks)
+    if out is None:
+        out = base / 'experiments_results' / 'sweep'
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    jsonl_path = str(out.with_suffix('.jsonl'))
+
+    tasks, layouts = pending_tasks(configs, num_games, jsonl_path, base, resume)
+    print(f"[sweep] {len(configs)} configuraciones, {len(tasks)} partidas por jugar "
+          f"({len(configs) * num_games - len(tasks)} ya guardadas)")
+
+    if workers is None:
+        workers = default_workers(configs)
+    for done, record in enumerate(schedule(tasks, layouts, jsonl_path, workers, broker, debug, authkey), start=1):
+        if debug:
+            print(f"[sweep] {done}/{len(tasks)} {record['config_values']['agent']} "
+                  f"#{record['game_index']} -> {record['result']}")
+
+    rows = sweep_table(jsonl_path, configs, num_games, baseline)
+    csv_path = out.with_suffix('.csv')
+    write_table(rows, csv_path)
+    print(format_table(rows))
+    print(f"Tabla guardada en {csv_path}")
+    return rows
+
+
+def _optional_int(value):
+    return None if value.lower() == 'none' else int(value)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Barrido de agentes, profundidades, límites de tiempo y niveles')
+    parser.add_argument('--agent', nargs='+', default=DEFAULT_GRID['agent'], choices=list(AGENTS))
+    parser.add_argument('--depth', nargs='+', type=int, default=DEFAULT_GRID['depth'])
+    parser.add_argument('--time-limit', nargs='+', type=float, default=DEFAULT_GRID['time_limit'])
+    parser.add_argument('--max-workers', nargs='+', type=_optional_int, default=DEFAULT_GRID['max_workers'],
+                        help='hilos/procesos de los agentes paralelos (None = por defecto del agente)')
+    parser.add_argument('--level', nargs='+', type=int, default=DEFAULT_GRID['level'], choices=[1, 2, 3, 4])
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=None, help='procesos del barrido')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-ticks', type=int, default=None)
+    parser.add_argument('--out', default=None, help='ruta base de <out>.jsonl y <out>.csv')
+    parser.add_argument('--no-resume', action='store_true', help='repetir las partidas ya guardadas')
+    parser.add_argument('--broker', default=None,
+                        help='host:puerto en el que repartir las partidas a trabajadores remotos')
+    parser.add_argument('--authkey', default=None,
+                        help='clave del broker (por defecto $BATTLECITY_AUTHKEY)')
+    parser.add_argument('--baseline', default=None, choices=list(AGENTS),
+                        help='agente de referencia para las diferencias emparejadas')
+    parser.add_argument('--debug', action='store_true')
+    args = parser.parse_args()
+
+    grid = {'agent': args.agent, 'depth': args.depth, 'time_limit': args.time_limit,
+            'max_workers': args.max_workers, 'level': args.level}
+    run_sweep(grid, num_games=args.games, workers=args.workers, seed=args.seed, max_ticks=args.max_ticks,
+              out=args.out, resume=not args.no_resume, debug=args.debug, baseline=args.baseline,
+              broker=args.broker, authkey=args.authkey)
@@ -0,0 +1,220 @@
+"""Torneo todos contra todos: configuraciones de agente contra escenarios.
+
+Cada configuración de agente (agente, profundidad, límite de tiempo,
+max_workers) juega contra cada escenario: un nivel (1–4) con una mezcla de
+enemigos scriptados (``ENEMY_MIXES``). Las partidas se reparten entre
+procesos como en ``experiments.sweep`` y se guardan partida a partida en un
+JSONL, así que el torneo se puede cortar y continuar. Los agentes y los
+escenarios son los jugadores de las tablas Elo y Glicko
+(``experiments.rating``), que se actualizan con cada partida según termina y
+se escriben en ``<out>.json`` junto con el coste de cómputo de cada agente
+(nodos, tiempo de reloj y fallbacks por tiempo). Al final se imprime la
+clasificación y el mejor agente por presupuesto de CPU (``time_limit`` por
+hilos de búsqueda)::
+
+    python -m experiments.tournament --agent expectimax alphabeta expectimax_jit --depth 2 3 --time-limit 1 4 --games 4
+"""
+import os
+import json
+import argparse
+from pathlib import Path
+
+from experiments.registry import AGENTS
+from experiments.results import config_hash, read_records
+from experiments.rating import Elo, Glicko
+from experiments.sequential import SCORES
+from experiments.sweep import expand_grid, pending_tasks, schedule, default_workers
+
+ENEMY_MIXES = {
+    'attack': 'attack_base',
+    'random': 'random',
+    'mixed': ['attack_base', 'random'],
+}
+
+
+def agent_label(config):
+    label = f"{config['agent']} d{config['depth']} t{config['time_limit']:g}"
+    if config['max_workers']:
+        label += f" w{config['max_workers']}"
+    return label
+
+
+def scenario_label(config):
+    script = config['enemy_script']
+    mix = next((name for name, value in ENEMY_MIXES.items() if value == script), str(script))
+    return f"L{config['map_index'] + 1}/{mix}"
+
+
+def cpu_budget(config):
+    """Segundos de CPU por decisión que puede gastar la configuración."""
+    return config['time_limit'] * (config['max_workers'] or 1)
+
+
+class Standings:
+    """Ratings y coste acumulado de un torneo, actualizados partida a partida."""
+    def __init__(self):
+        self.elo = Elo()
+        self.glicko = Glicko()
+        self.agents = {}
+        self.scenarios = {}
+
+    def add(self, record):
+        config = record['config_values']
+        a, s = agent_label(config), scenario_label(config)
+        score = SCORES.get(record['result'], 0.5)
+        self.elo.update(a, s, score)
+        self.glicko.update(a, s, score)
+        row = self.agents.setdefault(a, {
+            'agent': config['agent'], 'depth': config['depth'], 'time_limit': config['time_limit'],
+            'max_workers': config['max_workers'], 'cpu_budget': cpu_budget(config),
+            'games': 0, 'score': 0.0, 'nodes': 0, 'decisions': 0, 'wall_time': 0.0, 'fallbacks': 0,
+        })
+        row['games'] += 1
+        row['score'] += score
+        row['nodes'] += record.get('total_nodes', 0)
+        row['decisions'] += record.get('decision_count', 0)
+        row['wall_time'] += record.get('duration', 0.0)
+        row['fallbacks'] += record.get('fallbacks', 0)
+        scenario = self.scenarios.setdefault(s, {'games': 0, 'score': 0.0})
+        scenario['games'] += 1
+        scenario['score'] += 1.0 - score
+
+    def table(self):
+        """Filas de los agentes ordenadas por rating Glicko."""
+        rows = []
+        for label, row in self.agents.items():
+            rating, rd = self.glicko.rating(label)
+            games = row['games']
+            rows.append(dict(row, label=label, elo=self.elo.rating(label), glicko=rating, rd=rd,
+                             mean_score=row['score'] / games,
+                             mean_wall_time=row['wall_time'] / games,
+                             nodes_per_decision=row['nodes'] / row['decisions'] if row['decisions'] else 0.0,
+                             fallbacks_per_game=row['fallbacks'] / games))
+        rows.sort(key=lambda r: r['glicko'], reverse=True)
+        return rows
+
+    def scenario_table(self):
+        rows = []
+        for label, row in self.scenarios.items():
+            rating, rd = self.glicko.rating(label)
+            rows.append({'label': label, 'elo': self.elo.rating(label), 'glicko': rating, 'rd': rd,
+                         'games': row['games'], 'mean_score': row['score'] / row['games']})
+        rows.sort(key=lambda r: r['glicko'], reverse=True)
+        return rows
+
+    def save(self, path):
+        data = {'agents': self.table(), 'scenarios': self.scenario_table(),
+                'best_per_budget': best_per_budget(self.table())}
+        tmp = str(path) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+
+
+def best_per_budget(rows):
+    """Para cada presupuesto de CPU, el agente de mayor rating que cabe en él."""
+    best = []
+    for budget in sorted({r['cpu_budget'] for r in rows}):
+        fits = [r for r in rows if r['cpu_budget'] <= budget]
+        top = max(fits, key=lambda r: r['glicko'])
+        best.append({'cpu_budget': budget, 'label': top['label'], 'glicko': top['glicko'], 'rd': top['rd']})
+    return best
+
+
+def format_standings(rows):
+    lines = [f"{'agente':34s} {'glicko':>7s} {'±rd':>5s} {'elo':>7s} {'partidas':>8s} {'punt.':>6s} "
+             f"{'s/partida':>9s} {'nodos/dec':>10s} {'fallb/p':>7s}"]
+    for r in rows:
+        lines.append(f"{r['label']:34s} {r['glicko']:7.1f} {r['rd']:5.0f} {r['elo']:7.1f} {r['games']:8d} "
+                     f"{r['mean_score']:6.2f} {r['mean_wall_time']:9.2f} {r['nodes_per_decision']:10.1f} "
+                     f"{r['fallbacks_per_game']:7.2f}")
+    return '\n'.join(lines)
+
+
+def run_tournament(grid=None, mixes=None, levels=(1, 2, 3, 4), num_games=4, workers=None, seed=0, max_ticks=None,
+                   base_path=None, out=None, resume=True, debug=False, broker=None,
+                   authkey=None):
+    """Juega el torneo (solo las partidas que faltan) y devuelve ``Standings``.
+
+    grid: rejilla de agentes como en ``experiments.sweep`` (sin ``level``).
+    mixes: nombres de ``ENEMY_MIXES`` (por defecto, todas).
+    broker: ``'host:puerto'`` para repartir las partidas entre máquinas (ver ``run_sweep``).
+    authkey: clave del broker (ver ``run_sweep``).
+    """
+    base = Path(base_path) if base_path is not None else Path.cwd()
+    grid = dict(grid or {}, level=list(levels))
+    configs = []
+    for mix in (mixes or list(ENEMY_MIXES)):
+        configs.extend(expand_grid(grid, seed=seed, max_ticks=max_ticks, enemy_script=ENEMY_MIXES[mix]))
+    if out is None:
+        out = base / 'experiments_results' / 'tournament'
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    jsonl_path = str(out.with_suffix('.jsonl'))
+    json_path = out.with_suffix('.json')
+
+    # Los ratings se rehacen repitiendo el log en el orden en que terminaron las partidas
+    keys = {config_hash(c) for c in configs}
+    standings = Standings()
+    for record in read_records(jsonl_path):
+        if record.get('config') in keys and record['game_index'] < num_games:
+            standings.add(record)
+
+    tasks, layouts = pending_tasks(configs, num_games, jsonl_path, base, resume)
+    if not resume:
+        standings = Standings()
+    # Ronda a ronda: la partida i de todos los enfrentamientos antes que la i+1
+    tasks.sort(key=lambda t: t[1])
+    print(f"[tournament] {len({agent_label(c) for c in configs})} agentes x "
+          f"{len({scenario_label(c) for c in configs})} escenarios, {len(tasks)} partidas por jugar")
+
+    if workers is None:
+        workers = default_workers(configs)
+    for done, record in enumerate(schedule(tasks, layouts, jsonl_path, workers, broker, debug, authkey), start=1):
+        standings.add(record)
+        standings.save(json_path)
+        if debug:
+            config = record['config_values']
+            print(f"[tournament] {done}/{len(tasks)} {agent_label(config)} vs {scenario_label(config)} "
+                  f"#{record['game_index']} -> {record['result']}")
+
+    standings.save(json_path)
+    rows = standings.table()
+    print(format_standings(rows))
+    for best in best_per_budget(rows):
+        print(f"Presupuesto {best['cpu_budget']:g} s CPU/decisión: {best['label']} "
+              f"({best['glicko']:.0f} ± {best['rd']:.0f})")
+    print(f"Clasificación guardada en {json_path}")
+    return standings
+
+
+def _optional_int(value):
+    return None if value.lower() == 'none' else int(value)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Torneo de configuraciones de agente contra niveles y enemigos')
+    parser.add_argument('--agent', nargs='+', default=['expectimax'], choices=list(AGENTS))
+    parser.add_argument('--depth', nargs='+', type=int, default=[3])
+    parser.add_argument('--time-limit', nargs='+', type=float, default=[8])
+    parser.add_argument('--max-workers', nargs='+', type=_optional_int, default=[None])
+    parser.add_argument('--level', nargs='+', type=int, default=[1, 2, 3, 4], choices=[1, 2, 3, 4])
+    parser.add_argument('--mix', nargs='+', default=list(ENEMY_MIXES), choices=list(ENEMY_MIXES))
+    parser.add_argument('--games', type=int, default=4, help='partidas por enfrentamiento')
+    parser.add_argument('--workers', type=int, default=None, help='procesos del torneo')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-ticks', type=int, default=None)
+    parser.add_argument('--out', default=None, help='ruta base de <out>.jsonl y <out>.json')
+    parser.add_argument('--no-resume', action='store_true', help='repetir las partidas ya guardadas')
+    parser.add_argument('--broker', default=None,
+                        help='host:puerto en el que repartir las partidas a trabajadores remotos')
+    parser.add_argument('--authkey', default=None,
+                        help='clave del broker (por defecto $BATTLECITY_AUTHKEY)')
+    parser.add_argument('--debug', action='store_true')
+    args = parser.parse_args()
+
+    grid = {'agent': args.agent, 'depth': args.depth, 'time_limit': args.time_limit,
+            'max_workers': args.max_workers}
+    run_tournament(grid, mixes=args.mix, levels=args.level, num_games=args.games, workers=args.workers,
+                   seed=args.seed, max_ticks=args.max_ticks, out=args.out, resume=not args.no_resume,
+                   debug=args.debug, broker=args.broker, authkey=args.authkey)
@@ -1,100 +1,120 @@
 import time
+import random
+import hashlib
 from pathlib import Path
 from typing import Tuple
 
 from src.gameClass.game import BattleCityState
 from src.agents.enemyAgent import ScriptedEnemyAgent
+from src.gameClass.serialization import dumps_state, write_record
+from experiments.decisions import DecisionLog, latency_summary, search_summary
 
 
-def run_single_game(layout, agent, max_ticks=None, debug=False, return_stats=False):
+def game_rng(seed, *labels):
+    """Generador ``random.Random`` propio de una partida y un papel (p. ej. ``'enemy', 1``).
+
+    Se deriva con sha256 de la semilla de la partida y las etiquetas, así que
+    las tiradas de cada enemigo no dependen de cuántas haga el jugador ni los
+    demás: dos agentes con la misma semilla ven la misma secuencia de azar
+    enemiga (números aleatorios comunes).
+    """
+    data = ':'.join(str(x) for x in (seed,) + labels).encode('utf-8')
+    return random.Random(int.from_bytes(hashlib.sha256(data).digest()[:8], 'big'))
+
+
+def run_single_game(layout, agent, max_ticks=None, debug=False, return_stats=False, log_path=None, seed=None,
+                    enemy_script='attack_base', decisions=None):
     """Ejecuta una partida completa en modo headless.
     layout: lista de strings con el mapa
     agent: instancia con método getAction(gameState)
     max_ticks: si se da, fuerza un draw si se alcanzan
+    log_path: si se da, añade a ese fichero un registro (``serialization``)
+        con el estado de cada decisión del jugador (ver ``openingBook.extend_book``)
+    seed: si se da, cada enemigo y el jugador (``agent.rng``: fallback reflejo)
+        usan su propio generador derivado de ella (``game_rng``) y ``random``
+        global queda sembrado para el resto
+    enemy_script: script de los enemigos ('attack_base' o 'random'), o una
+        lista que se reparte en orden entre ellos
+    decisions: ``DecisionLog`` (``experiments.decisions``) en el que se anotan
+        el ``agent.stats`` (``SearchStats``), el tiempo y la jugada de cada decisión
     Retorna: 'win' | 'loss' | 'draw'
     """
+    if seed is not None:
+        random.seed(seed)
     state = BattleCityState()
     state.initialize(layout)
+    log_file = open(log_path, 'ab') if log_path is not None else None
 
     # Crear agentes enemigos según la cantidad de tanques B detectados
-    enemies = [ScriptedEnemyAgent(i+1, script_type='attack_base') for i in range(len(state.getTeamBTanks()))]
+    scripts = [enemy_script] if isinstance(enemy_script, str) else list(enemy_script)
+    enemies = [ScriptedEnemyAgent(i+1, script_type=scripts[i % len(scripts)],
+                                  rng=game_rng(seed, 'enemy', i+1) if seed is not None else None)
+               for i in range(len(state.getTeamBTanks()))]
+    if seed is not None:
+        agent.rng = game_rng(seed, 'player')
 
     ticks = 0
     # Estadísticas
     sim_start = time.time()
-    decision_counts = 0
-    total_nodes = 0
-    nodes_per_decision = []
+    if decisions is None:
+        decisions = DecisionLog()
+    # Los agentes cuentan en ``fallback_count`` las veces que caen al reflejo por tiempo
+    fallbacks_before = getattr(agent, 'fallback_count', 0)
+
+    def make_stats():
+        duration = time.time() - sim_start
+        arrays = decisions.arrays()
+        # Decisiones de agentes con ``stats`` (los reflejos puros no buscan)
+        nodes = arrays['nodes'][arrays['nodes'] >= 0]
+        decision_counts = len(nodes)
+        total_nodes = int(nodes.sum())
+        avg_nodes = (total_nodes / decision_counts) if decision_counts > 0 else 0.0
+        stats = {
+            'duration': duration,
+            'decision_count': decision_counts,
+            'total_nodes': total_nodes,
+            'avg_nodes_per_search': avg_nodes,
+            'search': search_summary(arrays),
+            'fallbacks': getattr(agent, 'fallback_count', 0) - fallbacks_before,
+            # Latencia por decisión frente al presupuesto del agente
+            'latency': latency_summary(decisions['wall_time'], getattr(agent, 'time_limit', None)),
+        }
+        # Caché de evaluaciones del agente (aciertos, fallos, desalojos), si tiene
+        eval_cache = getattr(agent, 'eval_cache', None)
+        if eval_cache is not None:
+            stats['eval_cache'] = eval_cache.stats()
+        return stats
+
     try:
         while True:
             if state.isWin():
                 if return_stats:
-                    duration = time.time() - sim_start
-                    avg_nodes = (total_nodes / decision_counts) if decision_counts > 0 else 0.0
-                    stats = {
-                        'duration': duration,
-                        'decision_count': decision_counts,
-                        'total_nodes': total_nodes,
-                        'avg_nodes_per_search': avg_nodes,
-                        'nodes_per_decision': nodes_per_decision,
-                    }
-                    return 'win', stats
+                    return 'win', make_stats()
                 return 'win'
             if state.isLose():
                 if return_stats:
-                    duration = time.time() - sim_start
-                    avg_nodes = (total_nodes / decision_counts) if decision_counts > 0 else 0.0
-                    stats = {
-                        'duration': duration,
-                        'decision_count': decision_counts,
-                        'total_nodes': total_nodes,
-                        'avg_nodes_per_search': avg_nodes,
-                        'nodes_per_decision': nodes_per_decision,
-                    }
-                    return 'loss', stats
+                    return 'loss', make_stats()
                 return 'loss'
             if state.isLimitTime():
                 if return_stats:
-                    duration = time.time() - sim_start
-                    avg_nodes = (total_nodes / decision_counts) if decision_counts > 0 else 0.0
-                    stats = {
-                        'duration': duration,
-                        'decision_count': decision_counts,
-                        'total_nodes': total_nodes,
-                        'avg_nodes_per_search': avg_nodes,
-                        'nodes_per_decision': nodes_per_decision,
-                    }
-                    return 'draw', stats
+                    return 'draw', make_stats()
                 return 'draw'
             if max_ticks is not None and ticks >= max_ticks:
                 if return_stats:
-                    duration = time.time() - sim_start
-                    avg_nodes = (total_nodes / decision_counts) if decision_counts > 0 else 0.0
-                    stats = {
-                        'duration': duration,
-                        'decision_count': decision_counts,
-                        'total_nodes': total_nodes,
-                        'avg_nodes_per_search': avg_nodes,
-                        'nodes_per_decision': nodes_per_decision,
-                    }
-                    return 'draw', stats
+                    return 'draw', make_stats()
                 return 'draw'
 
             # Turno del agente principal (índice 0)
+            if log_file is not None:
+                write_record(log_file, dumps_state(state))
             try:
-                # Medir nodos expandidos si el agente expone `node_count`
+                # Estadísticas de la decisión en ``agent.stats`` (``SearchStats``) si el agente busca
+                fallbacks = getattr(agent, 'fallback_count', 0)
+                t0 = time.perf_counter()
                 actionA = agent.getAction(state)
-                try:
-                    # Algunos agentes usan `node_count` y otros `expanded_nodes`
-                    nodes = getattr(agent, 'node_count', None)
-                    if nodes is None:
-                        nodes = getattr(agent, 'expanded_nodes', None)
-                    if nodes is not None:
-                        decision_counts += 1
-                        total_nodes += nodes
-                        nodes_per_decision.append(nodes)
-                except Exception:
-                    pass
+                elapsed = time.perf_counter() - t0
+                decisions.record(getattr(agent, 'stats', None), elapsed, actionA,
+                                 getattr(agent, 'fallback_count', 0) > fallbacks)
             except Exception as e:
                 if debug:
                     print(f"[utils.run_single_game] Excepción en agent.getAction: {e}")
@@ -146,35 +166,11 @@ def run_single_game(layout, agent, max_ticks=None, debug=False, return_stats=Fal
             except Exception:
                 pass
 
-    except KeyboardInterrupt:
-        # Permitir abortar desde teclado si se ejecuta interactivamente
-        if return_stats:
-            duration = time.time() - sim_start
-            avg_nodes = (total_nodes / decision_counts) if decision_counts > 0 else 0.0
-            stats = {
-                'duration': duration,
-                'decision_count': decision_counts,
-                'total_nodes': total_nodes,
-                'avg_nodes_per_search': avg_nodes,
-                'nodes_per_decision': nodes_per_decision,
-            }
-            return 'draw', stats
-        return 'draw'
-
-    # Fin de la simulación
-    duration = time.time() - sim_start
-    avg_nodes = (total_nodes / decision_counts) if decision_counts > 0 else 0.0
-    stats = {
-        'duration': duration,
-        'decision_count': decision_counts,
-        'total_nodes': total_nodes,
-        'avg_nodes_per_search': avg_nodes,
-        'nodes_per_decision': nodes_per_decision,
-    }
-
-    if return_stats:
-        return result, stats
-    return result
+    # Ctrl-C no se convierte en empate: se propaga para que el experimento se
+    # corte sin registrar como terminada una partida a medias
+    finally:
+        if log_file is not None:
+            log_file.close()
 
 
 def evaluate_result(result: str) -> Tuple[int,int,int]:
@@ -20,6 +20,9 @@ from src.gameClass.scenarios.level4 import get_level4
 from src.agents.enemyAgent import ScriptedEnemyAgent
 from src.agents.minimax import MinimaxAgent, AlphaBetaAgent, ParallelAlphaBetaAgent
 from src.agents.expectimax import ExpectimaxAgent, ParallelExpectimaxAgent
+from src.agents.jitExpectimax import JitExpectimaxAgent
+from src.agents.lazySmp import LazySMPAlphaBetaAgent
+from src.agents.ybwc import YBWCAlphaBetaAgent
 
 
 # Default visual config (compatible with the existing visual_test.py)
@@ -39,7 +42,7 @@ COLORS = {
 }
 
 
-def draw_game(screen, game_state, action=None):
+def draw_game(screen, game_state, action=None, stats=None):
     """Draw a BattleCityState to the given pygame screen."""
     screen.fill(COLORS['background'])
     size = game_state.getBoardSize()
@@ -90,6 +93,9 @@ def draw_game(screen, game_state, action=None):
     surf_score = font.render(score_text, True, (255, 215, 0))
     screen.blit(surf_action, (5, 5))
     screen.blit(surf_score, (5, 30))
+    # Estadísticas de la última búsqueda del agente (``SearchStats``)
+    if stats is not None:
+        screen.blit(font.render(stats.summary(), True, (180, 220, 255)), (5, 55))
 
     pygame.display.flip()
 
@@ -153,7 +159,19 @@ class GameLauncher:
             params = {'depth': 3, 'time_limit': 7}
             params.update(self.agent_params)
             return ParallelExpectimaxAgent(**params)
-            
+        if name in ('expectimax_jit', 'jit', 'numba'):
+            params = {'depth': 3, 'time_limit': 7}
+            params.update(self.agent_params)
+            return JitExpectimaxAgent(**params)
+        if name in ('alphabeta_lazysmp', 'lazysmp', 'lazy_smp'):
+            params = {'depth': 3, 'tankIndex': 0, 'time_limit': 7}
+            params.update(self.agent_params)
+            return LazySMPAlphaBetaAgent(**params)
+        if name in ('alphabeta_ybwc', 'ybwc'):
+            params = {'depth': 3, 'tankIndex': 0, 'time_limit': 7}
+            params.update(self.agent_params)
+            return YBWCAlphaBetaAgent(**params)
+
 
         # Unknown string -> try to import dynamic? For now return None
         return None
@@ -277,7 +295,7 @@ class GameLauncher:
             except Exception:
                 pass
 
-            draw_game(screen, game_state, action=actionA)
+            draw_game(screen, game_state, action=actionA, stats=getattr(agentA, 'stats', None))
 
         # Close only the display so we return cleanly to the caller (the menu)
         try:
@@ -298,6 +316,9 @@ class GameMenu:
         ('Minimax', 'minimax'),
         ('Alpha Beta', 'parallel_alphabeta'),
         ('Expectimax', 'parallel_expectimax'),
+        ('Expectimax (numba)', 'expectimax_jit'),
+        ('Alpha Beta (Lazy SMP)', 'alphabeta_lazysmp'),
+        ('Alpha Beta (YBWC)', 'alphabeta_ybwc'),
     ]
 
     LEVELS = ['level1', 'level2', 'level3', 'level4']
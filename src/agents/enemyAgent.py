@@ -1,11 +1,16 @@
 import random
-from ..utils import manhattanDistance
+from .enemyModel import attack_base_plan
 
 class ScriptedEnemyAgent:
-    """Un agente simple para los enemigos que sigue un script predefinido."""
-    def __init__(self, agent_index, script_type='attack_base'):
+    """Un agente simple para los enemigos que sigue un script predefinido.
+
+    ``rng``: generador propio (``random.Random``) para las tiradas del script;
+    por defecto, el módulo ``random`` global.
+    """
+    def __init__(self, agent_index, script_type='attack_base', rng=None):
         self.agent_index = agent_index
         self.script_type = script_type
+        self.rng = rng if rng is not None else random
 
     def getAction(self, game_state):
         """Devuelve la acción a tomar en el estado actual del juego."""
@@ -31,42 +36,26 @@ class ScriptedEnemyAgent:
             return 'STOP'
         base_pos = game_state.base.position
         tank_pos = tank.position
-        current_dist = manhattanDistance(tank_pos, base_pos)
-
-        best_move = 'STOP'
-        min_dist = current_dist
+        # La parte determinista (qué movimientos acercan a la base) sale de la
+        # caché; las tiradas aleatorias se hacen en el mismo orden de siempre.
+        improving, move_actions, fire_actions = attack_base_plan(tank_pos, base_pos, legal_actions)
 
         # 1. Buscar la mejor acción de MOVIMIENTO
-        move_actions = []
-        for action in legal_actions:
-            if action.startswith('MOVE_'):
-                x, y = tank_pos
-                if action == 'MOVE_UP': next_pos = (x, y + 1)
-                elif action == 'MOVE_DOWN': next_pos = (x, y - 1)
-                elif action == 'MOVE_LEFT': next_pos = (x - 1, y)
-                elif action == 'MOVE_RIGHT': next_pos = (x + 1, y)
-                else: continue
-                
-                new_dist = manhattanDistance(next_pos, base_pos)
-                
-                if new_dist < min_dist:
-                    min_dist = new_dist
-                    best_move = action if random.random() < 0.7 else best_move  # 70% de probabilidad de elegir la mejor
-                
-                move_actions.append(action)
+        best_move = 'STOP'
+        for action in improving:
+            best_move = action if self.rng.random() < 0.7 else best_move  # 70% de probabilidad de elegir la mejor
 
         # 2. Decidir si disparar (con un poco de aleatoriedad)
         # Buscar todas las acciones de tipo FIRE y elegir una al azar/según probabilidad.
-        fire_actions = [a for a in legal_actions if isinstance(a, str) and a.startswith('FIRE')]
-        if fire_actions and random.random() < 0.6:
-            return random.choice(fire_actions)
+        if fire_actions and self.rng.random() < 0.6:
+            return self.rng.choice(fire_actions)
         
         # 3. Si el mejor movimiento es STOP (atascado), elige uno al azar
         if best_move == 'STOP' and move_actions:
-            return random.choice(move_actions)
+            return self.rng.choice(move_actions)
 
         return best_move
 
     def run_random_script(self, legal_actions):
         """Un bot tonto que se mueve al azar."""
-        return random.choice(legal_actions)
\ No newline at end of file
+        return self.rng.choice(legal_actions)
\ No newline at end of file
@@ -0,0 +1,183 @@
+"""Modelos de acción de los enemigos con caché acotada.
+
+La distribución de ``ExpectimaxAgent.probabilityActions`` y la parte
+determinista del script ``attack_base`` de ``ScriptedEnemyAgent`` dependen
+solo de la posición del enemigo, la posición de la base y el conjunto de
+acciones legales. Estas funciones las calculan una vez por combinación y las
+guardan en una ``BoundedCache`` con la clave codificada en un entero:
+
+    clave = (ex, ey, bx, by) en 8 bits cada uno, seguido de la máscara de
+    acciones legales (9 bits, un bit por acción de ``ACTIONS``).
+
+La máscara basta porque ``getLegalActions`` siempre devuelve las acciones en
+el orden de ``ACTIONS`` y sin duplicados. Los valores guardados se comparten:
+quien los recibe no debe modificarlos.
+"""
+from ..utils import manhattanDistance
+from ..gameClass.arrayState import ACTION_INDEX
+
+_MOVE_OFFSETS = {'MOVE_UP': (0, 1), 'MOVE_DOWN': (0, -1), 'MOVE_LEFT': (-1, 0), 'MOVE_RIGHT': (1, 0)}
+
+
+class BoundedCache:
+    """Diccionario con tamaño máximo y contadores de aciertos/fallos.
+
+    Al llenarse se vacía entero: las claves posibles por mapa son pocas, así
+    que basta con acotar la memoria sin pagar la contabilidad de una LRU, y
+    la operación es segura con los hilos de ``ParallelExpectimaxAgent``.
+    """
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if len(self._data) >= self.maxsize:
+            self._data = {}
+        self._data[key] = value
+
+    def clear(self):
+        self._data = {}
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+DISTRIBUTION_CACHE = BoundedCache()
+SCRIPT_CACHE = BoundedCache()
+
+
+def encode_key(tank_pos, base_pos, legal_actions):
+    """Clave entera de (posición, base, acciones legales); None si no se puede codificar."""
+    try:
+        ex, ey = tank_pos
+        bx, by = base_pos
+        mask = 0
+        for a in legal_actions:
+            mask |= 1 << ACTION_INDEX[a]
+    except (TypeError, ValueError, KeyError):
+        return None
+    if not (0 <= ex < 256 and 0 <= ey < 256 and 0 <= bx < 256 and 0 <= by < 256):
+        return None
+    return (((((ex << 8) | ey) << 8 | bx) << 8 | by) << 9) | mask
+
+
+def cache_stats():
+    """Estadísticas de ambas cachés (para experimentos y benchmarks)."""
+    return {'distribution': DISTRIBUTION_CACHE.stats(), 'script': SCRIPT_CACHE.stats()}
+
+
+def clear_caches():
+    DISTRIBUTION_CACHE.clear()
+    SCRIPT_CACHE.clear()
+
+
+def _distribution(enemy_pos, base_pos, legal_actions):
+    """Distribución suave de Expectimax (ver ``ExpectimaxAgent.probabilityActions``)."""
+    # Acciones prohibidas según la política del usuario
+    disallowed = {'MOVE_UP', 'FIRE_UP', 'FIRE_DOWN'}
+    if enemy_pos is not None and base_pos is not None:
+        # Si el enemigo está a la izquierda de la base, no moverse a la izquierda (y viceversa)
+        if enemy_pos[0] < base_pos[0]:
+            disallowed.add('MOVE_LEFT')
+        elif enemy_pos[0] > base_pos[0]:
+            disallowed.add('MOVE_RIGHT')
+
+    allowed = [a for a in legal_actions if a not in disallowed]
+    # Si ninguna acción queda permitida, distribución uniforme sobre las legales
+    if not allowed:
+        uniform = 1.0 / len(legal_actions)
+        return {a: uniform for a in legal_actions}
+
+    # Acción "mejor" entre las permitidas según la distancia a la base (sin generar sucesores)
+    best_action = legal_actions[0]
+    best_score = float('inf')
+    for action in allowed:
+        if action in _MOVE_OFFSETS and enemy_pos is not None:
+            dx, dy = _MOVE_OFFSETS[action]
+            succ_pos = (enemy_pos[0] + dx, enemy_pos[1] + dy)
+        else:
+            # FIRE_* y STOP mantienen la misma posición (aproximación)
+            succ_pos = enemy_pos
+        if succ_pos is None or base_pos is None:
+            dist = float('inf')
+        else:
+            dist = manhattanDistance(succ_pos, base_pos)
+        if dist < best_score:
+            best_score, best_action = dist, action
+
+    probs = {}
+    for action in legal_actions:
+        if action in disallowed:
+            probs[action] = 0.0
+        elif len(allowed) == 1:
+            probs[action] = 1.0
+        else:
+            probs[action] = 0.6 if action == best_action else 0.4 / (len(allowed) - 1)
+    return probs
+
+
+def enemy_distribution(enemy_pos, base_pos, legal_actions):
+    """Distribución de Expectimax para un enemigo vivo, memoizada."""
+    key = encode_key(enemy_pos, base_pos, legal_actions)
+    if key is None:
+        return _distribution(enemy_pos, base_pos, legal_actions)
+    probs = DISTRIBUTION_CACHE.get(key)
+    if probs is None:
+        probs = _distribution(enemy_pos, base_pos, legal_actions)
+        DISTRIBUTION_CACHE.put(key, probs)
+    return probs
+
+
+def _attack_base_plan(tank_pos, base_pos, legal_actions):
+    """Parte determinista del script ``attack_base``.
+
+    Devuelve ``(improving, move_actions, fire_actions)``: ``improving`` son
+    los movimientos que, en orden, bajan la menor distancia vista hasta ese
+    momento; en cada uno el script tira un ``random.random()``.
+    """
+    min_dist = manhattanDistance(tank_pos, base_pos)
+    improving = []
+    move_actions = []
+    x, y = tank_pos
+    for action in legal_actions:
+        if action in _MOVE_OFFSETS:
+            dx, dy = _MOVE_OFFSETS[action]
+            new_dist = manhattanDistance((x + dx, y + dy), base_pos)
+            if new_dist < min_dist:
+                min_dist = new_dist
+                improving.append(action)
+            move_actions.append(action)
+    fire_actions = [a for a in legal_actions if isinstance(a, str) and a.startswith('FIRE')]
+    return tuple(improving), move_actions, fire_actions
+
+
+def attack_base_plan(tank_pos, base_pos, legal_actions):
+    """Plan de ``_attack_base_plan`` memoizado."""
+    key = encode_key(tank_pos, base_pos, legal_actions)
+    if key is None:
+        return _attack_base_plan(tank_pos, base_pos, legal_actions)
+    plan = SCRIPT_CACHE.get(key)
+    if plan is None:
+        plan = _attack_base_plan(tank_pos, base_pos, legal_actions)
+        SCRIPT_CACHE.put(key, plan)
+    return plan
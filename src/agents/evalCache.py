@@ -0,0 +1,136 @@
+"""Caché de evaluaciones de hojas que dura toda la partida.
+
+Los tanques van y vienen alrededor de la base, así que decisiones distintas
+de una misma partida llegan a menudo a las mismas hojas. ``EvalCache``
+guarda el valor de ``evaluate_state`` entre llamadas a ``getAction`` (vive
+lo que vive el agente) y es independiente de la tabla de transposición:
+
+- Clave: la tupla con la parte del estado que lee ``evaluate_state`` (base,
+  jugador, reservas y posiciones de los enemigos vivos, en orden). El reloj
+  no entra: se guarda ``evaluate_without_time`` y al leer se resta la
+  penalización por tiempo del tick actual, con lo que el valor coincide bit
+  a bit con un ``evaluate_state`` nuevo en cualquier tick.
+- Reemplazo CLOCK (segunda oportunidad): un acierto solo marca el bit de
+  referencia de la entrada, sin reordenar nada, y al llenarse la manecilla
+  desaloja la primera entrada sin marcar.
+- Tamaño: ``max_mb`` se convierte en número de entradas con una estimación
+  de ``ENTRY_BYTES`` bytes por entrada (clave, valor y diccionario).
+
+``stats()`` da aciertos, fallos, tasa de aciertos y desalojos; los agentes
+lo exponen como ``eval_cache`` y ``run_single_game`` lo recoge.
+"""
+import threading
+
+from ..gameClass.game import TIME_PENALTY
+
+ENTRY_BYTES = 400
+_INF = float('inf')
+
+
+def evaluation_key(state):
+    """Clave de lo que lee ``evaluate_state`` (None si el estado no se puede codificar)."""
+    a = state.teamA_tank
+    key = (state.base.position, state.base.is_destroyed, a.position, a.is_alive, state.reserves_A,
+           state.reserves_B, tuple([e.position for e in state.teamB_tanks if e.is_alive]))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _time_penalty(ticks):
+    return TIME_PENALTY * ticks * 5
+
+
+class EvalCache:
+    """Caché CLOCK ``clave -> valor de evaluate_without_time``.
+
+    Las lecturas no toman locks (marcar el bit de referencia es una sola
+    asignación y cada hueco guarda su clave, así que una lectura que coincide
+    con un desalojo en otro hilo cuenta como fallo); las inserciones sí, para
+    que los hilos de los agentes paralelos no desalojen a la vez.
+    ``evaluate`` sustituye a ``evaluate_without_time`` (debe ignorar el reloj).
+    """
+    def __init__(self, max_mb=16, evaluate=None):
+        self.capacity = max(1, int(max_mb * 2 ** 20 // ENTRY_BYTES))
+        self.max_mb = max_mb
+        self._evaluate = evaluate
+        self._index = {}          # clave -> hueco
+        self._entries = []        # hueco -> (clave, valor sin reloj)
+        self._ref = []
+        self._hand = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._index)
+
+    def evaluate(self, state):
+        """Valor de ``state``: el mismo que ``evaluate_state``."""
+        key = evaluation_key(state)
+        value = None
+        if key is not None:
+            slot = self._index.get(key)
+            if slot is not None:
+                entry = self._entries[slot]
+                if entry[0] == key:
+                    self.hits += 1
+                    self._ref[slot] = True
+                    value = entry[1]
+        if value is None:
+            self.misses += 1
+            value = state.evaluate_without_time() if self._evaluate is None else self._evaluate(state)
+            if key is not None:
+                self._insert(key, value)
+        if value in (_INF, -_INF):
+            return value
+        return value - _time_penalty(state.current_time)
+
+    def _insert(self, key, value):
+        with self._lock:
+            if key in self._index:
+                return
+            entries = self._entries
+            if len(entries) < self.capacity:
+                self._index[key] = len(entries)
+                entries.append((key, value))
+                self._ref.append(False)
+                return
+            # Segunda oportunidad: se limpian bits hasta dar con una entrada sin marcar
+            ref = self._ref
+            hand = self._hand
+            while ref[hand]:
+                ref[hand] = False
+                hand = (hand + 1) % self.capacity
+            del self._index[entries[hand][0]]
+            entries[hand] = (key, value)
+            self._index[key] = hand
+            self._hand = (hand + 1) % self.capacity
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._index = {}
+            self._entries = []
+            self._ref = []
+            self._hand = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._index),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'evictions': self.evictions,
+        }
+
+
+def make_eval_cache(max_mb):
+    """``EvalCache`` de ``max_mb`` MB, o None si ``max_mb`` es 0/None (caché desactivada)."""
+    return EvalCache(max_mb) if max_mb else None
@@ -0,0 +1,245 @@
+"""Expectimax completamente compilado con numba.
+
+La búsqueda entera (nodos MAX, nodos de azar con el modelo de
+``probabilityActions`` y la función de evaluación) corre en modo nopython
+sobre el vector de ``src.gameClass.arrayState`` usando una pila explícita en
+lugar de recursión. ``JitExpectimaxAgent`` conserva la interfaz y las
+decisiones de ``ExpectimaxAgent`` (misma profundización iterativa, mismo
+orden de acciones y mismos desempates).
+"""
+import time
+
+import numpy as np
+from numba import njit, objmode
+
+from ..gameClass.arrayState import ACTIONS, NUM_ACTIONS, encode_state, StaticLayout
+from ..gameClass.canonical import SYM_NONE
+from ..gameClass.jitEngine import (
+    num_agents, is_terminal, legal_actions, successor, evaluate, enemy_action_probabilities,
+)
+from .positionCache import cached_move, store_move
+from .searchCore import reflex_fallback
+from .searchStats import SearchStats
+
+try:
+    from .reflexAgent import ReflexTankAgent
+except Exception:
+    ReflexTankAgent = None
+
+# Contadores compartidos con el kernel
+C_NODES, C_TIMED_OUT, C_CHECKS, C_EVALS, C_EXPANSIONS = range(5)
+NUM_COUNTERS = 5
+# Consultar el reloj cada N comprobaciones (objmode tiene coste no despreciable)
+TIME_CHECK_INTERVAL = 256
+
+_ENTER, _EXPAND, _RETURN = 0, 1, 2
+
+
+@njit(cache=True)
+def _now():
+    with objmode(t='float64'):
+        t = time.time()
+    return t
+
+
+@njit(cache=True)
+def _time_exceeded(deadline, counters):
+    if counters[C_TIMED_OUT]:
+        return True
+    if deadline == np.inf:
+        return False
+    counters[C_CHECKS] += 1
+    if counters[C_CHECKS] % TIME_CHECK_INTERVAL == 1 and _now() > deadline:
+        counters[C_TIMED_OUT] = 1
+        return True
+    return False
+
+
+@njit(cache=True)
+def expectimax_value(root, agent0, depth0, max_depth, board_size, wall_grid, wall_steel,
+                     base_x, base_y, deadline, counters):
+    """Valor expectimax del subárbol con raíz ``root`` (pila explícita)."""
+    na = num_agents(root)
+    levels = (max_depth - depth0 + 1) * na + 2
+    states = np.empty((levels, root.shape[0]), dtype=root.dtype)
+    agent = np.empty(levels, dtype=np.int64)
+    depth = np.empty(levels, dtype=np.int64)
+    next_agent = np.empty(levels, dtype=np.int64)
+    next_depth = np.empty(levels, dtype=np.int64)
+    actions = np.empty((levels, NUM_ACTIONS), dtype=np.int64)
+    n_actions = np.empty(levels, dtype=np.int64)
+    cursor = np.empty(levels, dtype=np.int64)
+    value = np.empty(levels, dtype=np.float64)
+    probs = np.empty((levels, NUM_ACTIONS), dtype=np.float64)
+
+    states[0, :] = root
+    agent[0] = agent0
+    depth[0] = depth0
+    level = 0
+    mode = _ENTER
+    ret = 0.0
+    while True:
+        if mode == _ENTER:
+            counters[C_NODES] += 1
+            s = states[level]
+            if depth[level] >= max_depth or _time_exceeded(deadline, counters) or is_terminal(s):
+                counters[C_EVALS] += 1
+                ret = evaluate(s, base_x, base_y)
+                mode = _RETURN
+                continue
+            a = agent[level]
+            nxt = (a + 1) % num_agents(s)
+            next_agent[level] = nxt
+            next_depth[level] = depth[level] + 1 if nxt == 0 else depth[level]
+            n = legal_actions(s, a, actions[level], board_size, wall_grid, wall_steel, base_x, base_y)
+            if n == 0:
+                counters[C_EVALS] += 1
+                ret = evaluate(s, base_x, base_y)
+                mode = _RETURN
+                continue
+            n_actions[level] = n
+            cursor[level] = 0
+            if a == 0:
+                value[level] = -np.inf
+            else:
+                value[level] = 0.0
+                enemy_action_probabilities(s, a, actions[level], n, probs[level], base_x, base_y)
+            mode = _EXPAND
+        elif mode == _EXPAND:
+            c = cursor[level]
+            if c < n_actions[level] and not _time_exceeded(deadline, counters):
+                cursor[level] = c + 1
+                counters[C_EXPANSIONS] += 1
+                successor(states[level], agent[level], actions[level, c], states[level + 1],
+                          board_size, wall_grid, wall_steel, base_x, base_y)
+                agent[level + 1] = next_agent[level]
+                depth[level + 1] = next_depth[level]
+                level += 1
+                mode = _ENTER
+            else:
+                ret = value[level]
+                mode = _RETURN
+        else:
+            if level == 0:
+                return ret
+            level -= 1
+            if agent[level] == 0:
+                if ret > value[level]:
+                    value[level] = ret
+            else:
+                value[level] += probs[level, cursor[level] - 1] * ret
+            mode = _EXPAND
+
+
+@njit(cache=True)
+def expectimax_root(state, max_depth, board_size, wall_grid, wall_steel, base_x, base_y,
+                    deadline, counters, root_actions, root_values):
+    """Evalúa cada acción del jugador en ``state``.
+
+    Devuelve ``(n, best)``: número de acciones raíz escritas en
+    ``root_actions``/``root_values`` y el índice de la mejor (o -1).
+    """
+    n = legal_actions(state, 0, root_actions, board_size, wall_grid, wall_steel, base_x, base_y)
+    nxt = 1 % num_agents(state)
+    child = np.empty_like(state)
+    best = -1
+    best_score = -np.inf
+    evaluated = 0
+    for i in range(n):
+        if _time_exceeded(deadline, counters):
+            break
+        counters[C_EXPANSIONS] += 1
+        successor(state, 0, root_actions[i], child, board_size, wall_grid, wall_steel, base_x, base_y)
+        val = expectimax_value(child, nxt, 0, max_depth, board_size, wall_grid, wall_steel,
+                               base_x, base_y, deadline, counters)
+        root_values[i] = val
+        evaluated += 1
+        if val > best_score:
+            best_score = val
+            best = i
+    return evaluated, best
+
+
+class JitExpectimaxAgent:
+    """Expectimax con profundización iterativa ejecutado por completo en numba.
+
+    Misma interfaz que ``ExpectimaxAgent`` (``depth``, ``time_limit``,
+    ``debug``, ``stats``) y mismas decisiones; la primera llamada paga la
+    compilación de los kernels (se cachea en disco con ``cache=True``).
+    """
+    key_symmetry = SYM_NONE   # Claves de la caché de posiciones (sin simetrías)
+
+    def __init__(self, depth=2, time_limit=None, debug=False):
+        self.depth = depth
+        self.time_limit = time_limit
+        self.start_time = None
+        self.stats = SearchStats()   # Estadísticas de la última decisión
+        self.debug = debug
+        self.position_cache = None   # PositionCache opcional (jugadas de otras ejecuciones)
+        self._layout = None
+
+    def is_time_exceeded(self):
+        return (
+            self.time_limit is not None
+            and (time.time() - self.start_time) > self.time_limit
+        )
+
+    @property
+    def node_count(self):
+        return self.stats.nodes
+
+    def _encode(self, gameState):
+        """Codifica el estado reutilizando el layout estático entre decisiones."""
+        layout = self._layout
+        if layout is None or layout.signature != StaticLayout.from_state(gameState).signature:
+            layout = StaticLayout.from_state(gameState)
+            self._layout = layout
+        return encode_state(gameState, layout)
+
+    def getAction(self, gameState):
+        self.start_time = time.time()
+        self.stats.begin()
+        move = cached_move(self, gameState)
+        if move is not None:
+            return self.stats.finish(move, 'cache')
+        deadline = np.inf if self.time_limit is None else self.start_time + self.time_limit
+        layout, vec = self._encode(gameState)
+        num_agents_root = gameState.getNumAgents()
+        best_overall_action = None
+        best_overall_value = -np.inf
+
+        counters = np.zeros(NUM_COUNTERS, dtype=np.int64)
+        root_actions = np.zeros(NUM_ACTIONS, dtype=np.int64)
+        root_values = np.full(NUM_ACTIONS, -np.inf)
+
+        step = num_agents_root if num_agents_root > 0 else 1
+        for current_max in range(step, (self.depth * step) + 1, step):
+            if self.is_time_exceeded() or current_max > self.depth:
+                break
+
+            evaluated, best = expectimax_root(
+                vec, current_max, layout.board_size, layout.wall_grid, layout.wall_steel,
+                layout.base_x, layout.base_y, deadline, counters, root_actions, root_values)
+            stats = self.stats
+            stats.nodes = int(counters[C_NODES])
+            stats.evaluations = int(counters[C_EVALS])
+            stats.expansions = int(counters[C_EXPANSIONS])
+            if not counters[C_TIMED_OUT] and not self.is_time_exceeded():
+                stats.depth = current_max
+
+            if self.debug:
+                for i in range(evaluated):
+                    print(f"[DEBUG][JIT-IDS {current_max}] action={ACTIONS[root_actions[i]]} -> expectimax={root_values[i]}")
+            if best >= 0:
+                best_overall_action = ACTIONS[root_actions[best]]
+                best_overall_value = root_values[best]
+
+            if self.debug or not getattr(self, 'suppress_output', False):
+                print(f"[JitExpectimax] Profundidad {current_max}: nodos expandidos = {self.node_count}")
+            try:
+                if counters[C_TIMED_OUT] or self.is_time_exceeded():
+                    return reflex_fallback(self, gameState, self.node_count)
+            except Exception:
+                pass
+        store_move(self, gameState, best_overall_action, best_overall_value)
+        return self.stats.finish(best_overall_action)
@@ -0,0 +1,497 @@
+"""Alpha-beta paralelo estilo Lazy SMP sobre el motor de numba.
+
+``ParallelAlphaBetaAgent`` reparte solo las acciones de la raíz (como mucho
+unas 8), así que el reparto de carga es pobre. Aquí N trabajadores buscan
+todos la misma raíz con profundización iterativa escalonada y comparten una
+tabla de transposición sin locks en memoria compartida
+(``transpositionTable``): lo que un trabajador descubre (cotas, mejores
+jugadas) acelera a los demás. Los ayudantes pueden además recorrer las
+acciones en un orden aleatorio distinto para no repetir exactamente el mismo
+árbol. El proceso principal hace de trabajador 0 y se queda con el resultado
+completo más profundo de entre todos.
+
+Igual que en ``AlphaBetaAgent``, el jugador (agente 0) maximiza, todos los
+enemigos minimizan y la profundidad se cuenta en turnos completos.
+"""
+import os
+import time
+import random
+import weakref
+import concurrent.futures
+
+import numpy as np
+from numba import njit
+
+from ..gameClass.arrayState import ACTIONS, NUM_ACTIONS, encode_state, StaticLayout
+from ..gameClass.jitEngine import (
+    num_agents, is_terminal, legal_actions, successor, evaluate, _mix64, canonical_hash, mirror_action,
+)
+from ..gameClass.canonical import SYM_NONE, SYM_ALL, symmetry_arrays
+from ..gameClass.sharedLayout import LayoutPublisher, attach_layout
+from ..gameClass.serialization import dumps_vector, loads_vector
+from .jitExpectimax import _now
+from .searchCore import reflex_fallback
+from .searchStats import SearchStats
+from .transpositionTable import (
+    SharedTranspositionTable, tt_probe, tt_store, TT_EMPTY, TT_EXACT, TT_LOWER, TT_UPPER, TT_NO_MOVE,
+)
+
+try:
+    from .reflexAgent import ReflexTankAgent
+except Exception:
+    ReflexTankAgent = None
+
+# Contadores por trabajador (los tres primeros los usa la tabla)
+(C_TT_PROBES, C_TT_HITS, C_TT_STORES, C_NODES, C_TIMED_OUT, C_CHECKS, C_TT_CUTS,
+ C_CUTOFFS, C_EVALS, C_EXPANSIONS) = range(10)
+NUM_COUNTERS = 10
+TIME_CHECK_INTERVAL = 256
+
+_ENTER, _EXPAND, _RETURN = 0, 1, 2
+
+
+@njit(cache=True)
+def _should_stop(deadline, stop, counters):
+    """Tiempo agotado o parada pedida por el proceso principal (pegajoso)."""
+    if counters[C_TIMED_OUT]:
+        return True
+    counters[C_CHECKS] += 1
+    if counters[C_CHECKS] % TIME_CHECK_INTERVAL == 1:
+        if stop[0] != 0 or (deadline != np.inf and _now() > deadline):
+            counters[C_TIMED_OUT] = 1
+            return True
+    return False
+
+
+def counter_stats(counters):
+    """Contadores de ``SearchStats`` (``dict``) a partir del array de un trabajador."""
+    return {
+        'nodes': int(counters[C_NODES]),
+        'evaluations': int(counters[C_EVALS]),
+        'expansions': int(counters[C_EXPANSIONS]),
+        'cutoffs': int(counters[C_CUTOFFS] + counters[C_TT_CUTS]),
+        'tt_hits': int(counters[C_TT_HITS]),
+    }
+
+
+@njit(cache=True)
+def _node_key(s, agent, symmetry, wall_mirror, board_size):
+    """Clave de la tabla y si está en el marco reflejado (``canonical_hash``)."""
+    return canonical_hash(s, agent, symmetry, wall_mirror, board_size)
+
+
+@njit(cache=True)
+def _to_frame(move, mirrored):
+    """Pasa una jugada de la tabla al marco del estado (o al revés)."""
+    if mirrored and move != TT_NO_MOVE:
+        return mirror_action(move)
+    return move
+
+
+@njit(cache=True)
+def _next_random(rng):
+    rng[0] += np.uint64(0x9E3779B97F4A7C15)
+    return _mix64(rng[0])
+
+
+@njit(cache=True)
+def _order_actions(actions, n, first, randomize, rng):
+    """Pone ``first`` (jugada de la tabla) delante y, si ``randomize``,
+    baraja el resto (Fisher-Yates)."""
+    start = 0
+    if first != TT_NO_MOVE:
+        for i in range(n):
+            if actions[i] == first:
+                actions[i] = actions[0]
+                actions[0] = first
+                start = 1
+                break
+    if randomize:
+        for i in range(n - 1, start, -1):
+            j = start + np.int64(_next_random(rng) % np.uint64(i - start + 1))
+            tmp = actions[i]
+            actions[i] = actions[j]
+            actions[j] = tmp
+
+
+@njit(cache=True)
+def alphabeta_value(root, agent0, alpha0, beta0, max_depth, board_size, wall_grid, wall_steel,
+                    base_x, base_y, table, values, use_tt, randomize, rng, deadline, stop, counters,
+                    symmetry, wall_mirror):
+    """Valor minimax con poda alpha-beta y tabla de transposición (pila explícita).
+
+    La raíz ``root`` le toca a ``agent0`` con profundidad 0; la búsqueda se
+    corta al completar ``max_depth`` turnos. Los resultados de un subárbol
+    interrumpido por tiempo no se guardan en la tabla. ``symmetry`` y
+    ``wall_mirror`` eligen las simetrías de las claves (``canonical_hash``).
+    """
+    na = num_agents(root)
+    levels = max_depth * na + 2
+    states = np.empty((levels, root.shape[0]), dtype=root.dtype)
+    agent = np.empty(levels, dtype=np.int64)
+    depth = np.empty(levels, dtype=np.int64)
+    next_agent = np.empty(levels, dtype=np.int64)
+    next_depth = np.empty(levels, dtype=np.int64)
+    actions = np.empty((levels, NUM_ACTIONS), dtype=np.int64)
+    n_actions = np.empty(levels, dtype=np.int64)
+    cursor = np.empty(levels, dtype=np.int64)
+    value = np.empty(levels, dtype=np.float64)
+    best = np.empty(levels, dtype=np.int64)
+    alpha = np.empty(levels, dtype=np.float64)
+    beta = np.empty(levels, dtype=np.float64)
+    alpha_orig = np.empty(levels, dtype=np.float64)
+    beta_orig = np.empty(levels, dtype=np.float64)
+    keys = np.empty(levels, dtype=np.uint64)
+    mirrored = np.zeros(levels, dtype=np.bool_)
+    entry = np.zeros(3, dtype=np.int64)
+
+    states[0, :] = root
+    agent[0] = agent0
+    depth[0] = 0
+    alpha[0] = alpha0
+    beta[0] = beta0
+    level = 0
+    mode = _ENTER
+    ret = 0.0
+    while True:
+        if mode == _ENTER:
+            counters[C_NODES] += 1
+            s = states[level]
+            if depth[level] >= max_depth or _should_stop(deadline, stop, counters) or is_terminal(s):
+                counters[C_EVALS] += 1
+                ret = evaluate(s, base_x, base_y)
+                mode = _RETURN
+                continue
+            a = agent[level]
+            remaining = max_depth - depth[level]
+            first = TT_NO_MOVE
+            if use_tt:
+                keys[level], mirrored[level] = _node_key(s, a, symmetry, wall_mirror, board_size)
+                v = tt_probe(table, keys[level], counters, entry)
+                if entry[1] != TT_EMPTY:
+                    first = _to_frame(entry[2], mirrored[level])
+                    if entry[0] >= remaining and (
+                            entry[1] == TT_EXACT
+                            or (entry[1] == TT_LOWER and v >= beta[level])
+                            or (entry[1] == TT_UPPER and v <= alpha[level])):
+                        counters[C_TT_CUTS] += 1
+                        ret = v
+                        mode = _RETURN
+                        continue
+            nxt = (a + 1) % num_agents(s)
+            next_agent[level] = nxt
+            next_depth[level] = depth[level] + 1 if nxt == 0 else depth[level]
+            n = legal_actions(s, a, actions[level], board_size, wall_grid, wall_steel, base_x, base_y)
+            if n == 0:
+                counters[C_EVALS] += 1
+                ret = evaluate(s, base_x, base_y)
+                mode = _RETURN
+                continue
+            _order_actions(actions[level], n, first, randomize, rng)
+            n_actions[level] = n
+            cursor[level] = 0
+            best[level] = TT_NO_MOVE
+            alpha_orig[level] = alpha[level]
+            beta_orig[level] = beta[level]
+            value[level] = -np.inf if a == 0 else np.inf
+            mode = _EXPAND
+        elif mode == _EXPAND:
+            c = cursor[level]
+            if c < n_actions[level] and alpha[level] < beta[level] and not _should_stop(deadline, stop, counters):
+                cursor[level] = c + 1
+                counters[C_EXPANSIONS] += 1
+                successor(states[level], agent[level], actions[level, c], states[level + 1],
+                          board_size, wall_grid, wall_steel, base_x, base_y)
+                agent[level + 1] = next_agent[level]
+                depth[level + 1] = next_depth[level]
+                alpha[level + 1] = alpha[level]
+                beta[level + 1] = beta[level]
+                level += 1
+                mode = _ENTER
+            else:
+                if c < n_actions[level] and alpha[level] >= beta[level]:
+                    counters[C_CUTOFFS] += 1
+                ret = value[level]
+                if use_tt and not counters[C_TIMED_OUT]:
+                    if ret <= alpha_orig[level]:
+                        flag = TT_UPPER
+                    elif ret >= beta_orig[level]:
+                        flag = TT_LOWER
+                    else:
+                        flag = TT_EXACT
+                    tt_store(table, values, keys[level], max_depth - depth[level], flag,
+                             _to_frame(best[level], mirrored[level]), ret, counters)
+                mode = _RETURN
+        else:
+            if level == 0:
+                return ret
+            level -= 1
+            move = actions[level, cursor[level] - 1]
+            if agent[level] == 0:
+                if ret > value[level]:
+                    value[level] = ret
+                    best[level] = move
+                if value[level] > alpha[level]:
+                    alpha[level] = value[level]
+            else:
+                if ret < value[level]:
+                    value[level] = ret
+                    best[level] = move
+                if value[level] < beta[level]:
+                    beta[level] = value[level]
+            mode = _EXPAND
+
+
+@njit(cache=True)
+def alphabeta_root(state, max_depth, board_size, wall_grid, wall_steel, base_x, base_y,
+                   table, values, use_tt, randomize, rng, deadline, stop, counters,
+                   root_actions, root_values, symmetry, wall_mirror):
+    """Busca todas las acciones del jugador en ``state`` a ``max_depth`` turnos.
+
+    Devuelve ``(evaluadas, mejor)`` como ``expectimax_root``; si la búsqueda
+    se completa sin cortes por tiempo guarda la raíz en la tabla.
+    """
+    n = legal_actions(state, 0, root_actions, board_size, wall_grid, wall_steel, base_x, base_y)
+    entry = np.zeros(3, dtype=np.int64)
+    first = TT_NO_MOVE
+    key, mirrored = _node_key(state, 0, symmetry, wall_mirror, board_size)
+    if use_tt:
+        tt_probe(table, key, counters, entry)
+        if entry[1] != TT_EMPTY:
+            first = _to_frame(entry[2], mirrored)
+    _order_actions(root_actions, n, first, randomize, rng)
+    nxt = 1 % num_agents(state)
+    next_depth = 1 if nxt == 0 else 0
+    child = np.empty_like(state)
+    best = -1
+    best_score = -np.inf
+    evaluated = 0
+    for i in range(n):
+        if _should_stop(deadline, stop, counters):
+            break
+        counters[C_EXPANSIONS] += 1
+        successor(state, 0, root_actions[i], child, board_size, wall_grid, wall_steel, base_x, base_y)
+        val = alphabeta_value(child, nxt, best_score, np.inf, max_depth - next_depth,
+                              board_size, wall_grid, wall_steel, base_x, base_y,
+                              table, values, use_tt, randomize, rng, deadline, stop, counters,
+                              symmetry, wall_mirror)
+        if counters[C_TIMED_OUT]:
+            break
+        root_values[i] = val
+        evaluated += 1
+        # Si todas pierden (-inf) se queda la primera, como AlphaBetaAgent
+        if val > best_score or best < 0:
+            best_score = val
+            best = i
+    if use_tt and best >= 0 and evaluated == n:
+        tt_store(table, values, key, max_depth, TT_EXACT, _to_frame(root_actions[best], mirrored),
+                 best_score, counters)
+    return evaluated, best
+
+
+def search_iterative(vec, layout, depths, table, values, use_tt, randomize, seed, deadline, stop,
+                     symmetry=SYM_NONE):
+    """Profundización iterativa de un trabajador sobre las profundidades ``depths``.
+
+    ``symmetry`` (``canonical.SYM_*``) elige las simetrías de las claves de la
+    tabla; el espejo se descarta solo si el mapa no es simétrico.
+
+    Devuelve un dict con las iteraciones completas (``completed``: lista de
+    ``(profundidad, acción, valor)``), los contadores de ``counter_stats`` y
+    estadísticas de la tabla.
+    """
+    counters = np.zeros(NUM_COUNTERS, dtype=np.int64)
+    rng = np.array([seed & 0xFFFFFFFFFFFFFFFF], dtype=np.uint64)
+    root_actions = np.zeros(NUM_ACTIONS, dtype=np.int64)
+    root_values = np.full(NUM_ACTIONS, -np.inf)
+    symmetry, wall_mirror = symmetry_arrays(layout, symmetry)
+    completed = []
+    start = time.time()
+    for d in depths:
+        evaluated, best = alphabeta_root(
+            vec, d, layout.board_size, layout.wall_grid, layout.wall_steel, layout.base_x, layout.base_y,
+            table, values, use_tt, randomize, rng, deadline, stop, counters, root_actions, root_values,
+            symmetry, wall_mirror)
+        if counters[C_TIMED_OUT]:
+            break
+        if best >= 0:
+            completed.append((d, ACTIONS[root_actions[best]], float(root_values[best])))
+    probes = int(counters[C_TT_PROBES])
+    return dict(counter_stats(counters), **{
+        'completed': completed,
+        'tt_probes': probes,
+        'tt_cutoffs': int(counters[C_TT_CUTS]),
+        'tt_stores': int(counters[C_TT_STORES]),
+        'tt_hit_rate': counters[C_TT_HITS] / probes if probes else 0.0,
+        'timed_out': bool(counters[C_TIMED_OUT]),
+        'elapsed': time.time() - start,
+    })
+
+
+# Estado por proceso de los trabajadores (tabla adjuntada una sola vez)
+_WORKER_TABLES = {}
+
+
+def _lazy_worker(layout_desc, table_desc, data, worker_id, depths, use_tt, randomize, seed, deadline,
+                 symmetry=SYM_NONE):
+    layout = attach_layout(layout_desc)
+    tt = _WORKER_TABLES.get(table_desc['name'])
+    if tt is None:
+        tt = SharedTranspositionTable.attach(table_desc)
+        _WORKER_TABLES[table_desc['name']] = tt
+    _, vec, _ = loads_vector(data, layout)
+    stop = tt.stop_flag
+    stats = search_iterative(vec, layout, depths, tt.table, tt.values, use_tt, randomize, seed,
+                             deadline, stop, symmetry)
+    stats['worker'] = worker_id
+    return stats
+
+
+def _shutdown(executor, publisher, tt):
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+    publisher.close()
+    tt.close()
+
+
+class LazySMPAlphaBetaAgent:
+    """Alpha-beta Lazy SMP con tabla de transposición compartida.
+
+    - depth: profundidad máxima en turnos completos (como ``AlphaBetaAgent``).
+    - time_limit: segundos por decisión (None = sin límite).
+    - num_workers: trabajadores en total, contando el proceso principal
+      (None = ``os.cpu_count()``).
+    - tt_size_mb: tamaño de la tabla compartida; se conserva entre decisiones.
+    - random_order: los ayudantes barajan el orden de las acciones.
+    - stagger: los ayudantes impares empiezan una profundidad más arriba.
+    - symmetry: claves canónicas en la tabla (espejo izquierda-derecha en
+      mapas simétricos), ver ``gameClass.canonical``.
+
+    Tras cada decisión ``worker_stats`` tiene, por trabajador, nodos, sondeos
+    y aciertos en la tabla (``tt_hit_rate``) y la profundidad completada;
+    ``stats`` suma los contadores de todos y su profundidad es la del
+    resultado elegido. Hay que llamar a ``close()`` (o
+    esperar a la salida del intérprete) para liberar procesos y memoria.
+    """
+    def __init__(self, depth='1', tankIndex=0, time_limit=1.0, num_workers=None,
+                 tt_size_mb=16, random_order=True, stagger=True, seed=None, symmetry=False):
+        self.index = tankIndex
+        self.depth = int(depth)
+        self.time_limit = time_limit
+        self.num_workers = max(1, int(num_workers or os.cpu_count() or 1))
+        self.random_order = random_order
+        self.stagger = stagger
+        self.seed = seed
+        self.symmetry = SYM_ALL if symmetry is True else (symmetry or SYM_NONE)
+        self.start_time = 0
+        self.stats = SearchStats()   # Estadísticas de la última decisión
+        self.worker_stats = []
+        self.best_depth = 0
+        self.debug = False
+
+        self._tt = SharedTranspositionTable(size_mb=tt_size_mb)
+        self._publisher = LayoutPublisher()
+        self._executor = None
+        self._layout = None
+        self._rng = random.Random(seed)
+        self._finalizer = weakref.finalize(self, _shutdown, None, self._publisher, self._tt)
+
+    def is_time_exceeded(self):
+        return (
+            self.time_limit is not None
+            and (time.time() - self.start_time) > self.time_limit
+        )
+
+    @property
+    def expanded_nodes(self):
+        return self.stats.nodes
+
+    def _encode(self, gameState):
+        layout = self._layout
+        if layout is None or layout.signature != StaticLayout.from_state(gameState).signature:
+            layout = StaticLayout.from_state(gameState)
+            self._layout = layout
+        return encode_state(gameState, layout)
+
+    def _get_executor(self):
+        if self._executor is None and self.num_workers > 1:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers - 1)
+            self._finalizer.detach()
+            self._finalizer = weakref.finalize(self, _shutdown, self._executor, self._publisher, self._tt)
+        return self._executor
+
+    def _depths(self, worker_id):
+        first = 1
+        if self.stagger and worker_id % 2 == 1 and self.depth > 1:
+            first = 2
+        return list(range(first, self.depth + 1))
+
+    def clear_table(self):
+        self._tt.clear()
+
+    def close(self):
+        """Detiene los procesos y libera la tabla compartida."""
+        self._finalizer()
+
+    def getAction(self, gameState):
+        self.start_time = time.time()
+        self.stats.begin()
+        self.worker_stats = []
+        self.best_depth = 0
+        deadline = np.inf if self.time_limit is None else self.start_time + self.time_limit
+
+        layout, vec = self._encode(gameState)
+        if legal_actions(vec, 0, np.zeros(NUM_ACTIONS, dtype=np.int64), layout.board_size,
+                         layout.wall_grid, layout.wall_steel, layout.base_x, layout.base_y) == 0:
+            return self.stats.finish('STOP', 'no_moves')
+
+        tt = self._tt
+        tt.stop_flag[0] = 0
+        futures = []
+        executor = self._get_executor()
+        if executor is not None:
+            desc = self._publisher.publish(layout)
+            data = dumps_vector(vec, layout, embed_layout=False)
+            for w in range(1, self.num_workers):
+                futures.append(executor.submit(
+                    _lazy_worker, desc, tt.descriptor(), data, w, self._depths(w), True,
+                    self.random_order, self._rng.getrandbits(64), deadline, self.symmetry))
+
+        # El trabajador principal recorre todas las profundidades en orden natural
+        main = search_iterative(vec, layout, self._depths(0), tt.table, tt.values, True, False, 0,
+                                deadline, tt.stop_flag, self.symmetry)
+        main['worker'] = 0
+        tt.stop_flag[0] = 1
+        results = [main]
+        for fut in futures:
+            try:
+                results.append(fut.result())
+            except Exception as e:
+                if self.debug:
+                    print(f"[LazySMP] worker failed: {e}")
+
+        best_action, best_value, best_worker = None, None, None
+        for stats in results:
+            if stats['completed']:
+                d, action, value = stats['completed'][-1]
+                if d > self.best_depth:
+                    self.best_depth, best_action, best_value, best_worker = d, action, value, stats['worker']
+            stats['depth'] = stats['completed'][-1][0] if stats['completed'] else 0
+            self.stats.add_counters(stats)
+        self.stats.depth = self.best_depth
+        self.worker_stats = sorted(results, key=lambda s: s['worker'])
+
+        if self.debug or not getattr(self, 'suppress_output', False):
+            print(f"[LazySMP] Profundidad {self.best_depth} (worker {best_worker}): "
+                  f"acción={best_action} valor={best_value} nodos expandidos = {self.expanded_nodes}")
+            for s in self.worker_stats:
+                print(f"[LazySMP]   worker {s['worker']}: profundidad={s['depth']} nodos={s['nodes']} "
+                      f"tt_hits={s['tt_hits']}/{s['tt_probes']} ({s['tt_hit_rate']:.1%})")
+
+        # Sin ninguna iteración completa a tiempo: fallback reflexivo como el resto de agentes
+        try:
+            if best_action is None and self.is_time_exceeded():
+                return reflex_fallback(self, gameState, self.expanded_nodes)
+        except Exception:
+            pass
+        return self.stats.finish(best_action if best_action is not None else 'STOP')
@@ -1,9 +1,11 @@
 from ..utils import manhattanDistance, lookup
+from .searchCore import SearchCore, MIN, reflex_fallback, pre_search_move
+from .searchStats import SearchStats
+from .evalCache import make_eval_cache
+from .positionCache import store_move
 import time
-import threading
 import concurrent.futures
 import os
-import random
 
 # Pre-import ReflexTankAgent to avoid import latency when used as fallback (first call can block GUI)
 try:
@@ -16,13 +18,17 @@ class MinimaxAgent():
     """
     Your minimax agent (question 2)
     """
-    def __init__(self, depth = '1', tankIndex = 0):
+    def __init__(self, depth = '1', tankIndex = 0, eval_cache_mb=16):
         self.index = tankIndex  # Índice del tanque que controla este agente
         self.depth = int(depth)  
-        self.expanded_nodes = 0
+        self.stats = SearchStats()   # Estadísticas de la última decisión
         # Para permitir un corte por tiempo similar a AlphaBetaAgent
         self.start_time = 0
         self.time_limit = 1.0
+        self.tablebase = None   # EndgameTablebase opcional (finales 1 contra 1)
+        self.opening_book = None   # OpeningBook opcional (primeros ticks de la partida)
+        self.position_cache = None   # PositionCache opcional (jugadas de otras ejecuciones)
+        self.eval_cache = make_eval_cache(eval_cache_mb)   # Evaluaciones de hojas de toda la partida
         
     
     def is_time_exceeded(self):
@@ -32,6 +38,19 @@ class MinimaxAgent():
             and (time.time() - self.start_time) > self.time_limit
         )
 
+    @property
+    def expanded_nodes(self):
+        return self.stats.nodes
+
+    def _search_core(self, root_index, num_tanks):
+        """Motor de búsqueda configurado para esta decisión (se crea una vez)."""
+        core = getattr(self, '_core', None)
+        if core is None:
+            core = SearchCore(opponent=MIN, should_stop=self.is_time_exceeded, stats=self.stats,
+                              evaluate=self.eval_cache.evaluate if self.eval_cache is not None else None)
+            self._core = core
+        return core.configure(max_agent=root_index, depth_agent=root_index, num_agents=num_tanks)
+
     def getAction(self, gameState):
         """Minimax search for multi-agent BattleCity.
 
@@ -40,89 +59,63 @@ class MinimaxAgent():
         (minimizers). Depth is counted in "full-turns": we increment the
         depth when we cycle back to the root agent.
         """
-        import time
-
         num_tanks = gameState.getNumAgents()
 
         # Use the attribute 'index' if present, otherwise assume 0
         root_index = getattr(self, 'index', 0)
 
         self.start_time = time.time()
-
-        def minimax(state, depth, agent_index):
-            self.expanded_nodes += 1
-
-            # Terminal or max depth reached
-            if depth >= self.depth or state.isTerminal() or self.is_time_exceeded():
-                return state.evaluate_state()
-
-            next_agent = (agent_index + 1) % num_tanks
-            # Increase depth when we've completed a full cycle back to root
-            next_depth = depth + 1 if next_agent == root_index else depth
-
-            # If this agent is the maximizer (the one that called getAction)
-            if agent_index == root_index:
-                v = float('-inf')
-                for action in state.getLegalActions(agent_index):
-                    if time.time() - self.start_time > self.time_limit:
-                        break
-                    succ = state.getSuccessor(agent_index, action)
-                    v = max(v, minimax(succ, next_depth, next_agent))
-                return v
-            else:
-                # Minimizing adversary
-                v = float('inf')
-                for action in state.getLegalActions(agent_index):
-                    if time.time() - self.start_time > self.time_limit:
-                        break
-                    succ = state.getSuccessor(agent_index, action)
-                    v = min(v, minimax(succ, next_depth, next_agent))
-                return v
+        self.stats.begin()
+        core = self._search_core(root_index, num_tanks)
 
         legal_actions = gameState.getLegalActions(root_index)
         if not legal_actions:
-            return 'STOP'
+            return self.stats.finish('STOP', 'no_moves')
+
+        # Apertura del libro, final resuelto en la tabla o posición ya buscada: no hace falta buscar
+        move = pre_search_move(self, gameState)
+        if move is not None:
+            return move
 
         best_action = legal_actions[0]
         best_score = float('-inf')
 
         # Evaluate each root action
         for action in legal_actions:
-            if time.time() - self.start_time > self.time_limit:
+            if self.is_time_exceeded():
                 break
             succ = gameState.getSuccessor(root_index, action)
-            score = minimax(succ, 0, (root_index + 1) % num_tanks)
+            score = core.search(succ, (root_index + 1) % num_tanks, 0, self.depth)
             if score > best_score:
                 best_score = score
                 best_action = action
+        if not self.is_time_exceeded():
+            self.stats.depth = self.depth
 
         # Si se superó el tiempo, fallback a agente reflexivo 50/50 (offensive/defensive)
         try:
             if self.is_time_exceeded():
-                from .reflexAgent import ReflexTankAgent
-                rtype = 'offensive' if random.random() < 0.5 else 'defensive'
-                reflex = ReflexTankAgent(script_type=rtype)
-                try:
-                    elapsed = time.time() - self.start_time if self.start_time else 0.0
-                    print(f"[FALLBACK] {self.__class__.__name__} exceeded time after {elapsed:.2f}s, nodes={getattr(self,'expanded_nodes',None)} -> ReflexTankAgent({rtype})")
-                except Exception:
-                    print(f"[FALLBACK] {self.__class__.__name__} exceeded time -> ReflexTankAgent({rtype})")
-                return reflex.getAction(gameState)
+                return reflex_fallback(self, gameState, self.stats.nodes)
         except Exception:
             pass
 
-        return best_action
+        store_move(self, gameState, best_action, best_score)
+        return self.stats.finish(best_action)
 
 class AlphaBetaAgent():
     """
     Your minimax agent with alpha-beta pruning and iterative deepening for Battle City
     """
-    def __init__(self, depth = '1', tankIndex = 0, time_limit=1.0):
+    def __init__(self, depth = '1', tankIndex = 0, time_limit=1.0, eval_cache_mb=16):
         self.index = tankIndex  # Índice del tanque que controla este agente
         self.depth = int(depth)  # Profundidad máxima para IDS
-        self.expanded_nodes = 0  # Contador de nodos expandidos
+        self.stats = SearchStats()   # Estadísticas de la última decisión (se reinician en cada una)
         self.start_time = 0     # Tiempo de inicio de la búsqueda
         self.time_limit = time_limit   # Límite de tiempo en segundos para tomar una decisión
+        self.tablebase = None   # EndgameTablebase opcional (finales 1 contra 1)
+        self.opening_book = None   # OpeningBook opcional (primeros ticks de la partida)
+        self.position_cache = None   # PositionCache opcional (jugadas de otras ejecuciones)
+        self.eval_cache = make_eval_cache(eval_cache_mb)   # Evaluaciones de hojas de toda la partida
 
     def is_time_exceeded(self):
         """Verifica si se ha excedido el límite de tiempo"""
@@ -131,58 +124,40 @@ class AlphaBetaAgent():
             and (time.time() - self.start_time) > self.time_limit
         )
 
+    @property
+    def expanded_nodes(self):
+        return self.stats.nodes
+
+    def _search_core(self, root_index, num_tanks):
+        """Motor de búsqueda con poda alpha-beta configurado para esta decisión."""
+        core = getattr(self, '_core', None)
+        if core is None:
+            core = SearchCore(opponent=MIN, pruning=True, should_stop=self.is_time_exceeded, stats=self.stats,
+                              evaluate=self.eval_cache.evaluate if self.eval_cache is not None else None)
+            self._core = core
+        return core.configure(max_agent=root_index, depth_agent=root_index, num_agents=num_tanks)
+
     def getAction(self, gameState):
         """
         Returns the best action found using iterative deepening search with alpha-beta pruning
         """
-        import time
-
         num_tanks = gameState.getNumAgents()
 
         # Use the attribute 'index' if present, otherwise assume 0
         root_index = getattr(self, 'index', 0)
 
         self.start_time = time.time()
-
-        def alpha_beta(state, depth, agent_index, alpha=float('-inf'), beta=float('inf')):
-            self.expanded_nodes += 1
-
-            # Terminal or max depth reached
-            if depth >= self.depth or state.isTerminal() or self.is_time_exceeded():
-                return state.evaluate_state()
-
-            next_agent = (agent_index + 1) % num_tanks
-            # Increase depth when we've completed a full cycle back to root
-            next_depth = depth + 1 if next_agent == root_index else depth
-
-            # If this agent is the maximizer (the one that called getAction)
-            if agent_index == root_index:
-                v = float('-inf')
-                for action in state.getLegalActions(agent_index):
-                    if self.is_time_exceeded():
-                        break
-                    succ = state.getSuccessor(agent_index, action)
-                    v = max(v, alpha_beta(succ, next_depth, next_agent, alpha, beta))
-                    alpha = max(alpha,v)
-                    if beta < alpha:
-                        break
-                return v
-            else:
-                # Minimizing adversary
-                v = float('inf')
-                for action in state.getLegalActions(agent_index):
-                    if self.is_time_exceeded():
-                        break
-                    succ = state.getSuccessor(agent_index, action)
-                    v = min(v, alpha_beta(succ, next_depth, next_agent, alpha, beta))
-                    beta = min(beta, v)
-                    if beta <= alpha:
-                        break  # Alpha-beta pruning
-                return v
+        self.stats.begin()
+        core = self._search_core(root_index, num_tanks)
 
         legal_actions = gameState.getLegalActions(root_index)
         if not legal_actions:
-            return 'STOP'
+            return self.stats.finish('STOP', 'no_moves')
+
+        # Apertura del libro, final resuelto en la tabla o posición ya buscada: no hace falta buscar
+        move = pre_search_move(self, gameState)
+        if move is not None:
+            return move
 
         best_action = legal_actions[0]
         best_score = float('-inf')
@@ -196,28 +171,23 @@ class AlphaBetaAgent():
                 break
             for action in legal_actions:
                 succ = gameState.getSuccessor(root_index, action)
-                score = alpha_beta(succ, 0, (root_index + 1) % num_tanks, alpha, beta)
+                score = core.search(succ, (root_index + 1) % num_tanks, 0, self.depth, alpha, beta)
                 if score > best_score:
                     best_score = score
                     best_action = action
                 alpha = max(alpha, best_score)
+            if not self.is_time_exceeded():
+                self.stats.depth = self.depth
 
         # Si se superó el tiempo, fallback a agente reflexivo 50/50
         try:
             if self.is_time_exceeded():
-                from .reflexAgent import ReflexTankAgent
-                rtype = 'offensive' if random.random() < 0.5 else 'defensive'
-                reflex = ReflexTankAgent(script_type=rtype)
-                try:
-                    elapsed = time.time() - self.start_time if self.start_time else 0.0
-                    print(f"[FALLBACK] {self.__class__.__name__} exceeded time after {elapsed:.2f}s, nodes={getattr(self,'expanded_nodes',None)} -> ReflexTankAgent({rtype})")
-                except Exception:
-                    print(f"[FALLBACK] {self.__class__.__name__} exceeded time -> ReflexTankAgent({rtype})")
-                return reflex.getAction(gameState)
+                return reflex_fallback(self, gameState, self.stats.nodes)
         except Exception:
             pass
 
-        return best_action
+        store_move(self, gameState, best_action, best_score)
+        return self.stats.finish(best_action)
 
 
 class ParallelAlphaBetaAgent(AlphaBetaAgent):
@@ -227,11 +197,11 @@ class ParallelAlphaBetaAgent(AlphaBetaAgent):
     Notes:
     - Keeps the same alpha-beta logic for per-subtree search.
     - Parallelizes only the root-action evaluations (each subtree executed in its own thread).
-    - Uses a threading.Lock to update shared counters like `expanded_nodes` safely.
+    - Each subtree search adds its counters to `stats` under the search core's lock.
     - Respects the same time limit checks as `AlphaBetaAgent`.
     """
-    def __init__(self, depth='1', tankIndex=0, time_limit=1.0, max_workers=None):
-        super().__init__(depth=depth, tankIndex=tankIndex, time_limit=time_limit)
+    def __init__(self, depth='1', tankIndex=0, time_limit=1.0, max_workers=None, eval_cache_mb=16):
+        super().__init__(depth=depth, tankIndex=tankIndex, time_limit=time_limit, eval_cache_mb=eval_cache_mb)
         # Optional cap for worker threads. If None, we'll use min(len(actions), cpu_count*5)
         self.max_workers = max_workers
 
@@ -240,55 +210,22 @@ class ParallelAlphaBetaAgent(AlphaBetaAgent):
         Same iterative-deepening + alpha-beta structure as `AlphaBetaAgent.getAction`,
         but evaluates each root action's subtree in parallel using threads.
         """
-        import time
-
         num_tanks = gameState.getNumAgents()
         root_index = getattr(self, 'index', 0)
         self.start_time = time.time()
-
-        # Lock for thread-safe updates
-        counter_lock = threading.Lock()
-
-        def alpha_beta(state, depth, agent_index, alpha=float('-inf'), beta=float('inf')):
-            # Local reference to speed access
-            nonlocal counter_lock
-
-            with counter_lock:
-                self.expanded_nodes += 1
-
-            # Terminal or max depth reached
-            if depth >= self.depth or state.isTerminal() or self.is_time_exceeded():
-                return state.evaluate_state()
-
-            next_agent = (agent_index + 1) % num_tanks
-            next_depth = depth + 1 if next_agent == root_index else depth
-
-            if agent_index == root_index:
-                v = float('-inf')
-                for action in state.getLegalActions(agent_index):
-                    if self.is_time_exceeded():
-                        break
-                    succ = state.getSuccessor(agent_index, action)
-                    v = max(v, alpha_beta(succ, next_depth, next_agent, alpha, beta))
-                    alpha = max(alpha, v)
-                    if beta < alpha:
-                        break
-                return v
-            else:
-                v = float('inf')
-                for action in state.getLegalActions(agent_index):
-                    if self.is_time_exceeded():
-                        break
-                    succ = state.getSuccessor(agent_index, action)
-                    v = min(v, alpha_beta(succ, next_depth, next_agent, alpha, beta))
-                    beta = min(beta, v)
-                    if beta <= alpha:
-                        break
-                return v
+        self.stats.begin()
+        # The search core keeps its state on an explicit per-call stack, so the
+        # worker threads can share it.
+        core = self._search_core(root_index, num_tanks)
 
         legal_actions = gameState.getLegalActions(root_index)
         if not legal_actions:
-            return 'STOP'
+            return self.stats.finish('STOP', 'no_moves')
+
+        # Apertura del libro, final resuelto en la tabla o posición ya buscada: no hace falta buscar
+        move = pre_search_move(self, gameState)
+        if move is not None:
+            return move
 
         best_action = legal_actions[0]
         best_score = float('-inf')
@@ -318,7 +255,7 @@ class ParallelAlphaBetaAgent(AlphaBetaAgent):
                     # next agent after root
                     next_agent = (root_index + 1) % num_tanks
                     # Submit alpha_beta subtree evaluation
-                    futures.append((action, executor.submit(alpha_beta, succ, 0, next_agent, alpha, beta)))
+                    futures.append((action, executor.submit(core.search, succ, next_agent, 0, self.depth, alpha, beta)))
 
                 # Collect results, respecting the time limit
                 for action, fut in futures:
@@ -344,20 +281,15 @@ class ParallelAlphaBetaAgent(AlphaBetaAgent):
                         best_score = score
                         best_action = action
                     alpha = max(alpha, best_score)
+            if not self.is_time_exceeded():
+                self.stats.depth = self.depth
 
         # Si se superó el tiempo, fallback a agente reflexivo 50/50
         try:
             if self.is_time_exceeded():
-                from .reflexAgent import ReflexTankAgent
-                rtype = 'offensive' if random.random() < 0.5 else 'defensive'
-                reflex = ReflexTankAgent(script_type=rtype)
-                try:
-                    elapsed = time.time() - self.start_time if self.start_time else 0.0
-                    print(f"[FALLBACK] {self.__class__.__name__} exceeded time after {elapsed:.2f}s, nodes={getattr(self,'expanded_nodes',None)} -> ReflexTankAgent({rtype})")
-                except Exception:
-                    print(f"[FALLBACK] {self.__class__.__name__} exceeded time -> ReflexTankAgent({rtype})")
-                return reflex.getAction(gameState)
+                return reflex_fallback(self, gameState, self.stats.nodes)
         except Exception:
             pass
 
-        return best_action
\ No newline at end of file
+        store_move(self, gameState, best_action, best_score)
+        return self.stats.finish(best_action)
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""Libro de aperturas por nivel.
+
+Los primeros turnos desde cada mapa de ``scenarios`` casi no cambian entre
+partidas: el jugador empieza siempre en el mismo sitio y los enemigos solo
+varían por el azar de su script. El libro guarda, para las posiciones de los
+primeros ``plies`` ticks que se repiten en las partidas de muestreo, la
+jugada de una búsqueda profunda (ver ``policyTable``: misma clave canónica
+sin reloj, mismo formato ``.npz`` + ``.json``):
+
+- Construcción: ``games`` partidas de ``plies`` ticks siguiendo siempre al
+  maestro (sin exploración); cada posición se busca una sola vez y se guarda
+  si aparece en al menos ``min_visits`` partidas.
+- Extensión: ``extend_book`` añade las posiciones de apertura de partidas
+  registradas (``run_single_game(..., log_path=...)`` escribe un registro de
+  ``serialization.dumps_state`` por decisión del jugador).
+
+Los agentes consultan el libro (atributo ``opening_book``) antes de buscar::
+
+    python -m src.agents.openingBook build --level 1 --games 50 --plies 12
+    python -m src.agents.openingBook extend books/level1 partidas.bclog
+"""
+import os
+import time
+import argparse
+
+from ..gameClass.arrayState import StaticLayout
+from ..gameClass.canonical import SYM_NONE
+from ..gameClass.serialization import iter_records, loads_state
+from .policyTable import (PolicyTable, PolicyKeyer, collect_samples, label_state, layout_digest,
+                          _fresh_state, _teacher)
+
+DEFAULT_PLIES = 12
+
+
+class OpeningBook(PolicyTable):
+    """Tabla de políticas que solo responde en los primeros ``plies`` ticks."""
+
+    @property
+    def plies(self):
+        return int(self.meta.get('plies', DEFAULT_PLIES))
+
+    def lookup(self, gameState):
+        if gameState.current_time >= self.plies:
+            return None
+        return super().lookup(gameState)
+
+
+def build_opening_book(layout_rows, path=None, games=50, plies=DEFAULT_PLIES, depth=3, min_visits=2, seed=0,
+                       symmetry=SYM_NONE, verbose=True):
+    """Construye el libro de aperturas del mapa; si se da ``path`` lo guarda."""
+    start = time.time()
+    samples = collect_samples(layout_rows, games, depth, epsilon=0.0, seed=seed, max_ticks=plies,
+                              symmetry=symmetry)
+    meta = {
+        'signature': layout_digest(StaticLayout.from_state(_fresh_state(layout_rows)).signature),
+        'symmetry': symmetry,
+        'depth': depth,
+        'plies': plies,
+        'games': games,
+        'min_visits': min_visits,
+        'seed': seed,
+        'logged_games': 0,
+        'elapsed': time.time() - start,
+    }
+    book = OpeningBook.from_samples(samples, meta, min_count=min_visits)
+    if path is not None:
+        book.save(path)
+    if verbose:
+        print(f"[OpeningBook] {len(book)} posiciones de {len(samples)} muestras "
+              f"(>= {min_visits} visitas), {meta['elapsed']:.1f}s")
+    return book
+
+
+def read_game_log(path, plies=None):
+    """Estados de un registro de partidas; con ``plies`` solo los de los primeros ticks."""
+    states = []
+    with open(path, 'rb') as f:
+        for data in iter_records(f):
+            state = loads_state(data)
+            if plies is None or state.current_time < plies:
+                states.append(state)
+    return states
+
+
+def extend_book(book, log_paths, depth=None, min_visits=None, path=None, verbose=True):
+    """Añade al libro las posiciones de apertura de los registros ``log_paths``.
+
+    Las visitas de los registros se suman a las del libro; las posiciones
+    nuevas que llegan a ``min_visits`` se etiquetan con el maestro (a la
+    profundidad del libro por defecto). Devuelve el libro nuevo y, si se da
+    ``path``, lo guarda.
+    """
+    if isinstance(book, str):
+        book = OpeningBook.load(book)
+    depth = depth or book.meta.get('depth', 3)
+    min_visits = min_visits or book.meta.get('min_visits', 2)
+    keyer = PolicyKeyer(book.meta.get('symmetry', SYM_NONE))
+
+    # Visitas por clave en los registros (las posiciones de otro mapa se ignoran)
+    logged = {}
+    games = 0
+    for log_path in log_paths:
+        states = read_game_log(log_path, book.plies)
+        games += sum(1 for s in states if s.current_time == 0)
+        for state in states:
+            key, _, signature = keyer.key(state)
+            if book.signature is not None and signature != book.signature:
+                continue
+            entry = logged.get(key)
+            if entry is None:
+                logged[key] = [state, 1]
+            else:
+                entry[1] += 1
+
+    samples = book.to_samples()
+    labels = {int(k): int(a) for k, a in zip(book.keys, book.actions)}
+    teacher = _teacher(depth)
+    added = 0
+    for key, (state, visits) in logged.items():
+        known = key in labels
+        if not known and visits < min_visits:
+            continue
+        _, canonical, _ = label_state(teacher, keyer, state, labels)
+        if canonical is None:
+            continue
+        samples.extend([(key, canonical)] * visits)
+        added += not known
+
+    meta = dict(book.meta)
+    meta['logged_games'] = meta.get('logged_games', 0) + games
+    extended = OpeningBook.from_samples(samples, meta)
+    if path is not None:
+        extended.save(path)
+    if verbose:
+        print(f"[OpeningBook] {games} partidas registradas, {len(logged)} posiciones de apertura, "
+              f"{added} nuevas -> {len(extended)} en el libro")
+    return extended
+
+
+def book_move(agent, gameState):
+    """Jugada del libro de aperturas del agente (atributo ``opening_book``) o None."""
+    book = getattr(agent, 'opening_book', None)
+    if book is None or getattr(agent, 'index', 0) != 0:
+        return None
+    action = book.lookup(gameState)
+    if action is None or action not in gameState.getLegalActions(0):
+        return None
+    if not getattr(agent, 'suppress_output', False):
+        print(f"[OpeningBook] tick {gameState.current_time} -> {action}")
+    return action
+
+
+if __name__ == '__main__':
+    from ..gameClass.scenarios import level1, level2, level3, level4
+
+    parser = argparse.ArgumentParser(description='Libro de aperturas por nivel')
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help='construye el libro desde partidas de muestreo')
+    build.add_argument('--level', '-l', type=int, default=1, choices=[1, 2, 3, 4])
+    build.add_argument('--out', '-o', default=None, help='ruta de salida (por defecto books/levelN)')
+    build.add_argument('--games', '-g', type=int, default=50)
+    build.add_argument('--plies', type=int, default=DEFAULT_PLIES)
+    build.add_argument('--depth', '-d', type=int, default=3)
+    build.add_argument('--min-visits', type=int, default=2)
+    extend = sub.add_parser('extend', help='añade las aperturas de partidas registradas')
+    extend.add_argument('book')
+    extend.add_argument('logs', nargs='+')
+    extend.add_argument('--depth', '-d', type=int, default=None)
+    extend.add_argument('--min-visits', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        levels = {1: level1.get_level1, 2: level2.get_level2, 3: level3.get_level3, 4: level4.get_level4}
+        out = args.out or os.path.join('books', f'level{args.level}')
+        build_opening_book(levels[args.level](), out, games=args.games, plies=args.plies, depth=args.depth,
+                           min_visits=args.min_visits)
+    else:
+        extend_book(args.book, args.logs, depth=args.depth, min_visits=args.min_visits, path=args.book)
@@ -0,0 +1,389 @@
+"""Tabla de políticas destilada de búsquedas Expectimax profundas.
+
+Se juegan partidas sobre un mapa y, en cada posición del jugador, un
+"maestro" (``JitExpectimaxAgent`` a la profundidad pedida, sin límite de
+tiempo) decide la jugada. La tabla guarda la mejor jugada por clave canónica
+de estado, de modo que en partida la decisión es una búsqueda binaria:
+
+- Clave: ``canonical_hash`` sin simetrías (``SYM_NONE``: el modelo de
+  enemigos del maestro no es simétrico) del estado sin el reloj; ``H_TIME``
+  solo desplaza la evaluación por igual en todas las jugadas, como en la
+  tabla de finales. Con ``symmetry=SYM_ALL`` las jugadas se guardan en el
+  marco canónico (ver ``canonical.mirror_action``).
+- Si una clave recibe jugadas distintas (p.ej. en otro tick) se queda la más
+  votada.
+- Para visitar posiciones variadas, la partida de muestreo sigue al maestro
+  salvo con probabilidad ``epsilon``, en la que juega una acción legal al azar.
+
+Formato: ``.npz`` con ``keys`` (uint64 ordenadas), ``actions`` (uint8, índice
+en ``ACTIONS``) y ``votes`` (uint16), más un ``.json`` con el mapa y los
+parámetros de generación. ``TableAgent`` consulta la tabla y, si la posición
+no está, delega en una búsqueda en vivo::
+
+    python -m src.agents.policyTable --level 1 --games 40 --depth 3 --workers 4
+"""
+import os
+import json
+import time
+import hashlib
+import random
+import argparse
+import concurrent.futures
+
+import numpy as np
+
+from ..gameClass.arrayState import ACTIONS, ACTION_INDEX, StaticLayout, encode_state, H_TIME
+from ..gameClass.canonical import SYM_NONE, symmetry_arrays
+from ..gameClass.jitEngine import canonical_hash, mirror_action
+from .enemyAgent import ScriptedEnemyAgent
+from .searchStats import SearchStats
+
+
+def layout_digest(signature):
+    """Resumen corto y estable de ``StaticLayout.signature`` (sobrevive al ``.json``)."""
+    return hashlib.sha1(repr(signature).encode()).hexdigest()[:16]
+
+
+def _fresh_state(layout_rows):
+    from ..gameClass.game import BattleCityState
+    state = BattleCityState()
+    state.initialize(layout_rows)
+    return state
+
+
+class PolicyKeyer:
+    """Calcula claves canónicas sin reloj; reutiliza el ``StaticLayout`` del mapa."""
+    def __init__(self, symmetry=SYM_NONE):
+        self.symmetry = symmetry
+        self._layout = None
+        self._sym = None
+        self._digest = None
+        self._quick = None
+
+    def key(self, gameState):
+        """``(clave, reflejado, resumen del mapa)`` del estado con el jugador al turno.
+
+        Para no reconstruir el layout en cada consulta solo se comparan el
+        tamaño, la base y el número de paredes (las paredes no cambian de
+        sitio durante la partida).
+        """
+        layout = self._layout
+        quick = (gameState.board_size, tuple(gameState.base.position), len(gameState.walls))
+        if layout is None or quick != self._quick:
+            layout = StaticLayout.from_state(gameState)
+            self._quick = quick
+            self._layout = layout
+            self._sym = symmetry_arrays(layout, self.symmetry)
+            self._digest = layout_digest(layout.signature)
+        layout, vec = encode_state(gameState, layout)
+        vec[H_TIME] = 0
+        symmetry, wall_mirror = self._sym
+        key, mirrored = canonical_hash(vec, 0, symmetry, wall_mirror, layout.board_size)
+        return int(key), bool(mirrored), self._digest
+
+
+def _teacher(depth):
+    from .jitExpectimax import JitExpectimaxAgent
+    teacher = JitExpectimaxAgent(depth=depth, time_limit=None)
+    teacher.suppress_output = True
+    return teacher
+
+
+def label_state(teacher, keyer, state, labels=None):
+    """``(clave, acción canónica, acción real)`` del maestro en ``state``.
+
+    ``labels`` (dict clave -> acción canónica) evita repetir la búsqueda en
+    posiciones ya etiquetadas. La acción es None si el maestro no devuelve
+    una jugada legal.
+    """
+    key, mirrored, _ = keyer.key(state)
+    canonical = labels.get(key) if labels is not None else None
+    if canonical is None:
+        action = teacher.getAction(state)
+        if action not in state.getLegalActions(0):
+            return key, None, None
+        canonical = mirror_action(ACTION_INDEX[action]) if mirrored else ACTION_INDEX[action]
+        if labels is not None:
+            labels[key] = canonical
+    return key, canonical, ACTIONS[mirror_action(canonical) if mirrored else canonical]
+
+
+def play_labelled_game(layout_rows, depth, epsilon=0.2, seed=None, max_ticks=None, symmetry=SYM_NONE,
+                       labels=None):
+    """Juega una partida de muestreo y devuelve ``[(clave, acción canónica), ...]``.
+
+    Los enemigos son ``ScriptedEnemyAgent('attack_base')``, como en los
+    experimentos; ``seed`` fija tanto su azar (``random`` global) como la
+    exploración. ``labels`` se pasa a ``label_state``.
+    """
+    if seed is not None:
+        random.seed(seed)
+    explore = random.Random(seed)
+    teacher = _teacher(depth)
+    keyer = PolicyKeyer(symmetry)
+    state = _fresh_state(layout_rows)
+    enemies = [ScriptedEnemyAgent(i + 1, script_type='attack_base') for i in range(len(state.getTeamBTanks()))]
+    samples = []
+    ticks = 0
+    while not (state.isWin() or state.isLose() or state.isLimitTime()):
+        if max_ticks is not None and ticks >= max_ticks:
+            break
+        legal = state.getLegalActions(0)
+        key, canonical, action = label_state(teacher, keyer, state, labels)
+        if canonical is not None:
+            samples.append((key, canonical))
+        if legal and (action is None or explore.random() < epsilon):
+            action = explore.choice(legal)
+        if action:
+            state.applyTankAction(0, action)
+        for i, enemy in enumerate(enemies, start=1):
+            enemy_action = enemy.getAction(state)
+            if enemy_action:
+                state.applyTankAction(i, enemy_action)
+        state.advanceTick()
+        ticks += 1
+    return samples
+
+
+def _game_worker(layout_rows, depth, epsilon, seed, max_ticks, symmetry):
+    return play_labelled_game(layout_rows, depth, epsilon=epsilon, seed=seed, max_ticks=max_ticks,
+                              symmetry=symmetry)
+
+
+def collect_samples(layout_rows, games, depth, epsilon=0.2, seed=0, max_ticks=None, symmetry=SYM_NONE,
+                    workers=None):
+    """Muestras de ``games`` partidas (semillas ``seed`` .. ``seed + games - 1``) repartidas entre procesos.
+
+    En serie las etiquetas del maestro se comparten entre partidas; con
+    varios procesos cada partida busca las suyas.
+    """
+    seeds = [seed + g for g in range(games)]
+    workers = max(1, int(workers or 1))
+    if workers == 1:
+        labels = {}
+        results = [play_labelled_game(layout_rows, depth, epsilon=epsilon, seed=s, max_ticks=max_ticks,
+                                      symmetry=symmetry, labels=labels) for s in seeds]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_game_worker, layout_rows, depth, epsilon, s, max_ticks, symmetry)
+                       for s in seeds]
+            results = [f.result() for f in futures]
+    return [sample for game in results for sample in game]
+
+
+class PolicyTable:
+    """Tabla ordenada ``clave -> jugada`` (búsqueda binaria con ``np.searchsorted``)."""
+    def __init__(self, keys, actions, votes=None, meta=None):
+        self.keys = np.asarray(keys, dtype=np.uint64)
+        self.actions = np.asarray(actions, dtype=np.uint8)
+        self.votes = np.ones(len(self.keys), dtype=np.uint16) if votes is None else np.asarray(votes, dtype=np.uint16)
+        self.meta = dict(meta or {})
+        self.signature = self.meta.get('signature')
+        self.keyer = PolicyKeyer(self.meta.get('symmetry', SYM_NONE))
+
+    @classmethod
+    def from_samples(cls, samples, meta=None, min_count=1):
+        """Agrupa las muestras por clave y se queda con la jugada más votada
+        (empate: la primera en el orden de ``ACTIONS``). Las claves con menos
+        de ``min_count`` muestras se descartan."""
+        counts = {}
+        for key, action in samples:
+            row = counts.get(key)
+            if row is None:
+                row = counts[key] = [0] * len(ACTIONS)
+            row[action] += 1
+        if min_count > 1:
+            counts = {key: row for key, row in counts.items() if sum(row) >= min_count}
+        keys = np.array(sorted(counts), dtype=np.uint64)
+        actions = np.empty(len(keys), dtype=np.uint8)
+        votes = np.empty(len(keys), dtype=np.uint16)
+        for i, key in enumerate(keys.tolist()):
+            row = counts[key]
+            best = max(range(len(row)), key=lambda a: (row[a], -a))
+            actions[i] = best
+            votes[i] = min(row[best], 0xFFFF)
+        meta = dict(meta or {})
+        meta['samples'] = len(samples)
+        meta['conflicts'] = sum(1 for row in counts.values() if sum(1 for c in row if c) > 1)
+        return cls(keys, actions, votes, meta)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def to_samples(self):
+        """Muestras equivalentes a la tabla (cada jugada repetida ``votes`` veces), para fusionar tablas."""
+        return [(int(k), int(a)) for k, a, v in zip(self.keys, self.actions, self.votes) for _ in range(int(v))]
+
+    def __contains__(self, key):
+        return self.find(key) >= 0
+
+    def find(self, key):
+        """Posición de ``key`` en la tabla o -1."""
+        i = int(np.searchsorted(self.keys, np.uint64(key)))
+        if i < len(self.keys) and int(self.keys[i]) == key:
+            return i
+        return -1
+
+    def lookup(self, gameState):
+        """Jugada tabulada para el jugador en ``gameState`` (marco real) o None."""
+        key, mirrored, signature = self.keyer.key(gameState)
+        if self.signature is not None and signature != self.signature:
+            return None
+        i = self.find(key)
+        if i < 0:
+            return None
+        action = int(self.actions[i])
+        return ACTIONS[mirror_action(action) if mirrored else action]
+
+    def save(self, path):
+        base, _ = os.path.splitext(path)
+        os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+        np.savez(base + '.npz', keys=self.keys, actions=self.actions, votes=self.votes)
+        with open(base + '.json', 'w') as f:
+            json.dump(self.meta, f)
+
+    @classmethod
+    def load(cls, path):
+        base, _ = os.path.splitext(path)
+        with open(base + '.json') as f:
+            meta = json.load(f)
+        with np.load(base + '.npz') as data:
+            return cls(data['keys'], data['actions'], data['votes'], meta)
+
+
+def build_policy_table(layout_rows, path=None, games=40, depth=3, epsilon=0.2, seed=0, max_ticks=None,
+                       symmetry=SYM_NONE, workers=None, verbose=True):
+    """Destila la tabla de ``games`` partidas de muestreo; si se da ``path`` la guarda."""
+    start = time.time()
+    samples = collect_samples(layout_rows, games, depth, epsilon=epsilon, seed=seed, max_ticks=max_ticks,
+                              symmetry=symmetry, workers=workers)
+    meta = {
+        'signature': layout_digest(StaticLayout.from_state(_fresh_state(layout_rows)).signature),
+        'symmetry': symmetry,
+        'depth': depth,
+        'games': games,
+        'epsilon': epsilon,
+        'seed': seed,
+        'elapsed': time.time() - start,
+    }
+    table = PolicyTable.from_samples(samples, meta)
+    if path is not None:
+        table.save(path)
+    if verbose:
+        print(f"[PolicyTable] {len(table)} claves de {len(samples)} muestras, "
+              f"conflictos={table.meta['conflicts']}, {table.meta['elapsed']:.1f}s")
+    return table
+
+
+class TableAgent:
+    """Agente que juega la jugada de la tabla y, si no está, la de ``fallback``.
+
+    ``fallback`` es cualquier agente con ``getAction`` (por defecto
+    ``JitExpectimaxAgent`` de la profundidad de la tabla con límite de
+    tiempo). ``hits``/``misses`` cuentan las consultas; ``stats`` es el de la
+    tabla en los aciertos (0 nodos, origen ``'table'``) y el de ``fallback``
+    en los fallos.
+    """
+    def __init__(self, table, fallback=None, tankIndex=0, time_limit=1.0):
+        if isinstance(table, str):
+            table = PolicyTable.load(table)
+        self.table = table
+        self.index = tankIndex
+        if fallback is None:
+            from .jitExpectimax import JitExpectimaxAgent
+            fallback = JitExpectimaxAgent(depth=table.meta.get('depth', 3), time_limit=time_limit)
+        self.fallback = fallback
+        self.hits = 0
+        self.misses = 0
+        self.lookup_time = 0.0
+        self._table_stats = SearchStats()
+        self._stats = self._table_stats
+
+    @property
+    def stats(self):
+        return self._stats
+
+    @property
+    def node_count(self):
+        return self._stats.nodes
+
+    @property
+    def suppress_output(self):
+        return getattr(self.fallback, 'suppress_output', False)
+
+    @suppress_output.setter
+    def suppress_output(self, value):
+        self.fallback.suppress_output = value
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def getAction(self, gameState):
+        t0 = time.perf_counter()
+        table_stats = self._table_stats
+        table_stats.begin()
+        action = self.table.lookup(gameState)
+        self.lookup_time += time.perf_counter() - t0
+        if action is not None and action in gameState.getLegalActions(self.index):
+            self.hits += 1
+            self._stats = table_stats
+            return table_stats.finish(action, 'table')
+        self.misses += 1
+        action = self.fallback.getAction(gameState)
+        self._stats = getattr(self.fallback, 'stats', None)
+        if self._stats is None:
+            self._stats = table_stats
+            table_stats.finish(action)
+        return action
+
+
+def evaluate_table(table, layout_rows, games=10, depth=None, epsilon=0.2, seed=10_000, max_ticks=None,
+                   workers=None):
+    """Cobertura y acuerdo de la tabla sobre partidas no vistas (otras semillas).
+
+    - coverage: fracción de posiciones de prueba cuya clave está en la tabla.
+    - agreement: de las cubiertas, fracción en la que la tabla coincide con
+      el maestro (a ``depth``, por defecto la de la tabla).
+    """
+    depth = depth or table.meta.get('depth', 3)
+    samples = collect_samples(layout_rows, games, depth, epsilon=epsilon, seed=seed, max_ticks=max_ticks,
+                              symmetry=table.meta.get('symmetry', SYM_NONE), workers=workers)
+    covered = agree = 0
+    for key, action in samples:
+        i = table.find(key)
+        if i >= 0:
+            covered += 1
+            agree += int(table.actions[i]) == action
+    total = len(samples)
+    return {
+        'positions': total,
+        'distinct': len({key for key, _ in samples}),
+        'covered': covered,
+        'coverage': covered / total if total else 0.0,
+        'agreement': agree / covered if covered else 0.0,
+        'table_size': len(table),
+    }
+
+
+if __name__ == '__main__':
+    from ..gameClass.scenarios import level1, level2, level3, level4
+
+    parser = argparse.ArgumentParser(description='Destila una tabla de políticas de Expectimax para un nivel')
+    parser.add_argument('--level', '-l', type=int, default=1, choices=[1, 2, 3, 4])
+    parser.add_argument('--out', '-o', default=None, help='ruta de salida (por defecto policies/levelN)')
+    parser.add_argument('--games', '-g', type=int, default=40)
+    parser.add_argument('--depth', '-d', type=int, default=3)
+    parser.add_argument('--epsilon', type=float, default=0.2)
+    parser.add_argument('--eval-games', type=int, default=10)
+    parser.add_argument('--max-ticks', type=int, default=None)
+    parser.add_argument('--workers', '-w', type=int, default=None)
+    args = parser.parse_args()
+
+    levels = {1: level1.get_level1, 2: level2.get_level2, 3: level3.get_level3, 4: level4.get_level4}
+    rows = levels[args.level]()
+    out = args.out or os.path.join('policies', f'level{args.level}')
+    table = build_policy_table(rows, out, games=args.games, depth=args.depth, epsilon=args.epsilon,
+                               max_ticks=args.max_ticks, workers=args.workers)
+    if args.eval_games > 0:
+        print(evaluate_table(table, rows, games=args.eval_games, max_ticks=args.max_ticks, workers=args.workers))
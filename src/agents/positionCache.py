@@ -0,0 +1,236 @@
+"""Caché persistente de decisiones en sqlite, compartida entre procesos y ejecuciones.
+
+Las campañas de experimentos vuelven a buscar en cada ejecución las mismas
+posiciones del principio de la partida. ``PositionCache`` guarda en un
+fichero sqlite la jugada de cada búsqueda completa (sin corte por tiempo) y
+la devuelve en la siguiente ejecución, en este proceso o en cualquier otro:
+
+- Clave: clave canónica del estado (``canonical.canonical_key``, reloj
+  incluido), layout del mapa, agente (clase y opciones que cambian el
+  resultado), profundidad y versión. Las simetrías son las de la caché
+  limitadas a las que declara el agente (``agent_symmetry``: ninguna si no
+  tiene ``key_symmetry``). Las jugadas se guardan en el marco canónico y se
+  reflejan al leer.
+- Versión: hash del código del motor, la evaluación y el módulo del agente
+  (``evaluation_version``). Al cambiar cualquiera de ellos las filas viejas
+  dejan de leerse solas; ``purge_stale`` las borra.
+- Concurrencia: modo WAL y ``timeout`` de sqlite, así que varios procesos
+  pueden leer y escribir el mismo fichero.
+
+Los agentes lo usan si se les asigna (``agent.position_cache =
+PositionCache('cache/positions.sqlite')``)::
+
+    python -m src.agents.positionCache cache/positions.sqlite --purge
+"""
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import glob
+import argparse
+import threading
+
+from ..gameClass.arrayState import ACTION_INDEX, ACTIONS, StaticLayout
+from ..gameClass.canonical import SYM_NONE, SYM_ALL, canonical_key, mirror_action
+from ..gameClass.serialization import layout_id
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código del que dependen todos los resultados: todo ``gameClass`` (dinámica,
+# evaluación, claves canónicas), la búsqueda, el modelo de enemigos y la caché
+# de evaluaciones
+ENGINE_FILES = tuple(sorted(
+    os.path.relpath(path, _ROOT) for path in glob.glob(os.path.join(_ROOT, 'gameClass', '*.py'))
+)) + (
+    os.path.join('agents', 'searchCore.py'),
+    os.path.join('agents', 'enemyModel.py'),
+    os.path.join('agents', 'evalCache.py'),
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    key INTEGER NOT NULL,
+    layout TEXT NOT NULL,
+    agent TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    action INTEGER NOT NULL,
+    value REAL,
+    nodes INTEGER,
+    created REAL,
+    PRIMARY KEY (key, layout, agent, depth, version)
+) WITHOUT ROWID
+"""
+
+_VERSIONS = {}
+
+
+def evaluation_version(agent_class=None):
+    """Hash corto del código de ``ENGINE_FILES`` y del módulo de ``agent_class``."""
+    files = [os.path.join(_ROOT, f) for f in ENGINE_FILES]
+    if agent_class is not None:
+        module = sys.modules.get(agent_class.__module__)
+        path = getattr(module, '__file__', None)
+        if path:
+            files.append(os.path.abspath(path))
+    cache_key = tuple(files)
+    version = _VERSIONS.get(cache_key)
+    if version is None:
+        h = hashlib.sha1()
+        for path in files:
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        version = _VERSIONS[cache_key] = h.hexdigest()[:16]
+    return version
+
+
+def agent_signature(agent):
+    """Nombre del agente en la caché: clase más las opciones que cambian la jugada."""
+    name = type(agent).__name__
+    if getattr(agent, 'joint_chance', False):
+        name += f":joint{getattr(agent, 'max_joint_profiles', '')}"
+    return name
+
+
+def agent_symmetry(agent):
+    """Simetrías que no cambian las jugadas del agente (atributo ``key_symmetry``, por defecto ``SYM_NONE``)."""
+    return getattr(agent, 'key_symmetry', SYM_NONE)
+
+
+def _signed(key):
+    """uint64 -> int64 (sqlite guarda enteros con signo)."""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+class PositionCache:
+    """Fichero sqlite ``(clave, layout, agente, profundidad, versión) -> jugada``.
+
+    ``symmetry`` es el máximo de simetrías de las claves; ``get``/``put``
+    reciben las del agente (``agent_symmetry``) y usan la intersección.
+    """
+    def __init__(self, path, symmetry=SYM_ALL, timeout=30.0):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.symmetry = symmetry
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._layout = None
+        self._layout_key = None
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def _key(self, gameState, symmetry=SYM_ALL):
+        layout = self._layout
+        if layout is None or layout.signature != StaticLayout.from_state(gameState).signature:
+            layout = StaticLayout.from_state(gameState)
+            self._layout = layout
+            self._layout_key = layout_id(layout).hex()
+        key, mirrored = canonical_key(gameState, 0, self.symmetry & symmetry, layout)
+        return _signed(key), mirrored, self._layout_key
+
+    def get(self, gameState, agent_name, depth, version, symmetry=SYM_ALL):
+        """Jugada guardada para el jugador en ``gameState`` (marco real) o None."""
+        key, mirrored, layout = self._key(gameState, symmetry)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT action FROM positions WHERE key=? AND layout=? AND agent=? AND depth=? AND version=?',
+                (key, layout, agent_name, int(depth), version)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        action = ACTIONS[int(row[0])]
+        return mirror_action(action) if mirrored else action
+
+    def put(self, gameState, agent_name, depth, version, action, value=None, nodes=None, symmetry=SYM_ALL):
+        key, mirrored, layout = self._key(gameState, symmetry)
+        if mirrored:
+            action = mirror_action(action)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, layout, agent_name, int(depth), version, ACTION_INDEX[action],
+                 None if value is None else float(value), nodes, time.time()))
+            self._conn.commit()
+        self.stores += 1
+
+    def purge_stale(self, versions):
+        """Borra las filas cuya versión no está en ``versions``; devuelve cuántas."""
+        versions = list(versions)
+        marks = ','.join('?' * len(versions))
+        with self._lock:
+            cur = self._conn.execute(f'DELETE FROM positions WHERE version NOT IN ({marks})', versions)
+            self._conn.commit()
+        return cur.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM positions').fetchone()[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'stores': self.stores,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def cached_move(agent, gameState):
+    """Jugada de la caché persistente del agente (atributo ``position_cache``) o None."""
+    cache = getattr(agent, 'position_cache', None)
+    if cache is None or getattr(agent, 'index', 0) != 0:
+        return None
+    action = cache.get(gameState, agent_signature(agent), agent.depth, evaluation_version(type(agent)),
+                       symmetry=agent_symmetry(agent))
+    if action is None or action not in gameState.getLegalActions(0):
+        return None
+    return action
+
+
+def store_move(agent, gameState, action, value=None):
+    """Guarda la jugada de una búsqueda completa; no hace nada si hubo corte por tiempo."""
+    cache = getattr(agent, 'position_cache', None)
+    if cache is None or action is None or getattr(agent, 'index', 0) != 0:
+        return
+    is_time_exceeded = getattr(agent, 'is_time_exceeded', None)
+    if is_time_exceeded is not None and is_time_exceeded():
+        return
+    stats = getattr(agent, 'stats', None)
+    nodes = stats.nodes if stats is not None else None
+    cache.put(gameState, agent_signature(agent), agent.depth, evaluation_version(type(agent)), action,
+              value=value, nodes=nodes, symmetry=agent_symmetry(agent))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Estado de la caché persistente de posiciones')
+    parser.add_argument('path')
+    parser.add_argument('--purge', action='store_true',
+                        help='borra las filas de versiones que ya no corresponden al código actual')
+    args = parser.parse_args()
+
+    from . import minimax, expectimax, jitExpectimax
+    cache = PositionCache(args.path)
+    if args.purge:
+        agents = (minimax.MinimaxAgent, minimax.AlphaBetaAgent, minimax.ParallelAlphaBetaAgent,
+                  expectimax.ExpectimaxAgent, expectimax.ParallelExpectimaxAgent,
+                  jitExpectimax.JitExpectimaxAgent)
+        print(f"{cache.purge_stale({evaluation_version(a) for a in agents})} filas obsoletas borradas")
+    with cache._lock:
+        rows = cache._conn.execute(
+            'SELECT agent, depth, version, COUNT(*) FROM positions GROUP BY agent, depth, version').fetchall()
+    for agent, depth, version, count in rows:
+        print(f"{agent:32s} depth={depth:<3d} version={version} {count} posiciones")
@@ -5,10 +5,12 @@ class ReflexTankAgent:
     """
     Un agente para el jugador que toma desiciones basadas en una función de evaluación simple.
     Se contruye sobre el parámetro 'script_type', cuyos valores son: 'offensive' o 'defensive'.
+    'rng' es un generador propio (random.Random) para desempatar; por defecto, el módulo random.
     """
-    def __init__(self,script_type='offensive'):
+    def __init__(self,script_type='offensive', rng=None):
         self.agent_index = 0  # Índice del agente jugador
         self.script_type = script_type
+        self.rng = rng if rng is not None else random
         
     
     def getAction(self, game_state):
@@ -23,14 +25,14 @@ class ReflexTankAgent:
             score = self.run_offensiveFunction(game_state, legal_actions)
             bestScore = max(score)
             bestIndices = [index for index in range(len(score)) if score[index] == bestScore]
-            chosenIndex = random.choice(bestIndices) # Pick randomly among the best
+            chosenIndex = self.rng.choice(bestIndices) # Pick randomly among the best
             return legal_actions[chosenIndex]
         elif self.script_type == 'defensive':
             score = self.run_defensive_script(game_state, legal_actions)
             # Seleccionar la mejor acción igual que en ofensiva
             bestScore = max(score) if score else float('-inf')
             bestIndices = [index for index in range(len(score)) if score[index] == bestScore]
-            chosenIndex = random.choice(bestIndices) if bestIndices else 0
+            chosenIndex = self.rng.choice(bestIndices) if bestIndices else 0
             return legal_actions[chosenIndex]
         else:
             return self.run_random_script(legal_actions)
@@ -198,6 +200,6 @@ class ReflexTankAgent:
         return score
 
     def run_random_script(self, legal_actions):
-        return random.choice(legal_actions)
+        return self.rng.choice(legal_actions)
         
 
@@ -0,0 +1,380 @@
+"""Motor de búsqueda común (sin recursión) para los agentes sobre BattleCityState.
+
+``SearchCore`` recorre el árbol con una pila explícita de marcos. El
+comportamiento de cada nodo lo decide una política (``MaxNode``,
+``MinNode`` o ``ChanceNode``) y el resto se configura con ganchos:
+
+- ``should_stop()``: corte por tiempo; se consulta al entrar en cada nodo y
+  antes de generar cada sucesor.
+- ``count_node()``: instrumentación, se llama una vez por nodo visitado.
+- ``stats``: ``SearchStats`` del agente; cada llamada a ``search`` cuenta
+  nodos, hojas evaluadas, sucesores, cortes y aciertos de la tabla en un
+  contador propio y lo suma a ``stats`` al terminar (con lock, así que
+  varios hilos pueden compartir el motor).
+- ``evaluate(state)``: evaluación de hojas (por defecto ``evaluate_state``).
+- ``probabilities(state, agent, actions)``: distribución de los nodos de azar.
+- ``order_actions(state, agent, actions)``: ordenación de jugadas.
+- ``pruning``: poda alpha-beta en los nodos MAX/MIN.
+- ``joint_chance``: si el oponente es de azar, todos los enemigos de un
+  turno forman un único nodo de azar conjunto (ver ``JointChanceNode``).
+- ``transposition``: objeto con ``probe(state, agent, depth, max_depth,
+  alpha, beta)`` (valor o None) y ``store(state, agent, depth, max_depth,
+  value, alpha, beta)``; no se guarda nada una vez que ``should_stop`` ha
+  saltado (los valores de un subárbol cortado por tiempo no son fiables).
+
+La profundidad se cuenta en turnos completos: aumenta al volver a
+``depth_agent``. ``num_agents`` fijo reproduce a Minimax/AlphaBeta (que usan
+el número de agentes de la raíz); con ``None`` se usa el del estado actual,
+como Expectimax.
+"""
+import time
+import random
+import threading
+
+from .searchStats import COUNTERS
+
+MAX, MIN, CHANCE = 'max', 'min', 'chance'
+_INF = float('inf')
+
+
+class MaxNode:
+    """Nodo MAX: se queda con el mayor valor (semántica de ``max``)."""
+    kind = MAX
+
+    @staticmethod
+    def start(core, frame):
+        frame.value = -_INF
+
+    @staticmethod
+    def combine(core, frame, action, value):
+        if value > frame.value:
+            frame.value = value
+        if core.pruning:
+            if frame.value > frame.alpha:
+                frame.alpha = frame.value
+            return frame.beta < frame.alpha
+        return False
+
+
+class MinNode:
+    """Nodo MIN: se queda con el menor valor (semántica de ``min``)."""
+    kind = MIN
+
+    @staticmethod
+    def start(core, frame):
+        frame.value = _INF
+
+    @staticmethod
+    def combine(core, frame, action, value):
+        if value < frame.value:
+            frame.value = value
+        if core.pruning:
+            if frame.value < frame.beta:
+                frame.beta = frame.value
+            return frame.beta <= frame.alpha
+        return False
+
+
+class ChanceNode:
+    """Nodo de azar: suma de valores ponderados por ``core.probabilities``."""
+    kind = CHANCE
+
+    @staticmethod
+    def start(core, frame):
+        frame.value = 0.0
+        frame.probs = core.probabilities(frame.state, frame.agent, frame.actions)
+
+    @staticmethod
+    def combine(core, frame, action, value):
+        frame.value += frame.probs.get(action, 0.0) * value
+        return False
+
+
+class JointChanceNode:
+    """Nodo de azar conjunto: cada "acción" es un perfil con una acción por
+    enemigo y su probabilidad es el producto de las distribuciones de cada uno
+    (los enemigos mueven a la vez, el tiempo solo avanza tras el último).
+    ``frame.probs`` se rellena en ``SearchCore._open_joint``."""
+    kind = CHANCE
+
+    @staticmethod
+    def start(core, frame):
+        frame.value = 0.0
+
+    @staticmethod
+    def combine(core, frame, action, value):
+        frame.value += frame.probs[action] * value
+        return False
+
+
+POLICIES = {MAX: MaxNode, MIN: MinNode, CHANCE: ChanceNode}
+
+
+class _Frame:
+    __slots__ = ('state', 'agent', 'depth', 'next_agent', 'next_depth', 'actions', 'cursor',
+                 'policy', 'value', 'probs', 'alpha', 'beta', 'alpha0', 'beta0', 'joint')
+
+
+def _evaluate_state(state):
+    return state.evaluate_state()
+
+
+def _never():
+    return False
+
+
+def _no_count():
+    pass
+
+
+class _Counts:
+    """Contadores de una llamada a ``search`` (se suman a ``SearchStats`` al final)."""
+    __slots__ = COUNTERS
+
+    def __init__(self):
+        self.nodes = self.evaluations = self.expansions = self.cutoffs = self.tt_hits = 0
+
+
+class SearchCore:
+    """Búsqueda con pila explícita y políticas de nodo configurables.
+
+    - max_agent: índice del agente que maximiza.
+    - opponent: política del resto de agentes (MIN o CHANCE).
+    - depth_agent: al volver a este agente se completa un turno.
+    - num_agents: número fijo de agentes o None para leerlo de cada estado.
+    - evaluate_if_no_actions: evaluar los nodos sin acciones legales en vez
+      de devolver el valor inicial de la política (±inf).
+    - joint_chance: agrupar a los enemigos en un nodo de azar conjunto; si
+      hay más de ``max_joint_profiles`` perfiles se toma una muestra de ese
+      tamaño con ``rng`` (el generador dado o ``random.Random(seed)``; no toca
+      el ``random`` global).
+    """
+    def __init__(self, max_agent=0, opponent=MIN, depth_agent=0, num_agents=None,
+                 should_stop=None, count_node=None, evaluate=None, probabilities=None,
+                 order_actions=None, pruning=False, transposition=None,
+                 evaluate_if_no_actions=False, joint_chance=False, max_joint_profiles=256,
+                 seed=None, rng=None, stats=None):
+        self.max_agent = max_agent
+        self.opponent = POLICIES[opponent] if isinstance(opponent, str) else opponent
+        self.depth_agent = depth_agent
+        self.num_agents = num_agents
+        self.should_stop = should_stop or _never
+        self.count_node = count_node or _no_count
+        self.evaluate = evaluate or _evaluate_state
+        self.probabilities = probabilities
+        self.order_actions = order_actions
+        self.pruning = pruning
+        self.transposition = transposition
+        self.evaluate_if_no_actions = evaluate_if_no_actions
+        self.joint_chance = joint_chance
+        self.max_joint_profiles = max_joint_profiles
+        self.rng = rng if rng is not None else random.Random(seed)
+        self.stats = stats
+        self._stats_lock = threading.Lock()
+
+    def configure(self, **options):
+        """Actualiza opciones entre decisiones (p.ej. el agente raíz)."""
+        for key, value in options.items():
+            if key == 'opponent' and isinstance(value, str):
+                value = POLICIES[value]
+            setattr(self, key, value)
+        return self
+
+    def policy_for(self, agent_index):
+        return MaxNode if agent_index == self.max_agent else self.opponent
+
+    def _open(self, state, agent, depth, max_depth, alpha, beta, counts):
+        """Entra en un nodo: devuelve ``(valor, None)`` si es hoja o ``(None, marco)``."""
+        self.count_node()
+        counts.nodes += 1
+        if depth >= max_depth or self.should_stop() or state.isTerminal():
+            counts.evaluations += 1
+            return self.evaluate(state), None
+        n = self.num_agents
+        if n is None:
+            n = state.getNumAgents()
+            if n <= 0:
+                counts.evaluations += 1
+                return self.evaluate(state), None
+        tt = self.transposition
+        if tt is not None:
+            hit = tt.probe(state, agent, depth, max_depth, alpha, beta)
+            if hit is not None:
+                counts.tt_hits += 1
+                counts.cutoffs += 1
+                return hit, None
+        if self.joint_chance and agent != self.max_agent and self.opponent.kind == CHANCE:
+            return self._open_joint(state, agent, depth, n, alpha, beta)
+        actions = state.getLegalActions(agent)
+        if self.order_actions is not None:
+            actions = self.order_actions(state, agent, actions)
+        if not actions and self.evaluate_if_no_actions:
+            counts.evaluations += 1
+            return self.evaluate(state), None
+
+        frame = _Frame()
+        frame.state = state
+        frame.agent = agent
+        frame.depth = depth
+        frame.next_agent = (agent + 1) % n
+        frame.next_depth = depth + 1 if frame.next_agent == self.depth_agent else depth
+        frame.actions = actions
+        frame.cursor = 0
+        frame.alpha = frame.alpha0 = alpha
+        frame.beta = frame.beta0 = beta
+        frame.policy = self.policy_for(agent)
+        frame.joint = False
+        frame.policy.start(self, frame)
+        return None, frame
+
+    def _open_joint(self, state, agent, depth, n, alpha, beta):
+        """Nodo de azar conjunto de los agentes ``agent`` .. ``n - 1``.
+
+        Las distribuciones y la legalidad se calculan sobre el estado antes de
+        que muevan los enemigos. Las acciones con probabilidad 0 no generan
+        perfil y un enemigo sin acciones legales no actúa (``None``).
+        """
+        factors = []
+        for index in range(agent, n):
+            actions = state.getLegalActions(index)
+            if not actions:
+                factors.append([(None, 1.0)])
+                continue
+            probs = self.probabilities(state, index, actions)
+            support = [(a, probs.get(a, 0.0)) for a in actions if probs.get(a, 0.0) > 0.0]
+            if not support:
+                support = [(a, 1.0 / len(actions)) for a in actions]
+            factors.append(support)
+
+        total = 1
+        for support in factors:
+            total *= len(support)
+        joint = {}
+        if total <= self.max_joint_profiles:
+            profiles = [((), 1.0)]
+            for support in factors:
+                profiles = [(p + (a,), w * pa) for p, w in profiles for a, pa in support]
+            for profile, weight in profiles:
+                joint[profile] = weight
+        else:
+            # Muestreo i.i.d. del perfil conjunto; los repetidos se agregan
+            rng = self.rng
+            k = self.max_joint_profiles
+            for _ in range(k):
+                profile = tuple(rng.choices([a for a, _ in s], weights=[p for _, p in s])[0] for s in factors)
+                joint[profile] = joint.get(profile, 0.0) + 1.0 / k
+
+        frame = _Frame()
+        frame.state = state
+        frame.agent = agent
+        frame.depth = depth
+        frame.next_agent = 0
+        # El turno se completa si ``depth_agent`` está entre los que ya han movido
+        frame.next_depth = depth + 1 if self.depth_agent == 0 or agent < self.depth_agent < n else depth
+        frame.actions = list(joint)
+        frame.probs = joint
+        frame.cursor = 0
+        frame.alpha = frame.alpha0 = alpha
+        frame.beta = frame.beta0 = beta
+        frame.policy = JointChanceNode
+        frame.joint = True
+        frame.policy.start(self, frame)
+        return None, frame
+
+    def search(self, state, agent_index, depth, max_depth, alpha=-_INF, beta=_INF):
+        """Valor del nodo ``state`` en el que le toca mover a ``agent_index``."""
+        counts = _Counts()
+        try:
+            return self._search(state, agent_index, depth, max_depth, alpha, beta, counts)
+        finally:
+            if self.stats is not None:
+                with self._stats_lock:
+                    self.stats.add(counts)
+
+    def _search(self, state, agent_index, depth, max_depth, alpha, beta, counts):
+        should_stop = self.should_stop
+        tt = self.transposition
+        stack = []
+        value, frame = self._open(state, agent_index, depth, max_depth, alpha, beta, counts)
+        if frame is None:
+            return value
+        stack.append(frame)
+        while True:
+            frame = stack[-1]
+            if frame.cursor < len(frame.actions) and not should_stop():
+                action = frame.actions[frame.cursor]
+                frame.cursor += 1
+                if frame.joint:
+                    succ = frame.state.getJointSuccessor(frame.agent, action)
+                else:
+                    succ = frame.state.getSuccessor(frame.agent, action)
+                counts.expansions += 1
+                value, child = self._open(succ, frame.next_agent, frame.next_depth, max_depth,
+                                          frame.alpha, frame.beta, counts)
+                if child is not None:
+                    stack.append(child)
+                    continue
+            else:
+                value = frame.value
+                stack.pop()
+                if tt is not None and not should_stop():
+                    tt.store(frame.state, frame.agent, frame.depth, max_depth, value, frame.alpha0, frame.beta0)
+                if not stack:
+                    return value
+                frame = stack[-1]
+                action = frame.actions[frame.cursor - 1]
+
+            # Propagar el valor del hijo; un corte cierra el marco de inmediato
+            while frame.policy.combine(self, frame, action, value):
+                counts.cutoffs += 1
+                value = frame.value
+                stack.pop()
+                if tt is not None and not should_stop():
+                    tt.store(frame.state, frame.agent, frame.depth, max_depth, value, frame.alpha0, frame.beta0)
+                if not stack:
+                    return value
+                frame = stack[-1]
+                action = frame.actions[frame.cursor - 1]
+
+
+def reflex_fallback(agent, gameState, nodes):
+    """Acción de ``ReflexTankAgent`` (ofensivo o defensivo al 50%) cuando la
+    búsqueda se queda sin tiempo; mismo mensaje ``[FALLBACK]`` en todos los agentes.
+    Usa el generador ``agent.rng`` si el agente tiene uno (``random`` global si no),
+    suma uno a ``agent.fallback_count`` y cierra ``agent.stats`` con motivo ``'time'``."""
+    from .reflexAgent import ReflexTankAgent
+    agent.fallback_count = getattr(agent, 'fallback_count', 0) + 1
+    rng = getattr(agent, 'rng', None) or random
+    rtype = 'offensive' if rng.random() < 0.5 else 'defensive'
+    reflex = ReflexTankAgent(script_type=rtype, rng=rng)
+    try:
+        elapsed = time.time() - agent.start_time if agent.start_time else 0.0
+        print(f"[FALLBACK] {agent.__class__.__name__} exceeded time after {elapsed:.2f}s, nodes={nodes} -> ReflexTankAgent({rtype})")
+    except Exception:
+        print(f"[FALLBACK] {agent.__class__.__name__} exceeded time -> ReflexTankAgent({rtype})")
+    action = reflex.getAction(gameState)
+    stats = getattr(agent, 'stats', None)
+    if stats is not None:
+        stats.finish(action, 'fallback', fallback='time')
+    return action
+
+
+def pre_search_move(agent, gameState, allow_loss=True):
+    """Jugada que no hace falta buscar: apertura del libro (``opening_book``),
+    final resuelto en la tabla de finales (``tablebase``; con
+    ``allow_loss=False`` solo victorias forzadas) o posición ya buscada en la
+    caché persistente (``position_cache``), en ese orden. Si hay una, cierra
+    ``agent.stats`` con su origen y la devuelve; si no, devuelve None."""
+    from .openingBook import book_move
+    from .tablebase import tablebase_move
+    from .positionCache import cached_move
+    move = book_move(agent, gameState)
+    if move is not None:
+        return agent.stats.finish(move, 'book')
+    move = tablebase_move(agent, gameState, allow_loss=allow_loss)
+    if move is not None:
+        return agent.stats.finish(move, 'tablebase')
+    move = cached_move(agent, gameState)
+    if move is not None:
+        return agent.stats.finish(move, 'cache')
+    return None
@@ -0,0 +1,80 @@
+"""Estadísticas de búsqueda por decisión, comunes a todos los agentes.
+
+Cada agente de búsqueda tiene un ``stats`` (``SearchStats``) que rellena en
+cada ``getAction``: ``begin()`` pone los contadores a cero y ``finish(action,
+source)`` fija el tiempo y de dónde salió la jugada. Experimentos
+(``run_single_game``), la interfaz (``visual_test.py`` y el menú) y los
+benchmarks leen siempre ``agent.stats``, sin adivinar atributos por agente.
+
+Campos:
+
+- nodes: nodos visitados (hojas incluidas).
+- evaluations: hojas evaluadas (llamadas a la función de evaluación).
+- expansions: sucesores generados.
+- depth: profundidad completada, en turnos completos como ``depth`` del
+  agente (0 si ninguna iteración terminó a tiempo).
+- cutoffs: cortes alpha-beta (más los cortes por tabla de transposición).
+- tt_hits: aciertos en la tabla de transposición.
+- elapsed: segundos de la decisión.
+- source: ``SOURCES``; ``'search'`` salvo que la jugada venga del libro, la
+  tabla de finales, la caché de posiciones, la tabla de políticas, el
+  reflejo (``'fallback'``) o no haya jugadas (``'no_moves'``).
+- fallback: motivo del reflejo (``'time'``) o None.
+
+Los contadores son enteros en atributos con ``__slots__``: ``SearchCore`` y
+los kernels de numba cuentan en variables propias de cada búsqueda y los
+suman al terminar con ``add`` (bajo lock en los agentes con hilos).
+"""
+import time
+
+SOURCES = ('search', 'book', 'tablebase', 'cache', 'table', 'fallback', 'no_moves')
+SOURCE_INDEX = {name: i for i, name in enumerate(SOURCES)}
+COUNTERS = ('nodes', 'evaluations', 'expansions', 'cutoffs', 'tt_hits')
+
+
+class SearchStats:
+    """Contadores de la última decisión de un agente."""
+    __slots__ = COUNTERS + ('depth', 'elapsed', 'source', 'fallback', '_start')
+
+    def __init__(self):
+        self.begin()
+
+    def begin(self):
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        self.depth = 0
+        self.elapsed = 0.0
+        self.source = 'search'
+        self.fallback = None
+        self._start = time.perf_counter()
+
+    def add(self, other):
+        """Suma los contadores de ``other`` (otra búsqueda de la misma decisión)."""
+        self.nodes += other.nodes
+        self.evaluations += other.evaluations
+        self.expansions += other.expansions
+        self.cutoffs += other.cutoffs
+        self.tt_hits += other.tt_hits
+
+    def add_counters(self, counts):
+        """Como ``add`` pero desde un ``dict`` (p.ej. el de un trabajador en otro proceso)."""
+        for name in COUNTERS:
+            setattr(self, name, getattr(self, name) + counts.get(name, 0))
+
+    def finish(self, action, source='search', fallback=None):
+        """Cierra la decisión y devuelve ``action`` (para ``return stats.finish(...)``)."""
+        self.elapsed = time.perf_counter() - self._start
+        self.source = source
+        self.fallback = fallback
+        return action
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in COUNTERS + ('depth', 'elapsed', 'source', 'fallback')}
+
+    def summary(self):
+        """Una línea para la consola o la interfaz."""
+        text = (f"nodos={self.nodes} evals={self.evaluations} prof={self.depth} "
+                f"cortes={self.cutoffs} tt={self.tt_hits} {self.elapsed:.2f}s")
+        if self.source != 'search':
+            text += f" [{self.source}{': ' + self.fallback if self.fallback else ''}]"
+        return text
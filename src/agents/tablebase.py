@@ -0,0 +1,572 @@
+"""Tablas de finales para el 1 contra 1 sin reservas enemigas.
+
+Al final de la partida es habitual quedarse con el jugador contra un único
+enemigo y sin reservas del equipo B; la búsqueda gasta ahí todo su tiempo en
+posiciones que se pueden resolver de antemano. Este módulo enumera, para un
+mapa, todas las configuraciones "tranquilas" (sin balas en vuelo) de ese
+final y las resuelve con análisis retrógrado por rondas:
+
+- Clave: reservas del jugador (0 o 1), salud de ambos tanques (1..3),
+  casilla de cada tanque y una máscara de ladrillos relevantes (los que
+  rodean a la base por defecto) destruidos o intactos. La dirección de los
+  tanques no influye en la dinámica y no forma parte de la clave. El resto de
+  paredes tiene que estar como en el estado de referencia.
+- Ronda K: cada entrada sin resolver se busca un turno (jugador y enemigo)
+  hasta llegar a estados de la tabla, cuyo resultado se toma de la ronda
+  anterior. Mientras haya balas en vuelo (o paredes fuera del modelo) se
+  sigue buscando hasta ``bullet_horizon`` turnos; más allá la hoja es
+  desconocida. Con eso cada ronda extiende en un turno los resultados
+  forzados y el proceso acaba cuando una ronda no resuelve nada nuevo.
+- Resultado: victoria o derrota forzada (el enemigo minimiza, como en
+  ``AlphaBetaAgent``) en a lo sumo ``d`` turnos y la mejor jugada; el resto
+  queda desconocido. Las hojas desconocidas nunca producen una victoria o
+  derrota falsa, solo pueden dejar entradas sin resolver.
+
+La tabla es un ``.npy`` de ``uint16`` (una palabra por entrada) que se abre
+con ``mmap`` y un ``.json`` con el modelo del mapa; ``EndgameTablebase.probe``
+calcula el índice directamente a partir del estado (O(1) en la tabla). El
+reloj de la partida se ignora al resolver: ``probe`` solo devuelve un
+resultado si quedan al menos ``d`` ticks.
+
+La generación es un trabajo por lotes que reparte cada ronda entre procesos::
+
+    python -m src.agents.tablebase --level 1 --workers 4
+"""
+import os
+import json
+import time
+import argparse
+import concurrent.futures
+
+import numpy as np
+from numba import njit
+
+from ..gameClass.arrayState import (
+    ACTIONS, NUM_ACTIONS, StaticLayout, encode_state,
+    H_NUM_B, H_RESERVES_A, H_RESERVES_B, H_TIME, H_TIME_LIMIT, H_BASE_DESTROYED, H_NUM_BULLETS,
+    TANK_OFFSET, TANK_FIELDS, T_X, T_Y, T_HEALTH, T_ALIVE, T_SPAWN_X, T_SPAWN_Y,
+    WALL_OFFSET, WALL_FIELDS, W_HEALTH, W_DESTROYED,
+)
+from ..gameClass.jitEngine import is_win, is_lose, legal_actions, successor, TANK_HEALTH
+
+# Palabra de cada entrada: jugada (4 bits) | resultado (2 bits) | distancia en turnos (10 bits)
+TB_UNKNOWN, TB_WIN, TB_LOSS, TB_INVALID = 0, 1, 2, 3
+TB_NO_MOVE = 15
+MAX_DISTANCE = 1023
+MAX_RESERVES_A = 1
+_BIG = 1 << 20
+_SOLVE_TIME_LIMIT = 1 << 30
+
+C_NODES, C_LOOKUPS = 0, 1
+NUM_COUNTERS = 2
+
+_ENTER, _EXPAND, _RETURN = 0, 1, 2
+
+
+@njit(cache=True)
+def tb_pack(outcome, distance, move):
+    return np.uint16((move & 0xF) | (outcome << 4) | (min(distance, MAX_DISTANCE) << 6))
+
+
+@njit(cache=True)
+def tb_outcome(code):
+    return (np.int64(code) >> 4) & 0x3
+
+
+@njit(cache=True)
+def tb_distance(code):
+    return np.int64(code) >> 6
+
+
+@njit(cache=True)
+def tb_move(code):
+    return np.int64(code) & 0xF
+
+
+@njit(cache=True)
+def entry_index(s, cell_index, relevant_bit, ref_walls, spawn_x, spawn_y, k, r):
+    """Índice de ``s`` en la tabla o -1 si el estado no es un final tabulado."""
+    if s[H_NUM_B] != 1 or s[H_RESERVES_B] != 0 or s[H_NUM_BULLETS] != 0 or s[H_BASE_DESTROYED] != 0:
+        return -1
+    res_a = s[H_RESERVES_A]
+    if res_a < 0 or res_a > MAX_RESERVES_A:
+        return -1
+    pa = TANK_OFFSET
+    pb = TANK_OFFSET + TANK_FIELDS
+    if not s[pa + T_ALIVE] or not s[pb + T_ALIVE]:
+        return -1
+    ha = s[pa + T_HEALTH]
+    hb = s[pb + T_HEALTH]
+    if ha < 1 or ha > TANK_HEALTH or hb < 1 or hb > TANK_HEALTH:
+        return -1
+    if s[pa + T_SPAWN_X] != spawn_x or s[pa + T_SPAWN_Y] != spawn_y:
+        return -1
+    mask = 0
+    for w in range(ref_walls.shape[0]):
+        off = WALL_OFFSET + w * WALL_FIELDS
+        if s[off + W_HEALTH] == ref_walls[w, 0] and s[off + W_DESTROYED] == ref_walls[w, 1]:
+            continue
+        bit = relevant_bit[w]
+        if bit < 0 or s[off + W_DESTROYED] == 0 or s[off + W_HEALTH] != 0:
+            return -1
+        mask |= 1 << bit
+    ca = cell_index[s[pa + T_Y], s[pa + T_X]]
+    cb = cell_index[s[pb + T_Y], s[pb + T_X]]
+    if ca < 0 or cb < 0:
+        return -1
+    return ((((res_a * 3 + ha - 1) * 3 + hb - 1) * k + ca) * k + cb) * (1 << r) + mask
+
+
+@njit(cache=True)
+def decode_entry(index, template, out, cells, relevant, cell_wall, k, r):
+    """Rellena ``out`` con el estado de la entrada ``index``; False si no es válida."""
+    mask = index % (1 << r)
+    index //= (1 << r)
+    cb = index % k
+    index //= k
+    ca = index % k
+    index //= k
+    hb = index % 3 + 1
+    index //= 3
+    ha = index % 3 + 1
+    res_a = index // 3
+    if ca == cb:
+        return False
+    # Una casilla de un ladrillo relevante solo está libre si está destruido
+    for c in (ca, cb):
+        b = cell_wall[c]
+        if b >= 0 and (mask >> b) & 1 == 0:
+            return False
+    out[:] = template
+    out[H_RESERVES_A] = res_a
+    pa = TANK_OFFSET
+    pb = TANK_OFFSET + TANK_FIELDS
+    out[pa + T_X] = cells[ca, 0]
+    out[pa + T_Y] = cells[ca, 1]
+    out[pa + T_HEALTH] = ha
+    out[pb + T_X] = cells[cb, 0]
+    out[pb + T_Y] = cells[cb, 1]
+    out[pb + T_HEALTH] = hb
+    for b in range(r):
+        if (mask >> b) & 1:
+            off = WALL_OFFSET + relevant[b] * WALL_FIELDS
+            out[off + W_HEALTH] = 0
+            out[off + W_DESTROYED] = 1
+    return True
+
+
+@njit(cache=True)
+def prove(root, horizon, bullet_horizon, board_size, wall_grid, wall_steel, base_x, base_y,
+          table, cell_index, relevant_bit, ref_walls, spawn_x, spawn_y, k, r, counters):
+    """Minimax con poda sobre {victoria, desconocido, derrota} desde ``root`` (juega el jugador).
+
+    Devuelve ``(valor, jugada)``: ``valor > 0`` es victoria forzada en
+    ``_BIG - valor`` turnos, ``valor < 0`` derrota en ``_BIG + valor`` y 0
+    desconocido. Los estados tabulados por debajo de la raíz se leen de
+    ``table``; los demás se buscan hasta ``bullet_horizon`` turnos.
+    """
+    levels = 2 * max(1, min(horizon, bullet_horizon)) + 3
+    states = np.empty((levels, root.shape[0]), dtype=root.dtype)
+    agent = np.empty(levels, dtype=np.int64)
+    turn = np.empty(levels, dtype=np.int64)
+    actions = np.empty((levels, NUM_ACTIONS), dtype=np.int64)
+    n_actions = np.empty(levels, dtype=np.int64)
+    cursor = np.empty(levels, dtype=np.int64)
+    value = np.empty(levels, dtype=np.int64)
+    best = np.empty(levels, dtype=np.int64)
+    alpha = np.empty(levels, dtype=np.int64)
+    beta = np.empty(levels, dtype=np.int64)
+
+    states[0, :] = root
+    agent[0] = 0
+    turn[0] = 0
+    alpha[0] = -_BIG - 1
+    beta[0] = _BIG + 1
+    level = 0
+    mode = _ENTER
+    ret = 0
+    while True:
+        if mode == _ENTER:
+            counters[C_NODES] += 1
+            s = states[level]
+            a = agent[level]
+            t = turn[level]
+            # Mismo orden que ``evaluate_state``: la victoria se comprueba primero
+            if is_win(s):
+                ret = _BIG - t
+                mode = _RETURN
+                continue
+            if is_lose(s):
+                ret = -(_BIG - t)
+                mode = _RETURN
+                continue
+            if level > 0 and a == 0:
+                idx = entry_index(s, cell_index, relevant_bit, ref_walls, spawn_x, spawn_y, k, r)
+                if idx >= 0:
+                    counters[C_LOOKUPS] += 1
+                    code = table[idx]
+                    outcome = tb_outcome(code)
+                    if outcome == TB_WIN:
+                        ret = _BIG - (t + tb_distance(code))
+                    elif outcome == TB_LOSS:
+                        ret = -(_BIG - (t + tb_distance(code)))
+                    else:
+                        ret = 0
+                    mode = _RETURN
+                    continue
+                if t >= bullet_horizon:
+                    ret = 0
+                    mode = _RETURN
+                    continue
+            if t >= horizon:
+                ret = 0
+                mode = _RETURN
+                continue
+            n = legal_actions(s, a, actions[level], board_size, wall_grid, wall_steel, base_x, base_y)
+            if n == 0:
+                ret = 0
+                mode = _RETURN
+                continue
+            n_actions[level] = n
+            cursor[level] = 0
+            best[level] = TB_NO_MOVE
+            value[level] = -_BIG - 1 if a == 0 else _BIG + 1
+            mode = _EXPAND
+        elif mode == _EXPAND:
+            c = cursor[level]
+            if c < n_actions[level] and alpha[level] < beta[level]:
+                cursor[level] = c + 1
+                successor(states[level], agent[level], actions[level, c], states[level + 1],
+                          board_size, wall_grid, wall_steel, base_x, base_y)
+                nxt = 1 - agent[level]
+                agent[level + 1] = nxt
+                turn[level + 1] = turn[level] + 1 if nxt == 0 else turn[level]
+                alpha[level + 1] = alpha[level]
+                beta[level + 1] = beta[level]
+                level += 1
+                mode = _ENTER
+            else:
+                ret = value[level]
+                mode = _RETURN
+        else:
+            if level == 0:
+                return ret, best[0]
+            level -= 1
+            move = actions[level, cursor[level] - 1]
+            if agent[level] == 0:
+                if ret > value[level]:
+                    value[level] = ret
+                    best[level] = move
+                if value[level] > alpha[level]:
+                    alpha[level] = value[level]
+            else:
+                if ret < value[level]:
+                    value[level] = ret
+                    best[level] = move
+                if value[level] < beta[level]:
+                    beta[level] = value[level]
+            mode = _EXPAND
+
+
+@njit(cache=True)
+def init_table(table, template, cells, relevant, cell_wall, k, r):
+    """Marca cada entrada como desconocida o inválida."""
+    scratch = np.empty_like(template)
+    for i in range(table.shape[0]):
+        if decode_entry(i, template, scratch, cells, relevant, cell_wall, k, r):
+            table[i] = tb_pack(TB_UNKNOWN, 0, TB_NO_MOVE)
+        else:
+            table[i] = tb_pack(TB_INVALID, 0, TB_NO_MOVE)
+
+
+@njit(cache=True)
+def solve_range(start, stop, horizon, bullet_horizon, template, board_size, wall_grid, wall_steel,
+                base_x, base_y, table, cells, relevant, cell_wall, cell_index, relevant_bit, ref_walls,
+                spawn_x, spawn_y, k, r, counters):
+    """Una ronda sobre las entradas ``[start, stop)``: devuelve sus nuevas palabras."""
+    out = table[start:stop].copy()
+    s = np.empty_like(template)
+    for i in range(start, stop):
+        if tb_outcome(table[i]) != TB_UNKNOWN:
+            continue
+        decode_entry(i, template, s, cells, relevant, cell_wall, k, r)
+        v, move = prove(s, horizon, bullet_horizon, board_size, wall_grid, wall_steel, base_x, base_y,
+                        table, cell_index, relevant_bit, ref_walls, spawn_x, spawn_y, k, r, counters)
+        if v > 0:
+            out[i - start] = tb_pack(TB_WIN, _BIG - v, move)
+        elif v < 0:
+            out[i - start] = tb_pack(TB_LOSS, _BIG + v, move)
+    return out
+
+
+class TablebaseModel:
+    """Modelo del mapa para una tabla: qué casillas, ladrillos y paredes entran en la clave.
+
+    - reference: estado de referencia (normalmente el inicial del nivel);
+      de él salen las paredes y la casilla de reaparición del jugador.
+    - relevant: índices (en ``state.walls``) de los ladrillos que pueden
+      estar destruidos; por defecto los que rodean a la base.
+    """
+    def __init__(self, layout, ref_walls, relevant, spawn):
+        self.layout = layout
+        self.ref_walls = np.asarray(ref_walls, dtype=np.int32).reshape(-1, WALL_FIELDS)
+        self.relevant = np.asarray(relevant, dtype=np.int32)
+        self.spawn = (int(spawn[0]), int(spawn[1]))
+        n = layout.board_size
+        self.relevant_bit = np.full(layout.num_walls(), -1, dtype=np.int32)
+        for b, w in enumerate(self.relevant):
+            self.relevant_bit[w] = b
+        cells, cell_wall = [], []
+        for y in range(n):
+            for x in range(n):
+                if (x, y) == (layout.base_x, layout.base_y):
+                    continue
+                w = int(layout.wall_grid[y, x])
+                if w >= 0 and not self.ref_walls[w, 1] and self.relevant_bit[w] < 0:
+                    continue
+                cells.append((x, y))
+                cell_wall.append(int(self.relevant_bit[w]) if w >= 0 and not self.ref_walls[w, 1] else -1)
+        self.cells = np.array(cells, dtype=np.int32).reshape(-1, 2)
+        self.cell_wall = np.array(cell_wall, dtype=np.int32)
+        self.cell_index = np.full((n, n), -1, dtype=np.int32)
+        for c, (x, y) in enumerate(cells):
+            self.cell_index[y, x] = c
+        self.k = len(cells)
+        self.r = len(self.relevant)
+        self.size = (MAX_RESERVES_A + 1) * 3 * 3 * self.k * self.k * (1 << self.r)
+
+        self.template = np.zeros(layout.state_length(), dtype=np.int32)
+        t = self.template
+        t[H_NUM_B] = 1
+        t[H_TIME_LIMIT] = _SOLVE_TIME_LIMIT
+        for slot in (0, 1):
+            off = TANK_OFFSET + slot * TANK_FIELDS
+            t[off + T_ALIVE] = 1
+            t[off + T_SPAWN_X], t[off + T_SPAWN_Y] = self.spawn
+        t[WALL_OFFSET:] = self.ref_walls.reshape(-1)
+
+    @classmethod
+    def from_state(cls, state, relevant=None, radius=1):
+        """Modelo a partir de ``state``; ``relevant=None`` toma los ladrillos a
+        distancia de Chebyshev ``radius`` de la base."""
+        layout, vec = encode_state(state)
+        ref_walls = vec[WALL_OFFSET:].reshape(-1, WALL_FIELDS)
+        if relevant is None:
+            relevant = [i for i, (x, y) in enumerate(layout.wall_pos.tolist())
+                        if not layout.wall_steel[i] and not ref_walls[i, 1]
+                        and max(abs(x - layout.base_x), abs(y - layout.base_y)) <= radius]
+        return cls(layout, ref_walls, relevant, state.teamA_tank.spawn_position)
+
+    def kernel_args(self):
+        lay = self.layout
+        return (self.template, lay.board_size, lay.wall_grid, lay.wall_steel, lay.base_x, lay.base_y)
+
+    def index_args(self):
+        return (self.cell_index, self.relevant_bit, self.ref_walls, self.spawn[0], self.spawn[1], self.k, self.r)
+
+    def to_json(self):
+        lay = self.layout
+        return {
+            'board_size': lay.board_size,
+            'base': [lay.base_x, lay.base_y],
+            'wall_positions': lay.wall_pos.tolist(),
+            'wall_types': list(lay.wall_types),
+            'ref_walls': self.ref_walls.tolist(),
+            'relevant': self.relevant.tolist(),
+            'spawn': list(self.spawn),
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        layout = StaticLayout(data['board_size'], data['base'], [tuple(p) for p in data['wall_positions']],
+                              data['wall_types'])
+        return cls(layout, data['ref_walls'], data['relevant'], data['spawn'])
+
+
+def _round_worker(path, model_json, start, stop, horizon, bullet_horizon):
+    model = TablebaseModel.from_json(model_json)
+    table = np.load(path, mmap_mode='r')
+    counters = np.zeros(NUM_COUNTERS, dtype=np.int64)
+    template, board_size, wall_grid, wall_steel, base_x, base_y = model.kernel_args()
+    out = solve_range(start, stop, horizon, bullet_horizon, template, board_size, wall_grid, wall_steel,
+                      base_x, base_y, table, model.cells, model.relevant, model.cell_wall, *model.index_args(),
+                      counters)
+    return start, out, int(counters[C_NODES])
+
+
+def build_tablebase(state, path, rounds=64, bullet_horizon=2, workers=None, relevant=None, radius=1,
+                    chunk_size=4096, verbose=True):
+    """Genera la tabla de finales del mapa de ``state`` en ``path`` (.npy + .json).
+
+    Cada ronda se reparte en bloques de ``chunk_size`` entradas entre
+    ``workers`` procesos, que leen la ronda anterior del ``.npy`` con mmap.
+    Devuelve un dict con estadísticas (entradas, resueltas, rondas, nodos).
+    """
+    model = TablebaseModel.from_state(state, relevant=relevant, radius=radius)
+    base, _ = os.path.splitext(path)
+    npy_path, json_path = base + '.npy', base + '.json'
+    os.makedirs(os.path.dirname(os.path.abspath(npy_path)), exist_ok=True)
+    table = np.lib.format.open_memmap(npy_path, mode='w+', dtype=np.uint16, shape=(model.size,))
+    init_table(table, model.template, model.cells, model.relevant, model.cell_wall, model.k, model.r)
+    table.flush()
+    valid = int(np.count_nonzero((table >> 4) & 0x3 != TB_INVALID))
+
+    model_json = model.to_json()
+    workers = max(1, int(workers or os.cpu_count() or 1))
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    start_time = time.time()
+    nodes = 0
+    done_rounds = 0
+    try:
+        for horizon in range(1, rounds + 1):
+            chunks = [(a, min(a + chunk_size, model.size)) for a in range(0, model.size, chunk_size)]
+            if executor is None:
+                results = [_round_worker(npy_path, model_json, a, b, horizon, bullet_horizon) for a, b in chunks]
+            else:
+                futures = [executor.submit(_round_worker, npy_path, model_json, a, b, horizon, bullet_horizon)
+                           for a, b in chunks]
+                results = [f.result() for f in futures]
+            # Se escribe al final de la ronda: todos leen la misma ronda anterior
+            changed = 0
+            for a, out, n in results:
+                nodes += n
+                changed += int(np.count_nonzero(out != table[a:a + len(out)]))
+                table[a:a + len(out)] = out
+            table.flush()
+            done_rounds = horizon
+            if verbose:
+                print(f"[Tablebase] ronda {horizon}: {changed} nuevas, nodos={nodes}, {time.time() - start_time:.1f}s")
+            if changed == 0:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    outcomes = (table >> 4) & 0x3
+    stats = {
+        'entries': model.size,
+        'valid': valid,
+        'wins': int(np.count_nonzero(outcomes == TB_WIN)),
+        'losses': int(np.count_nonzero(outcomes == TB_LOSS)),
+        'rounds': done_rounds,
+        'bullet_horizon': bullet_horizon,
+        'nodes': nodes,
+        'elapsed': time.time() - start_time,
+    }
+    with open(json_path, 'w') as f:
+        json.dump({'model': model_json, 'stats': stats}, f)
+    del table
+    return stats
+
+
+class EndgameTablebase:
+    """Tabla de finales abierta con mmap; ``probe`` en O(1) antes de buscar.
+
+    ``probes`` y ``hits`` cuentan las consultas y las que devolvieron un
+    resultado utilizable.
+    """
+    def __init__(self, path):
+        base, _ = os.path.splitext(path)
+        with open(base + '.json') as f:
+            meta = json.load(f)
+        self.stats = meta.get('stats', {})
+        self.model = TablebaseModel.from_json(meta['model'])
+        self.table = np.load(base + '.npy', mmap_mode='r')
+        self.signature = self.model.layout.signature
+        self.probes = 0
+        self.hits = 0
+        self._layout = None
+
+    def _encode(self, gameState):
+        layout = self._layout
+        if layout is None or layout.signature != StaticLayout.from_state(gameState).signature:
+            layout = StaticLayout.from_state(gameState)
+            self._layout = layout
+        if layout.signature != self.signature:
+            return None
+        return encode_state(gameState, layout)[1]
+
+    def probe(self, gameState):
+        """``(resultado, distancia, acción)`` si el estado está resuelto en la tabla
+        y quedan al menos ``distancia`` ticks; si no, None.
+
+        Con balas en vuelo el estado no está en la tabla; si por lo demás es
+        un final tabulado se resuelve con una búsqueda de ``bullet_horizon``
+        turnos apoyada en la tabla (la misma que hace cada ronda).
+        """
+        self.probes += 1
+        vec = self._encode(gameState)
+        if vec is None:
+            return None
+        index_args = self.model.index_args()
+        if vec[H_NUM_BULLETS] == 0:
+            idx = entry_index(vec, *index_args)
+            if idx < 0:
+                return None
+            code = self.table[idx]
+            outcome = int(tb_outcome(code))
+            distance = int(tb_distance(code))
+            move = int(tb_move(code))
+        else:
+            quiet = vec.copy()
+            quiet[H_NUM_BULLETS] = 0
+            if entry_index(quiet, *index_args) < 0:
+                return None
+            vec[H_TIME] = 0
+            vec[H_TIME_LIMIT] = _SOLVE_TIME_LIMIT
+            horizon = max(1, int(self.stats.get('bullet_horizon', 2)))
+            counters = np.zeros(NUM_COUNTERS, dtype=np.int64)
+            v, move = prove(vec, horizon, horizon, *self.model.kernel_args()[1:], self.table, *index_args,
+                            counters)
+            outcome = TB_WIN if v > 0 else TB_LOSS if v < 0 else TB_UNKNOWN
+            distance = _BIG - abs(int(v))
+        if outcome not in (TB_WIN, TB_LOSS) or move == TB_NO_MOVE:
+            return None
+        if gameState.time_limit - gameState.current_time < distance:
+            return None
+        self.hits += 1
+        return outcome, distance, ACTIONS[int(move)]
+
+
+def tablebase_move(agent, gameState, allow_loss=True):
+    """Jugada de la tabla de finales del agente (atributo ``tablebase``) o None.
+
+    Solo para el jugador (índice 0). Con ``allow_loss=False`` solo se usan las
+    victorias forzadas (una derrota forzada supone un enemigo que minimiza).
+    """
+    tb = getattr(agent, 'tablebase', None)
+    if tb is None or getattr(agent, 'index', 0) != 0:
+        return None
+    hit = tb.probe(gameState)
+    if hit is None:
+        return None
+    outcome, distance, action = hit
+    if outcome == TB_LOSS and not allow_loss:
+        return None
+    if action not in gameState.getLegalActions(0):
+        return None
+    if not getattr(agent, 'suppress_output', False):
+        result = 'victoria' if outcome == TB_WIN else 'derrota'
+        print(f"[Tablebase] {result} en {distance} turnos -> {action}")
+    return action
+
+
+if __name__ == '__main__':
+    from ..gameClass.game import BattleCityState
+    from ..gameClass.scenarios import level1, level2, level3, level4
+
+    parser = argparse.ArgumentParser(description='Genera la tabla de finales 1 contra 1 de un nivel')
+    parser.add_argument('--level', '-l', type=int, default=1, choices=[1, 2, 3, 4])
+    parser.add_argument('--out', '-o', default=None, help='ruta de salida (por defecto tablebases/levelN)')
+    parser.add_argument('--rounds', type=int, default=64)
+    parser.add_argument('--bullet-horizon', type=int, default=2)
+    parser.add_argument('--radius', type=int, default=1, help='radio de ladrillos relevantes alrededor de la base')
+    parser.add_argument('--workers', '-w', type=int, default=None)
+    args = parser.parse_args()
+
+    levels = {1: level1.get_level1, 2: level2.get_level2, 3: level3.get_level3, 4: level4.get_level4}
+    st = BattleCityState()
+    st.initialize(levels[args.level]())
+    out = args.out or os.path.join('tablebases', f'level{args.level}')
+    print(build_tablebase(st, out, rounds=args.rounds, bullet_horizon=args.bullet_horizon,
+                          workers=args.workers, radius=args.radius))
@@ -0,0 +1,124 @@
+"""Tabla de transposición sin locks en memoria compartida.
+
+Cada entrada ocupa tres palabras de 64 bits: ``check``, ``data`` y el valor
+(``float64`` guardado con sus bits). ``check = key ^ data ^ valor`` (truco
+XOR de Hyatt): si dos procesos escriben la misma entrada a la vez y la
+lectura mezcla palabras de ambos, la comprobación falla y se trata como un
+fallo de tabla en lugar de devolver datos corruptos. No hace falta ningún
+lock, así que varios procesos pueden compartir la tabla durante la búsqueda.
+
+``data`` empaqueta la profundidad restante (en turnos completos, 8 bits),
+el tipo de cota (2 bits) y la mejor acción (4 bits). Antes de las entradas
+el bloque reserva una cabecera de ``HEADER_WORDS`` palabras; la primera es la
+bandera de parada (``stop_flag``) con la que el proceso principal pide a los
+trabajadores que abandonen la búsqueda.
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+from numba import njit
+
+from ..gameClass.sharedLayout import open_shared_memory
+
+TT_EMPTY, TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2, 3
+TT_NO_MOVE = 15
+ENTRY_WORDS = 3
+HEADER_WORDS = 8
+
+# Índices del arreglo de contadores que reciben las funciones de la tabla
+C_TT_PROBES, C_TT_HITS, C_TT_STORES = 0, 1, 2
+
+
+@njit(cache=True)
+def tt_pack(remaining, flag, move):
+    return np.uint64(remaining & 0xFF) | (np.uint64(flag) << np.uint64(8)) | (np.uint64(move & 0xF) << np.uint64(10))
+
+
+@njit(cache=True)
+def tt_probe(table, key, counters, out):
+    """Busca ``key``. Si la encuentra escribe ``(remaining, flag, move)`` en
+    ``out`` y devuelve el valor; si no, deja ``out[1] = TT_EMPTY``."""
+    counters[C_TT_PROBES] += 1
+    i = key & np.uint64(table.shape[0] - 1)
+    # Una sola lectura de la fila: el valor devuelto es el de los bits que
+    # pasan la comprobación, no una relectura que otro proceso pudo cambiar
+    row = np.empty(ENTRY_WORDS, dtype=np.uint64)
+    row[:] = table[i]
+    data = row[1]
+    if row[0] ^ data ^ row[2] != key or data == np.uint64(0):
+        out[1] = TT_EMPTY
+        return 0.0
+    counters[C_TT_HITS] += 1
+    out[0] = np.int64(data & np.uint64(0xFF))
+    out[1] = np.int64((data >> np.uint64(8)) & np.uint64(0x3))
+    out[2] = np.int64((data >> np.uint64(10)) & np.uint64(0xF))
+    return row[2:].view(np.float64)[0]
+
+
+@njit(cache=True)
+def tt_store(table, values, key, remaining, flag, move, value, counters):
+    """Guarda una entrada; reemplaza si la clave es otra o la búsqueda es al
+    menos igual de profunda que la almacenada."""
+    i = key & np.uint64(table.shape[0] - 1)
+    old = table[i, 1]
+    if table[i, 0] ^ old ^ table[i, 2] == key and np.int64(old & np.uint64(0xFF)) > remaining:
+        return
+    data = tt_pack(remaining, flag, move)
+    values[i, 2] = value
+    table[i, 1] = data
+    table[i, 0] = key ^ data ^ table[i, 2]
+    counters[C_TT_STORES] += 1
+
+
+class SharedTranspositionTable:
+    """Tabla de transposición en un bloque de ``shared_memory``.
+
+    El proceso que la crea es el dueño y la elimina con
+    ``close()``; los trabajadores la adjuntan con ``attach(descriptor)``.
+    ``table`` (uint64) y ``values`` (float64) son dos vistas del mismo buffer;
+    ``tt_store`` recibe las dos y ``tt_probe`` solo ``table``.
+    """
+    def __init__(self, size_mb=16, shm=None, entries=None):
+        if shm is None:
+            entries = 1
+            while entries * 2 * ENTRY_WORDS * 8 <= size_mb * 1024 * 1024:
+                entries *= 2
+            shm = shared_memory.SharedMemory(create=True, size=(HEADER_WORDS + entries * ENTRY_WORDS) * 8)
+            self._owner = True
+        else:
+            self._owner = False
+        self._shm = shm
+        self.entries = entries
+        offset = HEADER_WORDS * 8
+        self.stop_flag = np.ndarray((1,), dtype=np.int64, buffer=shm.buf)
+        self.table = np.ndarray((entries, ENTRY_WORDS), dtype=np.uint64, buffer=shm.buf, offset=offset)
+        self.values = np.ndarray((entries, ENTRY_WORDS), dtype=np.float64, buffer=shm.buf, offset=offset)
+        if self._owner:
+            self.stop_flag[0] = 0
+            self.table[...] = 0
+
+    @classmethod
+    def attach(cls, descriptor):
+        return cls(shm=open_shared_memory(descriptor['name']), entries=descriptor['entries'])
+
+    def descriptor(self):
+        return {'name': self._shm.name, 'entries': self.entries}
+
+    def clear(self):
+        self.table[...] = 0
+
+    def occupancy(self):
+        """Fracción de entradas ocupadas."""
+        return float(np.count_nonzero(self.table[:, 1])) / self.entries
+
+    def close(self):
+        if self._shm is None:
+            return
+        self.table = self.values = self.stop_flag = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
@@ -0,0 +1,478 @@
+"""Alpha-beta paralelo "Young Brothers Wait" (YBWC).
+
+``ParallelAlphaBetaAgent`` lanza todas las acciones de la raíz a la vez con
+el alpha conocido al enviarlas, así que los hermanos nunca se benefician de
+los cortes de los demás. Aquí, en cada nodo con al menos ``split_depth``
+turnos por delante:
+
+1. El primer hijo (el "hermano mayor") se busca en serie, recursivamente,
+   para fijar una cota.
+2. El resto de hermanos se reparte entre los procesos del pool. Cada nodo
+   repartido tiene un hueco en un bloque de memoria compartida con su
+   ventana ``(alpha, beta)`` y una bandera de aborto: las tareas que aún no
+   han empezado leen la ventana más reciente y, en cuanto un hermano produce
+   un corte, el proceso principal levanta la bandera y las que están en
+   marcha abandonan.
+
+Por debajo de ``split_depth`` los subárboles se buscan en serie con el
+kernel de numba de ``lazySmp`` (sin tabla de transposición por defecto, para
+que el número de nodos sea comparable con la búsqueda serie).
+``benchmark_speedup`` mide aceleración y sobrecoste de búsqueda de 1 a N
+procesos frente a la misma búsqueda en serie y frente a ``AlphaBetaAgent``.
+"""
+import os
+import time
+import random
+import weakref
+import concurrent.futures
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ..gameClass.arrayState import ACTIONS, NUM_ACTIONS, encode_state, StaticLayout
+from ..gameClass.jitEngine import num_agents, is_terminal, legal_actions, successor, evaluate
+from ..gameClass.sharedLayout import LayoutPublisher, attach_layout, open_shared_memory
+from ..gameClass.serialization import dumps_vector, loads_vector
+from .lazySmp import alphabeta_value, counter_stats, NUM_COUNTERS, C_TIMED_OUT, _WORKER_TABLES
+from .searchCore import reflex_fallback
+from .searchStats import SearchStats
+from .transpositionTable import SharedTranspositionTable
+from ..gameClass.canonical import SYM_NONE
+
+try:
+    from .reflexAgent import ReflexTankAgent
+except Exception:
+    ReflexTankAgent = None
+
+MAX_SPLITS = 4096
+_NO_MIRROR = np.empty(0, dtype=np.int32)   # sin claves canónicas: ``SYM_NONE``
+
+
+class SplitControl:
+    """Ventanas y banderas de aborto de los nodos repartidos, en memoria compartida.
+
+    Hueco ``i``: ``abort[i]`` (int64, 1 = abandonar), ``alpha[i]`` y
+    ``beta[i]`` (float64, ventana actual del nodo padre).
+    """
+    def __init__(self, slots=MAX_SPLITS, shm=None):
+        self._owner = shm is None
+        if shm is None:
+            shm = shared_memory.SharedMemory(create=True, size=slots * 3 * 8)
+        self._shm = shm
+        self.slots = slots
+        self.abort = np.ndarray((slots,), dtype=np.int64, buffer=shm.buf)
+        self.alpha = np.ndarray((slots,), dtype=np.float64, buffer=shm.buf, offset=slots * 8)
+        self.beta = np.ndarray((slots,), dtype=np.float64, buffer=shm.buf, offset=slots * 16)
+        if self._owner:
+            self.abort[:] = 0
+
+    @classmethod
+    def attach(cls, descriptor):
+        return cls(descriptor['slots'], shm=open_shared_memory(descriptor['name']))
+
+    def descriptor(self):
+        return {'name': self._shm.name, 'slots': self.slots}
+
+    def close(self):
+        if self._shm is None:
+            return
+        self.abort = self.alpha = self.beta = None
+        self._shm.close()
+        if self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
+
+
+_WORKER_CONTROLS = {}
+_NO_TABLE = np.zeros((1, 3), dtype=np.uint64)
+_NO_VALUES = np.zeros((1, 3), dtype=np.float64)
+
+
+def _ybwc_task(layout_desc, control_desc, table_desc, data, agent, remaining, slot, deadline):
+    """Busca en serie el subárbol de un hermano menor con la ventana del hueco ``slot``."""
+    layout = attach_layout(layout_desc)
+    control = _WORKER_CONTROLS.get(control_desc['name'])
+    if control is None:
+        control = SplitControl.attach(control_desc)
+        _WORKER_CONTROLS[control_desc['name']] = control
+    if table_desc is not None:
+        tt = _WORKER_TABLES.get(table_desc['name'])
+        if tt is None:
+            tt = SharedTranspositionTable.attach(table_desc)
+            _WORKER_TABLES[table_desc['name']] = tt
+        table, values = tt.table, tt.values
+    else:
+        table, values = _NO_TABLE, _NO_VALUES
+
+    counters = np.zeros(NUM_COUNTERS, dtype=np.int64)
+    stop = control.abort[slot:slot + 1]
+    if stop[0]:
+        return {'value': 0.0, 'counts': {}, 'aborted': True, 'timed_out': False}
+    _, vec, _ = loads_vector(data, layout)
+    value = alphabeta_value(vec, agent, float(control.alpha[slot]), float(control.beta[slot]), remaining,
+                            layout.board_size, layout.wall_grid, layout.wall_steel, layout.base_x, layout.base_y,
+                            table, values, table_desc is not None, False, np.zeros(1, dtype=np.uint64),
+                            deadline, stop, counters, SYM_NONE, _NO_MIRROR)
+    aborted = bool(counters[C_TIMED_OUT]) and bool(stop[0])
+    return {
+        'value': float(value),
+        'counts': counter_stats(counters),
+        'aborted': aborted,
+        'timed_out': bool(counters[C_TIMED_OUT]) and not aborted,
+    }
+
+
+def _shutdown(executor, publisher, control, tt):
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+    publisher.close()
+    control.close()
+    if tt is not None:
+        tt.close()
+
+
+class YBWCAlphaBetaAgent:
+    """Alpha-beta con reparto "Young Brothers Wait" entre procesos.
+
+    - depth: profundidad máxima en turnos completos (como ``AlphaBetaAgent``).
+    - time_limit: segundos por decisión (None = sin límite).
+    - num_workers: procesos del pool (1 = búsqueda en serie, sin pool).
+    - split_depth: solo se reparten nodos con al menos estos turnos por
+      delante; los subárboles más pequeños no compensan el coste de IPC.
+    - use_tt: compartir además una tabla de transposición entre procesos.
+
+    ``stats`` tiene los contadores de la decisión sumando todos los procesos;
+    ``search_stats`` los desglosa en nodos del proceso principal y de los
+    trabajadores, nodos repartidos, tareas enviadas y abortadas.
+    """
+    def __init__(self, depth='1', tankIndex=0, time_limit=1.0, num_workers=None,
+                 split_depth=2, use_tt=False, tt_size_mb=16):
+        self.index = tankIndex
+        self.depth = int(depth)
+        self.time_limit = time_limit
+        self.num_workers = max(1, int(num_workers or os.cpu_count() or 1))
+        self.split_depth = max(1, int(split_depth))
+        self.use_tt = use_tt
+        self.start_time = 0
+        self.stats = SearchStats()   # Estadísticas de la última decisión
+        self.search_stats = {}
+        self.best_value = None
+        self.debug = False
+
+        self._control = SplitControl()
+        self._tt = SharedTranspositionTable(size_mb=tt_size_mb) if use_tt else None
+        self._publisher = LayoutPublisher()
+        self._executor = None
+        self._layout = None
+        self._finalizer = weakref.finalize(self, _shutdown, None, self._publisher, self._control, self._tt)
+
+    def is_time_exceeded(self):
+        return (
+            self.time_limit is not None
+            and (time.time() - self.start_time) > self.time_limit
+        )
+
+    @property
+    def expanded_nodes(self):
+        return self.stats.nodes
+
+    def _encode(self, gameState):
+        layout = self._layout
+        if layout is None or layout.signature != StaticLayout.from_state(gameState).signature:
+            layout = StaticLayout.from_state(gameState)
+            self._layout = layout
+        return encode_state(gameState, layout)
+
+    def _get_executor(self):
+        if self._executor is None and self.num_workers > 1:
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.num_workers)
+            self._finalizer.detach()
+            self._finalizer = weakref.finalize(self, _shutdown, self._executor, self._publisher,
+                                               self._control, self._tt)
+        return self._executor
+
+    def close(self):
+        """Detiene el pool y libera la memoria compartida."""
+        self._finalizer()
+
+    # --- Búsqueda ---
+
+    def _serial(self, s, agent, remaining, alpha, beta):
+        lay = self._layout
+        counters = np.zeros(NUM_COUNTERS, dtype=np.int64)
+        if self._tt is not None:
+            table, values = self._tt.table, self._tt.values
+        else:
+            table, values = _NO_TABLE, _NO_VALUES
+        value = alphabeta_value(s, agent, alpha, beta, remaining, lay.board_size, lay.wall_grid,
+                                lay.wall_steel, lay.base_x, lay.base_y, table, values, self._tt is not None,
+                                False, np.zeros(1, dtype=np.uint64), self._deadline, self._stop, counters,
+                                SYM_NONE, _NO_MIRROR)
+        counts = counter_stats(counters)
+        self.search_stats['main_nodes'] += counts['nodes']
+        self.stats.add_counters(counts)
+        if counters[C_TIMED_OUT]:
+            self._timed_out = True
+        return value
+
+    def _new_slot(self, alpha, beta):
+        slot = self._next_slot
+        if slot >= self._control.slots:
+            return None
+        self._next_slot += 1
+        self._control.abort[slot] = 0
+        self._control.alpha[slot] = alpha
+        self._control.beta[slot] = beta
+        return slot
+
+    def _children(self, s, agent):
+        lay = self._layout
+        actions = np.zeros(NUM_ACTIONS, dtype=np.int64)
+        n = legal_actions(s, agent, actions, lay.board_size, lay.wall_grid, lay.wall_steel, lay.base_x, lay.base_y)
+        return actions[:n]
+
+    def _successor(self, s, agent, action):
+        lay = self._layout
+        child = np.empty_like(s)
+        self.stats.expansions += 1
+        successor(s, agent, action, child, lay.board_size, lay.wall_grid, lay.wall_steel, lay.base_x, lay.base_y)
+        return child
+
+    def _search(self, s, agent, remaining, alpha, beta, actions=None):
+        """Nodo YBW: hermano mayor en serie y el resto en paralelo.
+
+        Devuelve ``(valor, índice del mejor hijo)``.
+        """
+        lay = self._layout
+        stats = self.stats
+        if remaining <= 0 or is_terminal(s) or self._timed_out:
+            self.search_stats['main_nodes'] += 1
+            stats.nodes += 1
+            stats.evaluations += 1
+            return evaluate(s, lay.base_x, lay.base_y), -1
+        if actions is None and (remaining < self.split_depth or self._executor is None):
+            return self._serial(s, agent, remaining, alpha, beta), -1
+        self.search_stats['main_nodes'] += 1
+        stats.nodes += 1
+        if actions is None:
+            actions = self._children(s, agent)
+        if len(actions) == 0:
+            stats.evaluations += 1
+            return evaluate(s, lay.base_x, lay.base_y), -1
+
+        maximize = agent == 0
+        nxt = (agent + 1) % num_agents(s)
+        child_remaining = remaining - 1 if nxt == 0 else remaining
+
+        def update(i, v):
+            nonlocal value, best, alpha, beta
+            if (v > value) if maximize else (v < value):
+                value, best = v, i
+            if maximize:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+
+        value, best = (-np.inf if maximize else np.inf), -1
+        # 1) Hermano mayor en serie
+        v, _ = self._search(self._successor(s, agent, actions[0]), nxt, child_remaining, alpha, beta)
+        update(0, v)
+        if best < 0:
+            best = 0
+        if alpha >= beta and len(actions) > 1:
+            stats.cutoffs += 1
+        if alpha >= beta or len(actions) == 1 or self._timed_out:
+            return value, best
+
+        # 2) Hermanos menores repartidos entre los procesos
+        slot = self._new_slot(alpha, beta) if self._executor is not None else None
+        if slot is None:
+            for i in range(1, len(actions)):
+                v, _ = self._search(self._successor(s, agent, actions[i]), nxt, child_remaining, alpha, beta)
+                update(i, v)
+                if alpha >= beta and i < len(actions) - 1:
+                    stats.cutoffs += 1
+                if alpha >= beta or self._timed_out:
+                    break
+            return value, best
+
+        self.search_stats['splits'] += 1
+        futures = {}
+        for i in range(1, len(actions)):
+            data = dumps_vector(self._successor(s, agent, actions[i]), lay, embed_layout=False)
+            fut = self._executor.submit(_ybwc_task, self._layout_desc, self._control_desc, self._table_desc,
+                                        data, nxt, child_remaining, slot, self._deadline)
+            futures[fut] = i
+        self.search_stats['tasks'] += len(futures)
+
+        pending = set(futures)
+        for fut in concurrent.futures.as_completed(futures):
+            pending.discard(fut)
+            res = fut.result()
+            self.search_stats['worker_nodes'] += res['counts'].get('nodes', 0)
+            stats.add_counters(res['counts'])
+            if res['aborted']:
+                self.search_stats['aborted'] += 1
+                continue
+            if res['timed_out']:
+                self._timed_out = True
+                continue
+            update(futures[fut], res['value'])
+            self._control.alpha[slot] = alpha
+            self._control.beta[slot] = beta
+            if alpha >= beta:
+                # Corte: abortar a los hermanos que siguen en marcha o en cola
+                self._control.abort[slot] = 1
+                self.search_stats['cutoffs'] += 1
+                stats.cutoffs += 1
+                for f in pending:
+                    f.cancel()
+                self._leftover.extend(pending)
+                break
+        return value, best
+
+    def getAction(self, gameState):
+        self.start_time = time.time()
+        self.stats.begin()
+        self.best_value = None
+        self.search_stats = {'main_nodes': 0, 'worker_nodes': 0, 'splits': 0, 'tasks': 0,
+                             'aborted': 0, 'cutoffs': 0, 'depth': 0}
+        self._deadline = np.inf if self.time_limit is None else self.start_time + self.time_limit
+        self._stop = np.zeros(1, dtype=np.int64)
+        self._timed_out = False
+        self._next_slot = 0
+        self._leftover = []
+
+        layout, vec = self._encode(gameState)
+        actions = self._children(vec, 0)
+        if len(actions) == 0:
+            return self.stats.finish('STOP', 'no_moves')
+
+        executor = self._get_executor()
+        if executor is not None:
+            self._layout_desc = self._publisher.publish(layout)
+            self._control_desc = self._control.descriptor()
+            self._table_desc = self._tt.descriptor() if self._tt is not None else None
+
+        best_action = None
+        for d in range(1, self.depth + 1):
+            if self.is_time_exceeded():
+                break
+            self._next_slot = 0
+            value, best = self._search(vec, 0, d, -np.inf, np.inf, actions)
+            if self._leftover:
+                concurrent.futures.wait(self._leftover)
+                self._leftover = []
+            if self._timed_out:
+                break
+            if best >= 0:
+                best_action = ACTIONS[actions[best]]
+                self.best_value = value
+                self.search_stats['depth'] = d
+                self.stats.depth = d
+                # La mejor jugada de esta iteración se busca primero en la siguiente
+                actions = np.concatenate(([actions[best]], np.delete(actions, best)))
+
+        if self.debug or not getattr(self, 'suppress_output', False):
+            st = self.search_stats
+            print(f"[YBWC] Profundidad {st['depth']}: nodos expandidos = {self.expanded_nodes} "
+                  f"(principal {st['main_nodes']}, trabajadores {st['worker_nodes']}), "
+                  f"repartos={st['splits']} tareas={st['tasks']} abortadas={st['aborted']}")
+
+        # Sin ninguna iteración completa a tiempo: fallback reflexivo
+        try:
+            if best_action is None and (self.is_time_exceeded() or self._timed_out):
+                return reflex_fallback(self, gameState, self.expanded_nodes)
+        except Exception:
+            pass
+        return self.stats.finish(best_action)
+
+
+def _sample_positions(layout, count, seed):
+    """Posiciones de prueba: jugadas aleatorias de ambos bandos desde el inicio."""
+    from ..gameClass.game import BattleCityState
+    rng = random.Random(seed)
+    positions = []
+    state = BattleCityState()
+    state.initialize(layout)
+    while len(positions) < count:
+        for _ in range(rng.randint(1, 4)):
+            for agent in range(state.getNumAgents()):
+                if agent >= state.getNumAgents() or state.isTerminal():
+                    break
+                state = state.getSuccessor(agent, rng.choice(state.getLegalActions(agent)))
+        if state.isTerminal():
+            state = BattleCityState()
+            state.initialize(layout)
+            continue
+        positions.append(state)
+    return positions
+
+
+def benchmark_speedup(layout, depth=3, max_workers=None, positions=8, split_depth=2, seed=0,
+                      include_python=False):
+    """Aceleración y sobrecoste de YBWC de 1 a ``max_workers`` procesos.
+
+    Cada fila tiene tiempo y nodos totales sobre las mismas posiciones,
+    ``speedup`` (tiempo serie / tiempo) y ``overhead`` (nodos / nodos serie
+    - 1) respecto a la fila de 1 proceso, que es el alpha-beta serie sobre el
+    motor de numba. ``same_values`` indica si el valor de la raíz coincide
+    con el serie en todas las posiciones. Con ``include_python`` se añade una
+    fila con ``AlphaBetaAgent`` (el agente serie original) como referencia.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    states = _sample_positions(layout, positions, seed)
+    rows = []
+    serial = None
+    for workers in range(1, max_workers + 1):
+        agent = YBWCAlphaBetaAgent(depth=depth, time_limit=None, num_workers=workers, split_depth=split_depth)
+        agent.suppress_output = True
+        agent.getAction(states[0])  # compilar / arrancar procesos
+        values, nodes = [], 0
+        start = time.time()
+        for st in states:
+            agent.getAction(st)
+            values.append(agent.best_value)
+            nodes += agent.stats.nodes
+        elapsed = time.time() - start
+        agent.close()
+        if serial is None:
+            serial = (elapsed, nodes, values)
+        rows.append({
+            'agent': 'YBWCAlphaBetaAgent',
+            'workers': workers,
+            'time': elapsed,
+            'nodes': nodes,
+            'speedup': serial[0] / elapsed if elapsed > 0 else 0.0,
+            'overhead': nodes / serial[1] - 1.0 if serial[1] else 0.0,
+            'same_values': all(abs(a - b) < 1e-9 or a == b for a, b in zip(values, serial[2])),
+        })
+    if include_python:
+        from .minimax import AlphaBetaAgent
+        agent = AlphaBetaAgent(depth=depth, time_limit=None)
+        nodes = 0
+        start = time.time()
+        for st in states:
+            agent.getAction(st)
+            nodes += agent.stats.nodes
+        elapsed = time.time() - start
+        rows.append({
+            'agent': 'AlphaBetaAgent',
+            'workers': 1,
+            'time': elapsed,
+            'nodes': nodes,
+            'speedup': serial[0] / elapsed if elapsed > 0 else 0.0,
+            'overhead': nodes / serial[1] - 1.0 if serial[1] else 0.0,
+            'same_values': None,
+        })
+    return rows
+
+
+if __name__ == '__main__':
+    from ..gameClass.scenarios.level2 import get_level2
+    for row in benchmark_speedup(get_level2(), depth=3, include_python=True):
+        print(f"{row['agent']:>20} workers={row['workers']:2d} time={row['time']:8.3f}s nodes={row['nodes']:9d} "
+              f"speedup={row['speedup']:5.2f} overhead={row['overhead']:+.1%} same={row['same_values']}")
@@ -0,0 +1,216 @@
+"""Codificación de BattleCityState como arreglos planos de enteros.
+
+El estado dinámico se guarda en un único vector ``int32`` con desplazamientos
+fijos (cabecera, tanques, balas y paredes) para que los kernels de numba
+puedan copiarlo y modificarlo sin crear objetos de Python. La parte estática
+del mapa (tamaño, posición de la base, rejilla de paredes) vive en
+``StaticLayout`` y se comparte entre todos los estados de una partida.
+"""
+import numpy as np
+
+from .bullet import Bullet
+from .tank import Tank
+from .walls import Wall
+from .base import Base
+
+# --- Acciones (mismo orden en que getLegalActions las devuelve) ---
+ACTIONS = ['FIRE_UP', 'FIRE_DOWN', 'FIRE_LEFT', 'FIRE_RIGHT',
+           'MOVE_UP', 'MOVE_DOWN', 'MOVE_LEFT', 'MOVE_RIGHT', 'STOP']
+ACTION_INDEX = {a: i for i, a in enumerate(ACTIONS)}
+NUM_ACTIONS = len(ACTIONS)
+A_FIRE_UP, A_FIRE_DOWN, A_FIRE_LEFT, A_FIRE_RIGHT = 0, 1, 2, 3
+A_MOVE_UP, A_MOVE_DOWN, A_MOVE_LEFT, A_MOVE_RIGHT = 4, 5, 6, 7
+A_STOP = 8
+
+# --- Direcciones ---
+DIRECTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+DIRECTION_INDEX = {d: i for i, d in enumerate(DIRECTIONS)}
+NO_DIRECTION = -1
+DX = np.array([0, 0, -1, 1], dtype=np.int32)
+DY = np.array([1, -1, 0, 0], dtype=np.int32)
+
+# --- Cabecera ---
+H_NUM_B = 0          # Tanques del equipo B presentes en la lista
+H_RESERVES_A = 1
+H_RESERVES_B = 2
+H_TIME = 3
+H_TIME_LIMIT = 4
+H_BASE_DESTROYED = 5
+H_NUM_BULLETS = 6
+HEADER_SIZE = 8
+
+# --- Tanques (slot 0 = jugador, slots 1.. = equipo B en orden de lista) ---
+MAX_TANKS = 5
+TANK_FIELDS = 7
+T_X, T_Y, T_DIR, T_HEALTH, T_ALIVE, T_SPAWN_X, T_SPAWN_Y = range(TANK_FIELDS)
+TANK_OFFSET = HEADER_SIZE
+
+# --- Balas ---
+MAX_BULLETS = 64
+BULLET_FIELDS = 8
+B_X, B_Y, B_DIR, B_TEAM, B_OWNER, B_ACTIVE, B_PREV_X, B_PREV_Y = range(BULLET_FIELDS)
+BULLET_OFFSET = TANK_OFFSET + MAX_TANKS * TANK_FIELDS
+NO_PREV = -9999
+TEAM_A, TEAM_B = 0, 1
+
+# --- Paredes (salud y destruida, en el orden de state.walls) ---
+WALL_FIELDS = 2
+W_HEALTH, W_DESTROYED = 0, 1
+WALL_OFFSET = BULLET_OFFSET + MAX_BULLETS * BULLET_FIELDS
+
+
+def state_length(num_walls):
+    """Longitud del vector de estado para un mapa con ``num_walls`` paredes."""
+    return WALL_OFFSET + WALL_FIELDS * num_walls
+
+
+class StaticLayout:
+    """Datos del mapa que no cambian durante la partida.
+
+    - board_size: lado del tablero.
+    - base_x, base_y: posición de la base.
+    - wall_grid: matriz (y, x) con el índice de la pared en esa celda o -1.
+    - wall_steel: 1 si la pared es de acero, 0 si es de ladrillo.
+    - wall_pos: posiciones (x, y) de cada pared, en el orden de state.walls.
+    """
+    def __init__(self, board_size, base_pos, wall_positions, wall_types):
+        self.board_size = int(board_size)
+        self.base_x, self.base_y = int(base_pos[0]), int(base_pos[1])
+        n = len(wall_positions)
+        self.wall_pos = np.array(wall_positions, dtype=np.int32).reshape(n, 2)
+        self.wall_steel = np.array([1 if t == 'steel' else 0 for t in wall_types], dtype=np.int8)
+        self.wall_types = list(wall_types)
+        self.wall_grid = np.full((self.board_size, self.board_size), -1, dtype=np.int32)
+        for i, (x, y) in enumerate(wall_positions):
+            self.wall_grid[y, x] = i
+        self.signature = (self.board_size, (self.base_x, self.base_y),
+                          tuple(map(tuple, wall_positions)), tuple(wall_types))
+
+    @classmethod
+    def from_state(cls, state):
+        """Construye el layout estático a partir de un BattleCityState."""
+        return cls(state.board_size, state.base.position,
+                   [w.position for w in state.walls],
+                   [w.wall_type for w in state.walls])
+
+    def num_walls(self):
+        return len(self.wall_types)
+
+    def state_length(self):
+        return state_length(self.num_walls())
+
+
+def _encode_tank(vec, slot, tank):
+    off = TANK_OFFSET + slot * TANK_FIELDS
+    vec[off + T_X], vec[off + T_Y] = tank.position
+    vec[off + T_DIR] = DIRECTION_INDEX.get(tank.direction, NO_DIRECTION)
+    vec[off + T_HEALTH] = tank.health
+    vec[off + T_ALIVE] = 1 if tank.is_alive else 0
+    vec[off + T_SPAWN_X], vec[off + T_SPAWN_Y] = tank.spawn_position
+
+
+def encode_state(state, layout=None):
+    """Codifica ``state`` en un vector ``int32``.
+
+    Si no se pasa ``layout`` se construye uno nuevo a partir del estado.
+    Devuelve la tupla ``(layout, vec)``.
+    """
+    if layout is None:
+        layout = StaticLayout.from_state(state)
+    if len(state.teamB_tanks) > MAX_TANKS - 1:
+        raise ValueError(f"Demasiados tanques enemigos para la codificación ({len(state.teamB_tanks)})")
+    if len(state.bullets) > MAX_BULLETS:
+        raise ValueError(f"Demasiadas balas para la codificación ({len(state.bullets)})")
+
+    vec = np.zeros(layout.state_length(), dtype=np.int32)
+    vec[H_NUM_B] = len(state.teamB_tanks)
+    vec[H_RESERVES_A] = state.reserves_A
+    vec[H_RESERVES_B] = state.reserves_B
+    vec[H_TIME] = state.current_time
+    vec[H_TIME_LIMIT] = state.time_limit
+    vec[H_BASE_DESTROYED] = 1 if state.base.is_destroyed else 0
+    vec[H_NUM_BULLETS] = len(state.bullets)
+
+    _encode_tank(vec, 0, state.teamA_tank)
+    for i, tank in enumerate(state.teamB_tanks, start=1):
+        _encode_tank(vec, i, tank)
+
+    for i, b in enumerate(state.bullets):
+        off = BULLET_OFFSET + i * BULLET_FIELDS
+        vec[off + B_X], vec[off + B_Y] = b.position
+        vec[off + B_DIR] = DIRECTION_INDEX[b.direction]
+        vec[off + B_TEAM] = TEAM_A if b.team == 'A' else TEAM_B
+        vec[off + B_OWNER] = -1 if b.owner_id is None else b.owner_id
+        vec[off + B_ACTIVE] = 1 if b.is_active else 0
+        prev = getattr(b, 'prev_position', None)
+        if prev is None:
+            vec[off + B_PREV_X] = vec[off + B_PREV_Y] = NO_PREV
+        else:
+            vec[off + B_PREV_X], vec[off + B_PREV_Y] = prev
+
+    for i, w in enumerate(state.walls):
+        off = WALL_OFFSET + i * WALL_FIELDS
+        vec[off + W_HEALTH] = w.health
+        vec[off + W_DESTROYED] = 1 if w.is_destroyed else 0
+    return layout, vec
+
+
+def _decode_tank(vec, slot, team):
+    off = TANK_OFFSET + slot * TANK_FIELDS
+    tank = Tank.__new__(Tank)
+    tank.position = (int(vec[off + T_X]), int(vec[off + T_Y]))
+    d = int(vec[off + T_DIR])
+    tank.direction = DIRECTIONS[d] if d != NO_DIRECTION else None
+    tank.health = int(vec[off + T_HEALTH])
+    tank.is_alive = bool(vec[off + T_ALIVE])
+    tank.team = team
+    tank.spawn_position = (int(vec[off + T_SPAWN_X]), int(vec[off + T_SPAWN_Y]))
+    tank.respawn_timer = 0.0
+    return tank
+
+
+def decode_state(vec, layout):
+    """Reconstruye un BattleCityState a partir de su vector y layout."""
+    from .game import BattleCityState
+
+    state = BattleCityState()
+    state.board_size = layout.board_size
+    state.reserves_A = int(vec[H_RESERVES_A])
+    state.reserves_B = int(vec[H_RESERVES_B])
+    state.current_time = int(vec[H_TIME])
+    state.time_limit = int(vec[H_TIME_LIMIT])
+
+    state.teamA_tank = _decode_tank(vec, 0, 'A')
+    state.teamB_tanks = [_decode_tank(vec, i, 'B') for i in range(1, int(vec[H_NUM_B]) + 1)]
+
+    base = Base.__new__(Base)
+    base.position = (layout.base_x, layout.base_y)
+    base.is_destroyed = bool(vec[H_BASE_DESTROYED])
+    state.base = base
+
+    state.bullets = []
+    for i in range(int(vec[H_NUM_BULLETS])):
+        off = BULLET_OFFSET + i * BULLET_FIELDS
+        b = Bullet.__new__(Bullet)
+        b.position = (int(vec[off + B_X]), int(vec[off + B_Y]))
+        b.direction = DIRECTIONS[int(vec[off + B_DIR])]
+        b.team = 'A' if vec[off + B_TEAM] == TEAM_A else 'B'
+        owner = int(vec[off + B_OWNER])
+        b.owner_id = None if owner < 0 else owner
+        b.is_active = bool(vec[off + B_ACTIVE])
+        if vec[off + B_PREV_X] == NO_PREV:
+            b.prev_position = None
+        else:
+            b.prev_position = (int(vec[off + B_PREV_X]), int(vec[off + B_PREV_Y]))
+        state.bullets.append(b)
+
+    state.walls = []
+    for i, wtype in enumerate(layout.wall_types):
+        off = WALL_OFFSET + i * WALL_FIELDS
+        w = Wall.__new__(Wall)
+        w.position = (int(layout.wall_pos[i, 0]), int(layout.wall_pos[i, 1]))
+        w.wall_type = wtype
+        w.health = int(vec[off + W_HEALTH])
+        w.is_destroyed = bool(vec[off + W_DESTROYED])
+        state.walls.append(w)
+    return state
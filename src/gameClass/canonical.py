@@ -0,0 +1,81 @@
+"""Claves canónicas de BattleCityState para tablas de transposición y cachés.
+
+Dos estados que son el reflejo izquierda-derecha uno del otro (en un mapa
+simétrico, como level1 y level2) tienen la misma clave canónica. El orden de
+``teamB_tanks`` sí cuenta: los enemigos mueven por orden de slot y la
+evaluación desempata la amenaza por orden de lista. El cálculo lo hace
+``jitEngine.canonical_hash`` sobre el vector de ``arrayState``; aquí están
+los datos por mapa (``wall_mirror_map``) y los envoltorios para Python.
+
+Si la clave sale de la orientación reflejada, las jugadas guardadas con ella
+se guardan y se leen reflejadas (``mirror_action``). Las tablas y cachés de
+jugadas de Expectimax usan ``SYM_NONE``: su modelo de enemigos da el 0.6 a la
+primera acción empatada en el orden de ``ACTIONS``
+(``enemyModel._distribution``, ``jitEngine.enemy_action_probabilities``),
+así que un estado y su reflejo pueden tener valores y jugadas distintos.
+"""
+import numpy as np
+
+from .arrayState import ACTIONS, ACTION_INDEX, StaticLayout, encode_state
+from .jitEngine import SYM_MIRROR, canonical_hash, mirror_action as _mirror_action_index
+
+SYM_NONE = 0
+SYM_ALL = SYM_MIRROR
+
+
+def wall_mirror_map(layout):
+    """Índice de la pared reflejada de cada pared, o None si el mapa no es simétrico.
+
+    El mapa es simétrico si la base está en la columna central y cada pared
+    tiene en la columna reflejada otra del mismo tipo. El resultado se guarda
+    en el propio layout.
+    """
+    cached = getattr(layout, '_wall_mirror', False)
+    if cached is not False:
+        return cached
+    n = layout.board_size
+    mirror = None
+    if layout.base_x == n - 1 - layout.base_x:
+        index = {(int(x), int(y)): i for i, (x, y) in enumerate(layout.wall_pos)}
+        mirror = np.empty(len(index), dtype=np.int32)
+        for (x, y), i in index.items():
+            j = index.get((n - 1 - x, y))
+            if j is None or layout.wall_types[j] != layout.wall_types[i]:
+                mirror = None
+                break
+            mirror[i] = j
+    try:
+        layout._wall_mirror = mirror
+    except AttributeError:
+        pass
+    return mirror
+
+
+def symmetry_arrays(layout, symmetry=SYM_ALL):
+    """``(symmetry, wall_mirror)`` listos para los kernels: sin ``SYM_MIRROR``
+    si el mapa no es simétrico (``wall_mirror`` vacío)."""
+    mirror = wall_mirror_map(layout) if symmetry & SYM_MIRROR else None
+    if mirror is None:
+        return symmetry & ~SYM_MIRROR, np.empty(0, dtype=np.int32)
+    return symmetry, mirror
+
+
+def canonical_key(state, agent=0, symmetry=SYM_ALL, layout=None):
+    """Clave canónica de ``state`` (BattleCityState o vector codificado con ``layout``).
+
+    Devuelve ``(clave, reflejado)`` con la clave como entero de 64 bits.
+    """
+    if isinstance(state, np.ndarray):
+        vec = state
+    else:
+        if layout is None:
+            layout = StaticLayout.from_state(state)
+        layout, vec = encode_state(state, layout)
+    symmetry, mirror = symmetry_arrays(layout, symmetry)
+    key, mirrored = canonical_hash(vec, agent, symmetry, mirror, layout.board_size)
+    return int(key), bool(mirrored)
+
+
+def mirror_action(action):
+    """Nombre de la acción reflejada (``MOVE_LEFT`` <-> ``MOVE_RIGHT``, ...)."""
+    return ACTIONS[_mirror_action_index(ACTION_INDEX[action])]
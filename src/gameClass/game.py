@@ -58,6 +58,13 @@ class BattleCityState:
                     wall = Wall(position=pos, wall_type='steel')
                     self.walls.append(wall)
     
+    def __reduce_ex__(self, protocol):
+        """Pickle compacto (IPC con procesos): usa el formato binario de ``serialization``."""
+        if self.teamA_tank is None or self.base is None:
+            return super().__reduce_ex__(protocol)
+        from .serialization import dumps_state, loads_state
+        return (loads_state, (dumps_state(self),))
+
     def getTeamATank(self):
         """Devuelve el tanque del equipo A (jugador)."""
         return self.teamA_tank
@@ -243,6 +250,74 @@ class BattleCityState:
         if self.isWin() or self.isLose():
             raise Exception("El juego ya terminó")  # Si el juego ya terminó, no generar sucesores
 
+        state = self._copy_state()
+        legalActions = state.getLegalActions(tankIndex)
+        
+        if action not in legalActions:
+            raise Exception(f"Acción ilegal {action} para el tanque {tankIndex}")
+        
+        
+        state.applyTankAction(tankIndex, action)
+                
+        # Avanzamos en el tiempo
+        if tankIndex == state.getNumAgents() - 1:
+            state.advanceTick()
+        
+        return state
+
+    def getJointSuccessor(self, firstIndex, actions):
+        """
+        Sucesor tras el movimiento conjunto de los agentes ``firstIndex`` ..
+        ``firstIndex + len(actions) - 1`` (normalmente todos los enemigos).
+
+        Como el tiempo solo avanza tras el último agente, sus movimientos son
+        simultáneos: se aplican sobre una única copia y se hace un solo tick
+        al final. ``None`` significa que ese agente no actúa y un movimiento
+        hacia una casilla que ya ocupa otro tanque se convierte en STOP. Si
+        una acción termina la partida (p.ej. un disparo inmediato a la base),
+        se devuelve ese estado sin aplicar el resto ni avanzar el tiempo, como
+        haría la búsqueda agente a agente.
+        """
+        if self.isWin() or self.isLose():
+            raise Exception("El juego ya terminó")
+
+        state = self._copy_state()
+        offsets = {'MOVE_UP': (0, 1), 'MOVE_DOWN': (0, -1), 'MOVE_LEFT': (-1, 0), 'MOVE_RIGHT': (1, 0)}
+        for k, action in enumerate(actions):
+            if action is None:
+                continue
+            index = firstIndex + k
+            if action in offsets:
+                tank = state.getTankByIndex(index)
+                if tank is None or not tank.isAlive():
+                    continue
+                x, y = tank.getPos()
+                dx, dy = offsets[action]
+                target = (x + dx, y + dy)
+                if any(t is not None and t is not tank and t.isAlive() and t.getPos() == target
+                       for t in [state.teamA_tank] + state.teamB_tanks):
+                    continue
+            state.applyTankAction(index, action)
+            if state.isWin() or state.isLose():
+                return state
+
+        if firstIndex + len(actions) == state.getNumAgents():
+            state.advanceTick()
+        return state
+
+    def advanceTick(self):
+        """Fin de un ciclo completo de agentes: balas, colisiones, respawns y reloj."""
+        self.moveBullets()
+        self._check_collisions()
+        self._handle_deaths_and_respawns()
+        # Avanzar el tiempo del juego por cada ciclo completo de agentes
+        try:
+            self.current_time += 1
+        except Exception:
+            pass
+
+    def _copy_state(self):
+        """Copia del estado con los objetos mutables duplicados."""
         state = BattleCityState()
         state.board_size = self.board_size
         state.time_limit = self.time_limit
@@ -257,25 +332,6 @@ class BattleCityState:
         state.base = self._copy_base(self.base)
         state.walls = [self._copy_wall(w) for w in self.walls]
         state.bullets = [self._copy_bullet(b) for b in self.bullets]
-        legalActions = state.getLegalActions(tankIndex)
-        
-        if action not in legalActions:
-            raise Exception(f"Acción ilegal {action} para el tanque {tankIndex}")
-        
-        
-        state.applyTankAction(tankIndex, action)
-                
-        # Avanzamos en el tiempo
-        if tankIndex == state.getNumAgents() - 1:
-            state.moveBullets()
-            state._check_collisions()
-            state._handle_deaths_and_respawns()
-            # Avanzar el tiempo del juego por cada ciclo completo de agentes
-            try:
-                state.current_time += 1
-            except Exception:
-                pass
-        
         return state
     
     def evaluate_state(self):
@@ -288,6 +344,23 @@ class BattleCityState:
         - Escalar agresión cuando hay pocos enemigos
         """
         
+        if self.isWin():
+            return float('inf')
+        elif self.isLose():
+            return float('-inf')
+
+        # Penalización por tiempo
+        time_penalty = TIME_PENALTY * self.current_time * 5
+
+        return self.evaluate_without_time() - time_penalty   # Preferir victorias rápidas
+
+    def evaluate_without_time(self):
+        """Parte de ``evaluate_state`` que no depende del reloj.
+
+        ``evaluate_state() == evaluate_without_time() - TIME_PENALTY * current_time * 5``
+        bit a bit (misma suma en el mismo orden), así que se puede guardar y
+        reutilizar en otro tick (``evalCache``).
+        """
         if self.isWin():
             return float('inf')
         elif self.isLose():
@@ -350,16 +423,12 @@ class BattleCityState:
             # Dos enemigos sin reservas: ser agresivo
             aggression_bonus = 30
         
-        
-        # Penalización por tiempo
-        time_penalty = TIME_PENALTY * self.current_time * 5
 
         final_score = (
             defend_score            # Proteger base
             + attack_score          # Atacar enemigos, con prioridad estratégica
             + aggression_bonus      # Escalar cuando es óptimo
             - danger_score          # Penalizar enemigos cercanos a base
-            - time_penalty          # Preferir victorias rápidas
         )
 
         return final_score
@@ -0,0 +1,616 @@
+"""Motor de BattleCity compilado con numba sobre el vector de ``arrayState``.
+
+Cada función replica, regla por regla, el método equivalente de
+``BattleCityState`` (acciones legales, disparo inmediato, movimiento de
+balas, colisiones, muertes/reapariciones y función de evaluación) para que
+una búsqueda sobre vectores tome las mismas decisiones que sobre objetos.
+Todas las funciones reciben la parte estática del mapa como argumentos
+sueltos: ``board_size``, ``wall_grid``, ``wall_steel``, ``base_x``, ``base_y``.
+"""
+import numpy as np
+from numba import njit
+
+from .arrayState import (
+    DX, DY, NUM_ACTIONS, A_FIRE_UP, A_FIRE_DOWN, A_MOVE_UP, A_MOVE_LEFT, A_MOVE_RIGHT, A_STOP,
+    H_NUM_B, H_RESERVES_A, H_RESERVES_B, H_TIME, H_TIME_LIMIT, H_BASE_DESTROYED, H_NUM_BULLETS,
+    TANK_OFFSET, TANK_FIELDS, T_X, T_Y, T_DIR, T_HEALTH, T_ALIVE, T_SPAWN_X, T_SPAWN_Y,
+    BULLET_OFFSET, BULLET_FIELDS, MAX_BULLETS, B_X, B_Y, B_DIR, B_TEAM, B_OWNER, B_ACTIVE,
+    B_PREV_X, B_PREV_Y, NO_PREV, TEAM_A, TEAM_B,
+    WALL_OFFSET, WALL_FIELDS, W_HEALTH, W_DESTROYED,
+)
+
+TANK_HEALTH = 3
+
+
+@njit(cache=True)
+def num_agents(s):
+    return 1 + s[H_NUM_B]
+
+
+@njit(cache=True)
+def tank_offset(slot):
+    return TANK_OFFSET + slot * TANK_FIELDS
+
+
+@njit(cache=True)
+def is_win(s):
+    if s[H_RESERVES_B] != 0:
+        return False
+    for slot in range(1, s[H_NUM_B] + 1):
+        if s[tank_offset(slot) + T_ALIVE]:
+            return False
+    return True
+
+
+@njit(cache=True)
+def is_lose(s):
+    if s[H_RESERVES_A] == 0 and not s[TANK_OFFSET + T_ALIVE]:
+        return True
+    return s[H_BASE_DESTROYED] != 0
+
+
+@njit(cache=True)
+def is_terminal(s):
+    return is_win(s) or is_lose(s) or s[H_TIME] >= s[H_TIME_LIMIT]
+
+
+@njit(cache=True)
+def _wall_at(s, x, y, board_size, wall_grid):
+    """Índice de la pared no destruida en (x, y) o -1."""
+    if x < 0 or y < 0 or x >= board_size or y >= board_size:
+        return -1
+    w = wall_grid[y, x]
+    if w >= 0 and s[WALL_OFFSET + w * WALL_FIELDS + W_DESTROYED] == 0:
+        return w
+    return -1
+
+
+@njit(cache=True)
+def _damage_wall(s, w, wall_steel):
+    if wall_steel[w] == 0:
+        off = WALL_OFFSET + w * WALL_FIELDS
+        s[off + W_HEALTH] -= 1
+        if s[off + W_HEALTH] <= 0:
+            s[off + W_DESTROYED] = 1
+
+
+@njit(cache=True)
+def _damage_tank(s, slot):
+    off = tank_offset(slot)
+    s[off + T_HEALTH] -= 1
+    if s[off + T_HEALTH] <= 0:
+        s[off + T_ALIVE] = 0
+
+
+@njit(cache=True)
+def legal_actions(s, agent, out, board_size, wall_grid, wall_steel, base_x, base_y):
+    """Escribe en ``out`` los códigos de acción legales y devuelve cuántos hay.
+
+    Mismas reglas y mismo orden que ``BattleCityState.getLegalActions``.
+    """
+    if is_win(s) or is_lose(s):
+        return 0
+    nb = s[H_NUM_B]
+    if agent > nb:
+        return 0
+    off = tank_offset(agent)
+    if not s[off + T_ALIVE]:
+        return 0
+    team = TEAM_A if agent == 0 else TEAM_B
+    x = s[off + T_X]
+    y = s[off + T_Y]
+    n = 0
+
+    # Disparos: objetivo (tanque rival o ladrillo para los enemigos) en línea de fuego
+    for d in range(4):
+        dx = DX[d]
+        dy = DY[d]
+        tx = x + dx
+        ty = y + dy
+        wall_count = 0
+        fire = False
+        while 0 <= tx < board_size and 0 <= ty < board_size:
+            w = _wall_at(s, tx, ty, board_size, wall_grid)
+            if w >= 0:
+                if wall_steel[w]:
+                    break
+                wall_count += 1
+                if agent != 0:
+                    fire = True
+                if wall_count > 1:
+                    break
+                tx += dx
+                ty += dy
+                continue
+            found = False
+            for other in range(nb + 1):
+                ooff = tank_offset(other)
+                other_team = TEAM_A if other == 0 else TEAM_B
+                if s[ooff + T_ALIVE] and other_team != team and s[ooff + T_X] == tx and s[ooff + T_Y] == ty:
+                    if wall_count <= 1:
+                        fire = True
+                    found = True
+                    break
+            if found:
+                break
+            tx += dx
+            ty += dy
+        if fire:
+            out[n] = d
+            n += 1
+
+    # Movimientos
+    for d in range(4):
+        nx = x + DX[d]
+        ny = y + DY[d]
+        if not (0 <= nx < board_size and 0 <= ny < board_size):
+            continue
+        if _wall_at(s, nx, ny, board_size, wall_grid) >= 0:
+            continue
+        blocked = False
+        for other in range(nb + 1):
+            if other == agent:
+                continue
+            ooff = tank_offset(other)
+            if s[ooff + T_ALIVE] and s[ooff + T_X] == nx and s[ooff + T_Y] == ny:
+                blocked = True
+                break
+        if blocked:
+            continue
+        if s[H_BASE_DESTROYED] == 0 and nx == base_x and ny == base_y:
+            continue
+        out[n] = A_MOVE_UP + d
+        n += 1
+
+    if n == 0:
+        out[0] = A_STOP
+        n = 1
+    return n
+
+
+@njit(cache=True)
+def apply_action(s, agent, action, board_size, wall_grid, wall_steel, base_x, base_y):
+    """Equivalente a ``BattleCityState.applyTankAction`` sobre el vector."""
+    nb = s[H_NUM_B]
+    if agent > nb:
+        return
+    off = tank_offset(agent)
+    if not s[off + T_ALIVE]:
+        return
+    x = s[off + T_X]
+    y = s[off + T_Y]
+    if A_MOVE_UP <= action <= A_MOVE_RIGHT:
+        d = action - A_MOVE_UP
+        s[off + T_DIR] = d
+        s[off + T_X] = x + DX[d]
+        s[off + T_Y] = y + DY[d]
+    elif action < A_MOVE_UP:
+        d = action
+        bx = x + DX[d]
+        by = y + DY[d]
+        if not (0 <= bx < board_size and 0 <= by < board_size):
+            return
+        team = TEAM_A if agent == 0 else TEAM_B
+        collided = False
+        w = _wall_at(s, bx, by, board_size, wall_grid)
+        if w >= 0:
+            _damage_wall(s, w, wall_steel)
+            collided = True
+        if not collided:
+            for other in range(nb + 1):
+                ooff = tank_offset(other)
+                other_team = TEAM_A if other == 0 else TEAM_B
+                if s[ooff + T_ALIVE] and other_team != team and s[ooff + T_X] == bx and s[ooff + T_Y] == by:
+                    _damage_tank(s, other)
+                    collided = True
+                    break
+        if not collided and s[H_BASE_DESTROYED] == 0 and bx == base_x and by == base_y:
+            s[H_BASE_DESTROYED] = 1
+            collided = True
+        if not collided:
+            s[off + T_DIR] = d
+            nbul = s[H_NUM_BULLETS]
+            if nbul < MAX_BULLETS:
+                boff = BULLET_OFFSET + nbul * BULLET_FIELDS
+                s[boff + B_X] = bx
+                s[boff + B_Y] = by
+                s[boff + B_DIR] = d
+                s[boff + B_TEAM] = team
+                s[boff + B_OWNER] = agent
+                s[boff + B_ACTIVE] = 1
+                s[boff + B_PREV_X] = NO_PREV
+                s[boff + B_PREV_Y] = NO_PREV
+                s[H_NUM_BULLETS] = nbul + 1
+
+
+@njit(cache=True)
+def move_bullets(s):
+    for i in range(s[H_NUM_BULLETS]):
+        off = BULLET_OFFSET + i * BULLET_FIELDS
+        if s[off + B_ACTIVE]:
+            s[off + B_PREV_X] = s[off + B_X]
+            s[off + B_PREV_Y] = s[off + B_Y]
+            d = s[off + B_DIR]
+            s[off + B_X] += DX[d]
+            s[off + B_Y] += DY[d]
+
+
+@njit(cache=True)
+def check_collisions(s, board_size, wall_grid, wall_steel, base_x, base_y):
+    """Equivalente a ``BattleCityState._check_collisions``."""
+    n = s[H_NUM_BULLETS]
+    removed = np.zeros(n, dtype=np.bool_)
+    was_active = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        was_active[i] = s[BULLET_OFFSET + i * BULLET_FIELDS + B_ACTIVE] != 0
+
+    # Balas de equipos distintos en la misma celda se anulan
+    for i in range(n):
+        if not was_active[i]:
+            continue
+        oi = BULLET_OFFSET + i * BULLET_FIELDS
+        for j in range(n):
+            if j == i or not was_active[j]:
+                continue
+            oj = BULLET_OFFSET + j * BULLET_FIELDS
+            if s[oi + B_X] == s[oj + B_X] and s[oi + B_Y] == s[oj + B_Y] and s[oi + B_TEAM] != s[oj + B_TEAM]:
+                removed[i] = True
+                break
+    for i in range(n):
+        if removed[i]:
+            s[BULLET_OFFSET + i * BULLET_FIELDS + B_ACTIVE] = 0
+
+    # Choques cabeza a cabeza (intercambio de posiciones)
+    for i in range(n):
+        if not was_active[i] or removed[i]:
+            continue
+        oi = BULLET_OFFSET + i * BULLET_FIELDS
+        for j in range(i + 1, n):
+            if not was_active[j] or removed[j]:
+                continue
+            oj = BULLET_OFFSET + j * BULLET_FIELDS
+            if s[oi + B_TEAM] == s[oj + B_TEAM]:
+                continue
+            if s[oi + B_PREV_X] == NO_PREV or s[oj + B_PREV_X] == NO_PREV:
+                continue
+            if (s[oi + B_X] == s[oj + B_PREV_X] and s[oi + B_Y] == s[oj + B_PREV_Y]
+                    and s[oj + B_X] == s[oi + B_PREV_X] and s[oj + B_Y] == s[oi + B_PREV_Y]):
+                s[oi + B_ACTIVE] = 0
+                s[oj + B_ACTIVE] = 0
+                removed[i] = True
+                removed[j] = True
+
+    # Colisiones con muros, tanques y base; compactar las balas que siguen vivas
+    nb = s[H_NUM_B]
+    kept = 0
+    for i in range(n):
+        oi = BULLET_OFFSET + i * BULLET_FIELDS
+        if not s[oi + B_ACTIVE] or removed[i]:
+            continue
+        bx = s[oi + B_X]
+        by = s[oi + B_Y]
+        w = _wall_at(s, bx, by, board_size, wall_grid)
+        if w >= 0:
+            _damage_wall(s, w, wall_steel)
+            continue
+        hit = False
+        for other in range(nb + 1):
+            ooff = tank_offset(other)
+            other_team = TEAM_A if other == 0 else TEAM_B
+            if s[ooff + T_ALIVE] and other_team != s[oi + B_TEAM] and s[ooff + T_X] == bx and s[ooff + T_Y] == by:
+                _damage_tank(s, other)
+                hit = True
+                break
+        if hit:
+            continue
+        if s[H_BASE_DESTROYED] == 0 and bx == base_x and by == base_y:
+            s[H_BASE_DESTROYED] = 1
+            continue
+        if 0 <= bx < board_size and 0 <= by < board_size:
+            if kept != i:
+                ok = BULLET_OFFSET + kept * BULLET_FIELDS
+                for f in range(BULLET_FIELDS):
+                    s[ok + f] = s[oi + f]
+            kept += 1
+    # Limpiar los slots liberados para que estados iguales tengan vectores iguales
+    s[BULLET_OFFSET + kept * BULLET_FIELDS:BULLET_OFFSET + n * BULLET_FIELDS] = 0
+    s[H_NUM_BULLETS] = kept
+
+
+@njit(cache=True)
+def _respawn(s, slot):
+    off = tank_offset(slot)
+    s[off + T_X] = s[off + T_SPAWN_X]
+    s[off + T_Y] = s[off + T_SPAWN_Y]
+    s[off + T_HEALTH] = TANK_HEALTH
+    s[off + T_ALIVE] = 1
+
+
+@njit(cache=True)
+def handle_deaths_and_respawns(s):
+    """Equivalente a ``BattleCityState._handle_deaths_and_respawns``."""
+    if not s[TANK_OFFSET + T_ALIVE]:
+        if s[H_RESERVES_A] > 0:
+            s[H_RESERVES_A] -= 1
+            _respawn(s, 0)
+        else:
+            s[H_RESERVES_A] = 0
+
+    nb = s[H_NUM_B]
+    kept = 0
+    for slot in range(1, nb + 1):
+        off = tank_offset(slot)
+        keep = True
+        if not s[off + T_ALIVE]:
+            if s[H_RESERVES_B] > 0:
+                s[H_RESERVES_B] -= 1
+                _respawn(s, slot)
+            else:
+                keep = False
+        if keep:
+            kept += 1
+            if kept != slot:
+                koff = tank_offset(kept)
+                for f in range(TANK_FIELDS):
+                    s[koff + f] = s[off + f]
+    s[tank_offset(kept + 1):tank_offset(nb + 1)] = 0
+    s[H_NUM_B] = kept
+
+
+@njit(cache=True)
+def advance_tick(s, board_size, wall_grid, wall_steel, base_x, base_y):
+    """Avance de un ciclo completo: balas, colisiones, respawns y reloj."""
+    move_bullets(s)
+    check_collisions(s, board_size, wall_grid, wall_steel, base_x, base_y)
+    handle_deaths_and_respawns(s)
+    s[H_TIME] += 1
+
+
+@njit(cache=True)
+def successor(s, agent, action, out, board_size, wall_grid, wall_steel, base_x, base_y):
+    """Copia ``s`` en ``out`` y aplica la acción (como ``getSuccessor``)."""
+    out[:] = s
+    apply_action(out, agent, action, board_size, wall_grid, wall_steel, base_x, base_y)
+    if agent == num_agents(out) - 1:
+        advance_tick(out, board_size, wall_grid, wall_steel, base_x, base_y)
+
+
+@njit(cache=True)
+def evaluate(s, base_x, base_y):
+    """Equivalente a ``BattleCityState.evaluate_state``."""
+    if is_win(s):
+        return np.inf
+    if is_lose(s):
+        return -np.inf
+
+    ax = s[TANK_OFFSET + T_X]
+    ay = s[TANK_OFFSET + T_Y]
+    nb = s[H_NUM_B]
+
+    num_alive = 0
+    threat = -1
+    min_threat_dist = np.inf
+    danger = 0
+    for slot in range(1, nb + 1):
+        off = tank_offset(slot)
+        if not s[off + T_ALIVE]:
+            continue
+        num_alive += 1
+        d = abs(s[off + T_X] - base_x) + abs(s[off + T_Y] - base_y)
+        if d < min_threat_dist:
+            min_threat_dist = d
+            threat = slot
+        if d < 10:
+            danger += (10 - d) ** 2
+
+    dist_player_to_base = abs(ax - base_x) + abs(ay - base_y)
+    defend_score = 0.0
+    if min_threat_dist < 8:
+        defend_score = 50 / (dist_player_to_base + 1)
+
+    attack_score = 0.0
+    if threat >= 0:
+        toff = tank_offset(threat)
+        dist_to_threat = abs(ax - s[toff + T_X]) + abs(ay - s[toff + T_Y])
+        attack_score += 100 / (dist_to_threat + 1)
+        if min_threat_dist < 5:
+            attack_score += 50 / (dist_to_threat + 1)
+
+    last = -1
+    for slot in range(1, nb + 1):
+        off = tank_offset(slot)
+        if not s[off + T_ALIVE]:
+            continue
+        last = slot
+        if slot != threat:
+            d = abs(ax - s[off + T_X]) + abs(ay - s[off + T_Y])
+            attack_score += 10 / (d + 1)
+
+    aggression_bonus = 0.0
+    if num_alive == 1:
+        loff = tank_offset(last)
+        d = abs(ax - s[loff + T_X]) + abs(ay - s[loff + T_Y])
+        aggression_bonus = 30 / (d + 1)
+    elif num_alive == 2 and s[H_RESERVES_B] == 0:
+        aggression_bonus = 30.0
+
+    time_penalty = s[H_TIME] * 5
+    return defend_score + attack_score + aggression_bonus - danger - time_penalty
+
+
+@njit(cache=True)
+def enemy_action_probabilities(s, agent, actions, n, out, base_x, base_y):
+    """Distribución de ``ExpectimaxAgent.probabilityActions`` en ``out[:n]``."""
+    off = tank_offset(agent)
+    if agent > s[H_NUM_B] or not s[off + T_ALIVE]:
+        for i in range(n):
+            out[i] = 1.0 / n
+        return
+
+    ex = s[off + T_X]
+    ey = s[off + T_Y]
+    disallowed = np.zeros(NUM_ACTIONS, dtype=np.bool_)
+    disallowed[A_MOVE_UP] = True
+    disallowed[A_FIRE_UP] = True
+    disallowed[A_FIRE_DOWN] = True
+    if ex < base_x:
+        disallowed[A_MOVE_LEFT] = True
+    elif ex > base_x:
+        disallowed[A_MOVE_RIGHT] = True
+
+    n_allowed = 0
+    for i in range(n):
+        if not disallowed[actions[i]]:
+            n_allowed += 1
+    if n_allowed == 0:
+        for i in range(n):
+            out[i] = 1.0 / n
+        return
+
+    best = actions[0]
+    best_score = np.inf
+    for i in range(n):
+        a = actions[i]
+        if disallowed[a]:
+            continue
+        px = ex
+        py = ey
+        if A_MOVE_UP <= a <= A_MOVE_RIGHT:
+            px += DX[a - A_MOVE_UP]
+            py += DY[a - A_MOVE_UP]
+        dist = abs(px - base_x) + abs(py - base_y)
+        if dist < best_score:
+            best_score = dist
+            best = a
+
+    for i in range(n):
+        a = actions[i]
+        if disallowed[a]:
+            out[i] = 0.0
+        elif n_allowed == 1:
+            out[i] = 1.0
+        elif a == best:
+            out[i] = 0.6
+        else:
+            out[i] = 0.4 / (n_allowed - 1)
+
+
+@njit(cache=True)
+def _mix64(z):
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+@njit(cache=True)
+def state_hash(s):
+    """Hash de 64 bits de la parte dinámica del estado.
+
+    Solo recorre los tanques y balas en uso y omite la posición previa de las
+    balas, que no influye en la dinámica; dos estados equivalentes tienen el
+    mismo hash aunque se hayan alcanzado por caminos distintos.
+    """
+    h = np.uint64(0xCBF29CE484222325)
+    prime = np.uint64(0x100000001B3)
+    end = TANK_OFFSET + (s[H_NUM_B] + 1) * TANK_FIELDS
+    for i in range(end):
+        h = (h ^ np.uint64(s[i] & 0xFFFFFFFF)) * prime
+    for b in range(s[H_NUM_BULLETS]):
+        off = BULLET_OFFSET + b * BULLET_FIELDS
+        for f in range(B_PREV_X):
+            h = (h ^ np.uint64(s[off + f] & 0xFFFFFFFF)) * prime
+    for i in range(WALL_OFFSET, s.shape[0]):
+        h = (h ^ np.uint64(s[i] & 0xFFFFFFFF)) * prime
+    return _mix64(h)
+
+
+# --- Claves canónicas (simetrías del estado) ---
+# Los enemigos no son intercambiables: mueven por orden de slot y
+# ``evaluate``/``evaluate_state`` desempatan la amenaza por orden de lista, así
+# que se hashean en su orden
+SYM_MIRROR = 2    # espejo izquierda-derecha si el mapa es simétrico
+
+
+@njit(cache=True)
+def mirror_direction(d):
+    if d == 2:
+        return 3
+    if d == 3:
+        return 2
+    return d
+
+
+@njit(cache=True)
+def mirror_action(a):
+    """Acción equivalente en el estado reflejado (LEFT <-> RIGHT)."""
+    if a == 2 or a == 6:
+        return a + 1
+    if a == 3 or a == 7:
+        return a - 1
+    return a
+
+
+@njit(cache=True)
+def _tank_hash(s, slot, mirror, board_size):
+    off = tank_offset(slot)
+    h = np.uint64(0xCBF29CE484222325)
+    prime = np.uint64(0x100000001B3)
+    for f in range(TANK_FIELDS):
+        v = s[off + f]
+        if mirror:
+            if f == T_X or f == T_SPAWN_X:
+                v = board_size - 1 - v
+            elif f == T_DIR:
+                v = mirror_direction(v)
+        h = (h ^ np.uint64(v & 0xFFFFFFFF)) * prime
+    return _mix64(h)
+
+
+@njit(cache=True)
+def _oriented_hash(s, mirror, wall_mirror, board_size):
+    prime = np.uint64(0x100000001B3)
+    h = np.uint64(0xCBF29CE484222325)
+    for i in range(TANK_OFFSET):
+        h = (h ^ np.uint64(s[i] & 0xFFFFFFFF)) * prime
+    h = (h ^ _tank_hash(s, 0, mirror, board_size)) * prime
+    for e in range(s[H_NUM_B]):
+        h = (h ^ _tank_hash(s, e + 1, mirror, board_size)) * prime
+    # El dueño de la bala no influye en la dinámica: se omite (igual que la posición previa)
+    for b in range(s[H_NUM_BULLETS]):
+        off = BULLET_OFFSET + b * BULLET_FIELDS
+        for f in range(B_PREV_X):
+            if f == B_OWNER:
+                continue
+            v = s[off + f]
+            if mirror:
+                if f == B_X:
+                    v = board_size - 1 - v
+                elif f == B_DIR:
+                    v = mirror_direction(v)
+            h = (h ^ np.uint64(v & 0xFFFFFFFF)) * prime
+    nw = (s.shape[0] - WALL_OFFSET) // WALL_FIELDS
+    for w in range(nw):
+        src = wall_mirror[w] if mirror else w
+        off = WALL_OFFSET + src * WALL_FIELDS
+        for f in range(WALL_FIELDS):
+            h = (h ^ np.uint64(s[off + f] & 0xFFFFFFFF)) * prime
+    return _mix64(h)
+
+
+@njit(cache=True)
+def canonical_hash(s, agent, symmetry, wall_mirror, board_size):
+    """Hash de ``(estado, agente)`` invariante a las simetrías de ``symmetry``.
+
+    Con ``SYM_MIRROR`` (``wall_mirror[i]`` = pared reflejada de la ``i``) se
+    toma el menor hash entre el estado y su reflejo. Devuelve ``(clave,
+    reflejado)``; si ``reflejado`` las jugadas guardadas con esa clave están
+    en el marco del reflejo (ver ``mirror_action``).
+    """
+    h = _oriented_hash(s, False, wall_mirror, board_size)
+    mirrored = False
+    if (symmetry & SYM_MIRROR) != 0 and wall_mirror.shape[0] == (s.shape[0] - WALL_OFFSET) // WALL_FIELDS:
+        hm = _oriented_hash(s, True, wall_mirror, board_size)
+        if hm < h:
+            h = hm
+            mirrored = True
+    return _mix64(h ^ np.uint64(agent + 1)), mirrored
@@ -0,0 +1,254 @@
+"""Serialización binaria compacta de BattleCityState.
+
+Formato (little-endian, versión ``FORMAT_VERSION``):
+
+- Cabecera: magic ``b'BC'``, versión, flags y el identificador de 8 bytes
+  del layout estático (``layout_id``).
+- Si el flag ``FLAG_LAYOUT`` está activo, el layout estático completo
+  (tamaño, base y paredes) va embebido; si no, el lector lo busca en el
+  registro (los niveles de ``scenarios`` se registran solos).
+- Parte dinámica: reloj, reservas, base, tanques, balas y solo las paredes
+  que difieren del layout inicial (salud 5, sin destruir).
+
+Un estado de level1 ocupa unas decenas de bytes sin layout embebido y unos
+200 con él. El mismo formato sirve para IPC con procesos (``__reduce__`` de
+BattleCityState lo usa al hacer pickle), ficheros de repetición y datasets
+de posiciones (``write_record``/``iter_records``).
+"""
+import hashlib
+import struct
+
+import numpy as np
+
+from .arrayState import (
+    StaticLayout, encode_state, decode_state,
+    H_NUM_B, H_RESERVES_A, H_RESERVES_B, H_TIME, H_TIME_LIMIT, H_BASE_DESTROYED, H_NUM_BULLETS,
+    TANK_OFFSET, TANK_FIELDS, BULLET_OFFSET, BULLET_FIELDS,
+    B_X, B_Y, B_DIR, B_TEAM, B_OWNER, B_ACTIVE, B_PREV_X, B_PREV_Y, NO_PREV,
+    WALL_OFFSET, WALL_FIELDS, W_HEALTH, W_DESTROYED,
+)
+
+MAGIC = b'BC'
+FORMAT_VERSION = 1
+FLAG_LAYOUT = 0x01
+FLAG_SCORE = 0x02
+INITIAL_WALL_HEALTH = 5
+
+_HEADER = struct.Struct('<2sBB8s')
+_CORE = struct.Struct('<HHBBBBBH')      # time, time_limit, resA, resB, base, nB, nBullets, nWallDeltas
+_TANK = struct.Struct('<BBbbBBB')       # x, y, dir, health, alive, spawn_x, spawn_y
+_BULLET = struct.Struct('<bbBb')        # x, y, dir|team|active|has_prev, owner
+_PREV = struct.Struct('<bb')
+_WALL_DELTA = struct.Struct('<HbB')     # índice, salud, destruida
+_SCORE = struct.Struct('<d')
+_LAYOUT_HEAD = struct.Struct('<BBBH')   # board_size, base_x, base_y, n_walls
+_LAYOUT_WALL = struct.Struct('<BBB')    # x, y, steel
+_RECORD = struct.Struct('<I')
+
+_REGISTRY = {}
+_BUILTINS_LOADED = False
+
+
+class SerializationError(Exception):
+    """Datos corruptos, versión desconocida o layout no registrado."""
+    pass
+
+
+def layout_id(layout):
+    """Identificador estable de 8 bytes de un StaticLayout."""
+    return hashlib.blake2b(repr(layout.signature).encode('utf-8'), digest_size=8).digest()
+
+
+def register_layout(layout, replace=False):
+    """Registra un layout (StaticLayout, BattleCityState o lista de strings).
+
+    Con ``replace=True`` sustituye la entrada existente con el mismo id (p.ej.
+    por la versión en memoria compartida de ``sharedLayout``).
+    """
+    if isinstance(layout, (list, tuple)):
+        from .game import BattleCityState
+        state = BattleCityState()
+        state.initialize(layout)
+        layout = StaticLayout.from_state(state)
+    elif not isinstance(layout, StaticLayout):
+        layout = StaticLayout.from_state(layout)
+    key = layout_id(layout)
+    if replace:
+        _REGISTRY[key] = layout
+    else:
+        _REGISTRY.setdefault(key, layout)
+    return key
+
+
+def _load_builtins():
+    global _BUILTINS_LOADED
+    if _BUILTINS_LOADED:
+        return
+    _BUILTINS_LOADED = True
+    from .scenarios.level1 import get_level1
+    from .scenarios.level2 import get_level2
+    from .scenarios.level3 import get_level3
+    from .scenarios.level4 import get_level4
+    for fn in (get_level1, get_level2, get_level3, get_level4):
+        register_layout(fn())
+
+
+def get_layout(key):
+    """Devuelve el StaticLayout registrado con ``key`` o None."""
+    _load_builtins()
+    return _REGISTRY.get(key)
+
+
+def _pack_layout(layout):
+    parts = [_LAYOUT_HEAD.pack(layout.board_size, layout.base_x, layout.base_y, layout.num_walls())]
+    for (x, y), steel in zip(layout.wall_pos.tolist(), layout.wall_steel.tolist()):
+        parts.append(_LAYOUT_WALL.pack(x, y, steel))
+    return b''.join(parts)
+
+
+def _unpack_layout(view, pos):
+    board_size, bx, by, n_walls = _LAYOUT_HEAD.unpack_from(view, pos)
+    pos += _LAYOUT_HEAD.size
+    positions, types = [], []
+    for _ in range(n_walls):
+        x, y, steel = _LAYOUT_WALL.unpack_from(view, pos)
+        pos += _LAYOUT_WALL.size
+        positions.append((x, y))
+        types.append('steel' if steel else 'brick')
+    return StaticLayout(board_size, (bx, by), positions, types), pos
+
+
+def dumps_vector(vec, layout, embed_layout=None, score=None):
+    """Serializa un vector de ``arrayState`` (ver ``dumps_state``)."""
+    _load_builtins()
+    key = layout_id(layout)
+    if embed_layout is None:
+        embed_layout = key not in _REGISTRY
+    flags = (FLAG_LAYOUT if embed_layout else 0) | (FLAG_SCORE if score is not None else 0)
+
+    n_b = int(vec[H_NUM_B])
+    n_bullets = int(vec[H_NUM_BULLETS])
+    walls = vec[WALL_OFFSET:WALL_OFFSET + WALL_FIELDS * layout.num_walls()].reshape(-1, WALL_FIELDS)
+    changed = np.nonzero((walls[:, W_HEALTH] != INITIAL_WALL_HEALTH) | (walls[:, W_DESTROYED] != 0))[0]
+
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, flags, key)]
+    if embed_layout:
+        parts.append(_pack_layout(layout))
+    parts.append(_CORE.pack(int(vec[H_TIME]), int(vec[H_TIME_LIMIT]), int(vec[H_RESERVES_A]),
+                            int(vec[H_RESERVES_B]), int(vec[H_BASE_DESTROYED]), n_b, n_bullets, len(changed)))
+    for slot in range(n_b + 1):
+        off = TANK_OFFSET + slot * TANK_FIELDS
+        parts.append(_TANK.pack(*(int(v) for v in vec[off:off + TANK_FIELDS])))
+    for i in range(n_bullets):
+        off = BULLET_OFFSET + i * BULLET_FIELDS
+        has_prev = vec[off + B_PREV_X] != NO_PREV
+        packed = int(vec[off + B_DIR]) | (int(vec[off + B_TEAM]) << 2) | (int(vec[off + B_ACTIVE]) << 3) | (int(has_prev) << 4)
+        parts.append(_BULLET.pack(int(vec[off + B_X]), int(vec[off + B_Y]), packed, int(vec[off + B_OWNER])))
+        if has_prev:
+            parts.append(_PREV.pack(int(vec[off + B_PREV_X]), int(vec[off + B_PREV_Y])))
+    for i in changed.tolist():
+        parts.append(_WALL_DELTA.pack(i, int(walls[i, W_HEALTH]), int(walls[i, W_DESTROYED])))
+    if score is not None:
+        parts.append(_SCORE.pack(float(score)))
+    return b''.join(parts)
+
+
+def loads_vector(data, layout=None):
+    """Inverso de ``dumps_vector``: devuelve ``(layout, vec, score)``."""
+    view = memoryview(data)
+    try:
+        magic, version, flags, key = _HEADER.unpack_from(view, 0)
+    except struct.error as e:
+        raise SerializationError(f"Cabecera incompleta: {e}")
+    if magic != MAGIC:
+        raise SerializationError("No es un estado serializado de BattleCity")
+    if version != FORMAT_VERSION:
+        raise SerializationError(f"Versión de formato no soportada: {version}")
+    pos = _HEADER.size
+    try:
+        if flags & FLAG_LAYOUT:
+            embedded, pos = _unpack_layout(view, pos)
+            if layout is None:
+                layout = get_layout(key) or embedded
+        if layout is None:
+            layout = get_layout(key)
+            if layout is None:
+                raise SerializationError(f"Layout {key.hex()} no registrado; use register_layout()")
+
+        vec = np.zeros(layout.state_length(), dtype=np.int32)
+        walls = vec[WALL_OFFSET:].reshape(-1, WALL_FIELDS)
+        walls[:, W_HEALTH] = INITIAL_WALL_HEALTH
+
+        (vec[H_TIME], vec[H_TIME_LIMIT], vec[H_RESERVES_A], vec[H_RESERVES_B],
+         vec[H_BASE_DESTROYED], n_b, n_bullets, n_walls) = _CORE.unpack_from(view, pos)
+        vec[H_NUM_B] = n_b
+        vec[H_NUM_BULLETS] = n_bullets
+        pos += _CORE.size
+        for slot in range(n_b + 1):
+            off = TANK_OFFSET + slot * TANK_FIELDS
+            vec[off:off + TANK_FIELDS] = _TANK.unpack_from(view, pos)
+            pos += _TANK.size
+        for i in range(n_bullets):
+            off = BULLET_OFFSET + i * BULLET_FIELDS
+            x, y, packed, owner = _BULLET.unpack_from(view, pos)
+            pos += _BULLET.size
+            vec[off + B_X], vec[off + B_Y], vec[off + B_OWNER] = x, y, owner
+            vec[off + B_DIR] = packed & 0x3
+            vec[off + B_TEAM] = (packed >> 2) & 0x1
+            vec[off + B_ACTIVE] = (packed >> 3) & 0x1
+            if packed & 0x10:
+                vec[off + B_PREV_X], vec[off + B_PREV_Y] = _PREV.unpack_from(view, pos)
+                pos += _PREV.size
+            else:
+                vec[off + B_PREV_X] = vec[off + B_PREV_Y] = NO_PREV
+        for _ in range(n_walls):
+            i, health, destroyed = _WALL_DELTA.unpack_from(view, pos)
+            pos += _WALL_DELTA.size
+            walls[i, W_HEALTH] = health
+            walls[i, W_DESTROYED] = destroyed
+        score = None
+        if flags & FLAG_SCORE:
+            score, = _SCORE.unpack_from(view, pos)
+    except (struct.error, IndexError) as e:
+        raise SerializationError(f"Estado serializado corrupto: {e}")
+    return layout, vec, score
+
+
+def dumps_state(state, embed_layout=None, layout=None):
+    """Serializa un BattleCityState a bytes.
+
+    ``embed_layout=None`` embebe el layout solo si no está registrado en este
+    proceso (los niveles de ``scenarios`` nunca lo necesitan).
+    """
+    layout, vec = encode_state(state, layout)
+    return dumps_vector(vec, layout, embed_layout=embed_layout, score=getattr(state, 'score', None))
+
+
+def loads_state(data, layout=None):
+    """Reconstruye un BattleCityState serializado con ``dumps_state``."""
+    layout, vec, score = loads_vector(data, layout)
+    state = decode_state(vec, layout)
+    if score is not None:
+        state.score = score
+    return state
+
+
+def write_record(f, data):
+    """Escribe un registro con prefijo de longitud (ficheros de repetición/datasets)."""
+    f.write(_RECORD.pack(len(data)))
+    f.write(data)
+
+
+def iter_records(f):
+    """Itera los registros escritos con ``write_record``."""
+    while True:
+        head = f.read(_RECORD.size)
+        if not head:
+            return
+        if len(head) < _RECORD.size:
+            raise SerializationError("Registro truncado")
+        size, = _RECORD.unpack(head)
+        data = f.read(size)
+        if len(data) < size:
+            raise SerializationError("Registro truncado")
+        yield data
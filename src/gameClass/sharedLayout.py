@@ -0,0 +1,152 @@
+"""Datos estáticos por layout publicados en memoria compartida.
+
+El proceso principal publica una vez por nivel un bloque de
+``multiprocessing.shared_memory`` con la geometría del tablero y la rejilla
+de paredes que leen los kernels de ``jitEngine``. Los procesos trabajadores
+lo adjuntan sin copiar (vistas NumPy sobre el mismo buffer) y registran el
+layout en ``serialization``, de modo que por cada tarea solo viaja la parte
+dinámica del estado.
+
+Uso típico::
+
+    with LayoutPublisher() as pub:
+        desc = pub.publish(get_level1())
+        ...                                # en el trabajador:
+        layout = attach_layout(desc)       # una vez por proceso
+"""
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .arrayState import StaticLayout
+from . import serialization
+
+# Orden fijo de los arreglos dentro del bloque compartido
+_FIELDS = (
+    'wall_grid',        # (N, N) int32: índice de pared o -1
+    'wall_steel',       # (W,) int8
+    'wall_pos',         # (W, 2) int32
+)
+
+
+def _as_static_layout(layout):
+    if isinstance(layout, StaticLayout):
+        return layout
+    if isinstance(layout, (list, tuple)):
+        from .game import BattleCityState
+        state = BattleCityState()
+        state.initialize(layout)
+        return StaticLayout.from_state(state)
+    return StaticLayout.from_state(layout)
+
+
+class SharedLayout(StaticLayout):
+    """StaticLayout cuyos arreglos son vistas sobre memoria compartida."""
+    def __init__(self, descriptor, shm):
+        self._shm = shm
+        self.descriptor = descriptor
+        for name, dtype, shape, offset in descriptor['fields']:
+            arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            arr.flags.writeable = False
+            setattr(self, name, arr)
+        self.board_size = descriptor['board_size']
+        self.base_x, self.base_y = descriptor['base']
+        self.wall_types = ['steel' if s else 'brick' for s in self.wall_steel.tolist()]
+        self.signature = (self.board_size, (self.base_x, self.base_y),
+                          tuple(map(tuple, self.wall_pos.tolist())), tuple(self.wall_types))
+
+    def close(self):
+        """Suelta las vistas y cierra el bloque (no lo elimina)."""
+        for name, _, _, _ in self.descriptor['fields']:
+            setattr(self, name, None)
+        self._shm.close()
+
+
+class LayoutPublisher:
+    """Publica layouts en memoria compartida y los elimina al cerrar.
+
+    ``publish`` devuelve un descriptor pequeño (dict picklable) que se pasa a
+    los trabajadores; publicar dos veces el mismo layout reutiliza el bloque.
+    """
+    def __init__(self):
+        self._blocks = {}
+
+    def publish(self, layout):
+        layout = _as_static_layout(layout)
+        key = serialization.layout_id(layout)
+        if key in self._blocks:
+            return self._blocks[key][1]
+
+        arrays = {name: getattr(layout, name) for name in _FIELDS}
+        fields, offset = [], 0
+        for name in _FIELDS:
+            arr = np.ascontiguousarray(arrays[name])
+            offset = (offset + 7) & ~7
+            fields.append((name, arr.dtype.str, arr.shape, offset))
+            offset += arr.nbytes
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for (name, dtype, shape, off) in fields:
+            np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=off)[...] = arrays[name]
+
+        descriptor = {
+            'name': shm.name,
+            'layout_id': key,
+            'board_size': layout.board_size,
+            'base': (layout.base_x, layout.base_y),
+            'fields': fields,
+        }
+        self._blocks[key] = (shm, descriptor)
+        return descriptor
+
+    def descriptors(self):
+        return [d for _, d in self._blocks.values()]
+
+    def close(self):
+        for shm, _ in self._blocks.values():
+            try:
+                shm.close()
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._blocks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def open_shared_memory(name):
+    """Adjunta un bloque existente sin que el resource_tracker del hijo lo borre."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13: los hijos comparten el resource_tracker del publicador y
+        # registrar de nuevo es inocuo; un proceso independiente tendría su propio
+        # tracker, que borraría el bloque al salir, así que se desregistra a mano.
+        shm = shared_memory.SharedMemory(name=name)
+        if multiprocessing.parent_process() is None:
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception:
+                pass
+        return shm
+
+
+_ATTACHED = {}
+
+
+def attach_layout(descriptor):
+    """Adjunta (una vez por proceso) el layout publicado y lo registra en ``serialization``."""
+    key = descriptor['layout_id']
+    layout = _ATTACHED.get(key)
+    if layout is None:
+        layout = SharedLayout(descriptor, open_shared_memory(descriptor['name']))
+        _ATTACHED[key] = layout
+        serialization.register_layout(layout, replace=True)
+    return layout
+
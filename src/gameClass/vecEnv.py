@@ -0,0 +1,275 @@
+"""Entorno vectorizado: N partidas independientes avanzando a la vez.
+
+Los estados se guardan como struct-of-arrays: una matriz ``(campos, N)``
+(``states[campo, partida]``), de modo que cada campo del vector de
+``arrayState`` (posición de un tanque, reloj, nº de balas, ...) es contiguo a
+lo largo de todas las partidas y se puede leer con NumPy sin copiar. El paso
+de cada partida se hace en numba (``prange``) sobre una copia local contigua
+con los mismos kernels que usa ``jitExpectimax``.
+
+El bucle de cada paso replica ``experiments.utils.run_single_game``: acción
+del jugador, acciones de los enemigos con guion, física del tick y
+comprobación de fin de partida. Las partidas terminadas se reinician solas.
+"""
+import time
+
+import numpy as np
+from numba import njit, prange
+
+from .game import BattleCityState
+from .arrayState import (
+    ACTIONS, NUM_ACTIONS, A_FIRE_RIGHT, A_MOVE_UP, A_MOVE_RIGHT, A_STOP, DX, DY,
+    H_NUM_B, H_TIME, H_TIME_LIMIT, TANK_OFFSET, TANK_FIELDS, T_X, T_Y,
+    encode_state,
+)
+from .jitEngine import (
+    is_win, is_lose, legal_actions, apply_action, advance_tick,
+)
+
+# Guiones de enemigo (mismos nombres que ScriptedEnemyAgent)
+ENEMY_SCRIPTS = {'attack_base': 0, 'random': 1}
+
+# Resultado de cada partida
+RESULT_NONE, RESULT_WIN, RESULT_LOSS, RESULT_DRAW = 0, 1, 2, 3
+
+
+@njit(cache=True)
+def _next_random(rng, g):
+    """splitmix64 por partida: flotante uniforme en [0, 1)."""
+    rng[g] += np.uint64(0x9E3779B97F4A7C15)
+    z = rng[g]
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    return (z >> np.uint64(11)) * (1.0 / 9007199254740992.0)
+
+
+@njit(cache=True)
+def scripted_enemy_action(s, agent, script, rng, g, actions,
+                          board_size, wall_grid, wall_steel, base_x, base_y):
+    """Versión en arreglos de ``ScriptedEnemyAgent.getAction``."""
+    n = legal_actions(s, agent, actions, board_size, wall_grid, wall_steel, base_x, base_y)
+    if n == 0:
+        return A_STOP
+    if n == 1 and actions[0] == A_STOP:
+        return A_STOP
+    if script == 1:
+        return actions[int(_next_random(rng, g) * n)]
+
+    off = TANK_OFFSET + agent * TANK_FIELDS
+    x = s[off + T_X]
+    y = s[off + T_Y]
+    min_dist = abs(x - base_x) + abs(y - base_y)
+    best_move = A_STOP
+    n_moves = 0
+    n_fires = 0
+    for i in range(n):
+        a = actions[i]
+        if A_MOVE_UP <= a <= A_MOVE_RIGHT:
+            d = a - A_MOVE_UP
+            new_dist = abs(x + DX[d] - base_x) + abs(y + DY[d] - base_y)
+            if new_dist < min_dist:
+                min_dist = new_dist
+                if _next_random(rng, g) < 0.7:
+                    best_move = a
+            n_moves += 1
+        elif a <= A_FIRE_RIGHT:
+            n_fires += 1
+
+    # Las acciones FIRE van primero y los movimientos justo después
+    if n_fires > 0 and _next_random(rng, g) < 0.6:
+        return actions[int(_next_random(rng, g) * n_fires)]
+    if best_move == A_STOP and n_moves > 0:
+        return actions[n_fires + int(_next_random(rng, g) * n_moves)]
+    return best_move
+
+
+@njit(cache=True)
+def _game_result(s, ticks, max_ticks):
+    if is_win(s):
+        return RESULT_WIN
+    if is_lose(s):
+        return RESULT_LOSS
+    if s[H_TIME] >= s[H_TIME_LIMIT] or (max_ticks >= 0 and ticks >= max_ticks):
+        return RESULT_DRAW
+    return RESULT_NONE
+
+
+@njit(parallel=True, cache=True)
+def _step_all(states, initial, player_actions, scripts, rng, ticks, max_ticks,
+              rewards, dones, results, illegal,
+              board_size, wall_grid, wall_steel, base_x, base_y):
+    num_games = states.shape[1]
+    for g in prange(num_games):
+        s = states[:, g].copy()
+        actions = np.empty(NUM_ACTIONS, dtype=np.int64)
+
+        # Jugador: solo se aplica si la acción es legal (si no, STOP)
+        a = player_actions[g]
+        n = legal_actions(s, 0, actions, board_size, wall_grid, wall_steel, base_x, base_y)
+        legal = False
+        for i in range(n):
+            if actions[i] == a:
+                legal = True
+                break
+        illegal[g] = not legal
+        if legal:
+            apply_action(s, 0, a, board_size, wall_grid, wall_steel, base_x, base_y)
+
+        # Enemigos con guion, en orden de índice como en run_single_game
+        for agent in range(1, s[H_NUM_B] + 1):
+            b = scripted_enemy_action(s, agent, scripts[g], rng, g, actions,
+                                      board_size, wall_grid, wall_steel, base_x, base_y)
+            apply_action(s, agent, b, board_size, wall_grid, wall_steel, base_x, base_y)
+
+        advance_tick(s, board_size, wall_grid, wall_steel, base_x, base_y)
+        ticks[g] += 1
+
+        result = _game_result(s, ticks[g], max_ticks)
+        results[g] = result
+        dones[g] = result != RESULT_NONE
+        if result == RESULT_WIN:
+            rewards[g] = 1.0
+        elif result == RESULT_LOSS:
+            rewards[g] = -1.0
+        else:
+            rewards[g] = 0.0
+        if dones[g]:
+            s[:] = initial
+            ticks[g] = 0
+        states[:, g] = s
+
+
+@njit(parallel=True, cache=True)
+def _legal_mask(states, agent, mask, board_size, wall_grid, wall_steel, base_x, base_y):
+    for g in prange(states.shape[1]):
+        s = states[:, g].copy()
+        actions = np.empty(NUM_ACTIONS, dtype=np.int64)
+        n = legal_actions(s, agent, actions, board_size, wall_grid, wall_steel, base_x, base_y)
+        mask[g, :] = False
+        for i in range(n):
+            mask[g, actions[i]] = True
+
+
+class VecBattleCityEnv:
+    """N partidas de BattleCity en paralelo con API ``reset``/``step``.
+
+    - layout: lista de strings del mapa (como ``get_level1()``).
+    - num_envs: número de partidas simultáneas.
+    - enemy_script: 'attack_base' o 'random', o una lista con uno por partida.
+    - max_ticks: fuerza empate al llegar a ese número de ticks (None = sin tope).
+    - seed: semilla para los guiones de los enemigos (una secuencia por partida).
+
+    ``step(actions)`` recibe un arreglo de códigos de acción del jugador
+    (índices de ``ACTIONS``) y devuelve ``(obs, rewards, dones, info)``. La
+    recompensa es +1 al ganar, -1 al perder y 0 en otro caso. Cuando una
+    partida termina se reinicia en el mismo paso: ``obs`` ya contiene el nuevo
+    estado inicial e ``info['results']`` indica cómo acabó (RESULT_*).
+    """
+    def __init__(self, layout, num_envs, enemy_script='attack_base', max_ticks=None, seed=None):
+        state = BattleCityState()
+        state.initialize(layout)
+        self.layout, self.initial = encode_state(state)
+        self.num_envs = int(num_envs)
+        self.max_ticks = -1 if max_ticks is None else int(max_ticks)
+
+        if isinstance(enemy_script, str):
+            enemy_script = [enemy_script] * self.num_envs
+        self.scripts = np.array([ENEMY_SCRIPTS[s] for s in enemy_script], dtype=np.int64)
+
+        self.states = np.empty((self.initial.shape[0], self.num_envs), dtype=np.int32)
+        self.ticks = np.zeros(self.num_envs, dtype=np.int64)
+        self.rewards = np.zeros(self.num_envs, dtype=np.float64)
+        self.dones = np.zeros(self.num_envs, dtype=np.bool_)
+        self.results = np.zeros(self.num_envs, dtype=np.int64)
+        self.illegal = np.zeros(self.num_envs, dtype=np.bool_)
+        self.seed(seed)
+
+        # Totales de partidas terminadas desde el último reset()
+        self.episodes = 0
+        self.wins = self.losses = self.draws = 0
+
+    def seed(self, seed=None):
+        """Reinicia las secuencias aleatorias de los enemigos (una por partida)."""
+        base = np.random.SeedSequence(seed)
+        self.rng = np.array([c.generate_state(1, dtype=np.uint64)[0] for c in base.spawn(self.num_envs)],
+                            dtype=np.uint64)
+
+    def _static(self):
+        lay = self.layout
+        return lay.board_size, lay.wall_grid, lay.wall_steel, lay.base_x, lay.base_y
+
+    def field(self, offset):
+        """Vista (sin copia) de un campo del vector para todas las partidas."""
+        return self.states[offset]
+
+    def reset(self):
+        """Pone todas las partidas en el estado inicial y devuelve las observaciones."""
+        self.states[:] = self.initial[:, None]
+        self.ticks[:] = 0
+        self.episodes = 0
+        self.wins = self.losses = self.draws = 0
+        return self.states
+
+    def legal_action_mask(self, agent=0):
+        """Matriz booleana (num_envs, NUM_ACTIONS) con las acciones legales."""
+        mask = np.zeros((self.num_envs, NUM_ACTIONS), dtype=np.bool_)
+        _legal_mask(self.states, agent, mask, *self._static())
+        return mask
+
+    def step(self, actions):
+        """Avanza un tick en todas las partidas.
+
+        ``actions`` puede ser un arreglo de códigos o una lista de nombres
+        ('MOVE_UP', ...). Las acciones ilegales se tratan como STOP.
+        """
+        actions = np.asarray(actions)
+        if actions.dtype.kind in ('U', 'S', 'O'):
+            actions = np.array([ACTIONS.index(a) for a in actions], dtype=np.int64)
+        else:
+            actions = actions.astype(np.int64, copy=False)
+        _step_all(self.states, self.initial, actions, self.scripts, self.rng, self.ticks, self.max_ticks,
+                  self.rewards, self.dones, self.results, self.illegal, *self._static())
+
+        finished = int(self.dones.sum())
+        if finished:
+            self.episodes += finished
+            self.wins += int((self.results == RESULT_WIN).sum())
+            self.losses += int((self.results == RESULT_LOSS).sum())
+            self.draws += int((self.results == RESULT_DRAW).sum())
+        info = {'results': self.results, 'illegal': self.illegal}
+        return self.states, self.rewards, self.dones, info
+
+
+def random_legal_actions(mask, rng):
+    """Elige, para cada partida, una acción legal uniforme (jugador aleatorio)."""
+    u = rng.random(mask.shape) * mask
+    return u.argmax(axis=1)
+
+
+def benchmark(layout, num_envs=1024, steps=500, seed=0):
+    """Mide ticks y partidas por segundo con un jugador aleatorio."""
+    env = VecBattleCityEnv(layout, num_envs, seed=seed)
+    rng = np.random.default_rng(seed)
+    env.reset()
+    env.step(random_legal_actions(env.legal_action_mask(), rng))  # compilar
+    env.reset()
+    start = time.time()
+    for _ in range(steps):
+        env.step(random_legal_actions(env.legal_action_mask(), rng))
+    elapsed = time.time() - start
+    return {
+        'num_envs': num_envs,
+        'steps': steps,
+        'elapsed': elapsed,
+        'ticks_per_second': num_envs * steps / elapsed if elapsed > 0 else 0.0,
+        'games_per_second': env.episodes / elapsed if elapsed > 0 else 0.0,
+        'wins': env.wins,
+        'losses': env.losses,
+        'draws': env.draws,
+    }
+
+
+if __name__ == '__main__':
+    from .scenarios.level1 import get_level1
+    print(benchmark(get_level1()))
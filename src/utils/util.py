@@ -35,7 +35,11 @@ import io
 
 
 class FixedRandom:
-    def __init__(self):
+    """``self.random``: generador con un estado fijo o, si se da ``seed``, sembrado con ella."""
+    def __init__(self, seed=None):
+        if seed is not None:
+            self.random = random.Random(seed)
+            return
         fixedState = (3, (2147483648, 507801126, 683453281, 310439348, 2597246090,
                           2209084787, 2267831527, 979920060, 3098657677, 37650879, 807947081, 3974896263,
                           881243242, 3100634921, 1334775171, 3965168385, 746264660, 4074750168, 500078808,
@@ -0,0 +1,145 @@
+"""Posiciones de prueba: partidas aleatorias sembradas sobre los niveles.
+
+``python -m tests.positions`` regenera el corpus fijo ``data/positions.bin``
+(registros de ``serialization``) y las decisiones de referencia de
+``ExpectimaxAgent`` sobre él (``data/expectimax_reference.json``: jugada y
+nodos por profundidad) que usan los tests de equivalencia.
+"""
+import json
+import random
+from pathlib import Path
+
+from src.gameClass.arrayState import (
+    H_NUM_B, H_NUM_BULLETS, TANK_OFFSET, TANK_FIELDS, T_X, T_DIR, T_SPAWN_X, NO_DIRECTION,
+    BULLET_OFFSET, BULLET_FIELDS, B_X, B_DIR, B_PREV_X, NO_PREV, WALL_OFFSET, WALL_FIELDS,
+    encode_state, decode_state,
+)
+from src.gameClass.canonical import wall_mirror_map
+from src.gameClass.game import BattleCityState
+from src.gameClass.jitEngine import mirror_direction
+from src.gameClass.scenarios.level1 import get_level1
+from src.gameClass.scenarios.level2 import get_level2
+from src.gameClass.scenarios.level3 import get_level3
+from src.gameClass.scenarios.level4 import get_level4
+from src.gameClass.serialization import dumps_state, loads_state, write_record, iter_records
+
+LEVELS = (get_level1, get_level2, get_level3, get_level4)
+CORPUS_PATH = Path(__file__).parent / 'data' / 'positions.bin'
+REFERENCE_PATH = Path(__file__).parent / 'data' / 'expectimax_reference.json'
+# Profundidades en plies, múltiplos del número de agentes (3): con menos no se
+# completa ninguna iteración y los dos agentes devuelven None sin buscar
+REFERENCE_DEPTHS = (3,)
+
+
+def playout_positions(layout, seed, count, every=3):
+    """Estados del turno del jugador cada ``every`` ticks de una partida aleatoria.
+
+    Todos los agentes eligen al azar (``random.Random(seed)``) entre sus
+    acciones legales; si la partida termina se empieza otra.
+    """
+    rng = random.Random(seed)
+    positions = []
+    state = None
+    tick = 0
+    while len(positions) < count:
+        if state is None or state.isTerminal():
+            state = BattleCityState()
+            state.initialize(layout)
+            tick = 0
+        if tick % every == 0:
+            state.score = state.evaluate_state()
+            positions.append(state._copy_state())
+        for index in range(state.getNumAgents()):
+            actions = state.getLegalActions(index)
+            if actions:
+                state.applyTankAction(index, rng.choice(actions))
+        state.advanceTick()
+        tick += 1
+    return positions
+
+
+def corpus_positions(seed=2024, per_level=10):
+    """Posiciones de todos los niveles (las mismas que ``data/positions.bin``)."""
+    positions = []
+    for i, level in enumerate(LEVELS):
+        positions.extend(playout_positions(level(), seed + i, per_level))
+    return positions
+
+
+def reversed_enemies(state):
+    """Copia de ``state`` con ``teamB_tanks`` en orden inverso."""
+    layout, vec = encode_state(state)
+    out = vec.copy()
+    nb = int(vec[H_NUM_B])
+    for e in range(nb):
+        src = TANK_OFFSET + (e + 1) * TANK_FIELDS
+        dst = TANK_OFFSET + (nb - e) * TANK_FIELDS
+        out[dst:dst + TANK_FIELDS] = vec[src:src + TANK_FIELDS]
+    return decode_state(out, layout)
+
+
+def mirrored_state(state):
+    """Reflejo izquierda-derecha de ``state``, o None si el mapa no es simétrico."""
+    layout, vec = encode_state(state)
+    wall_mirror = wall_mirror_map(layout)
+    if wall_mirror is None:
+        return None
+    n = layout.board_size
+    out = vec.copy()
+    for slot in range(1 + int(vec[H_NUM_B])):
+        off = TANK_OFFSET + slot * TANK_FIELDS
+        out[off + T_X] = n - 1 - vec[off + T_X]
+        out[off + T_SPAWN_X] = n - 1 - vec[off + T_SPAWN_X]
+        if vec[off + T_DIR] != NO_DIRECTION:
+            out[off + T_DIR] = mirror_direction(vec[off + T_DIR])
+    for b in range(int(vec[H_NUM_BULLETS])):
+        off = BULLET_OFFSET + b * BULLET_FIELDS
+        out[off + B_X] = n - 1 - vec[off + B_X]
+        out[off + B_DIR] = mirror_direction(vec[off + B_DIR])
+        if vec[off + B_PREV_X] != NO_PREV:
+            out[off + B_PREV_X] = n - 1 - vec[off + B_PREV_X]
+    for w, m in enumerate(wall_mirror):
+        out[WALL_OFFSET + m * WALL_FIELDS:WALL_OFFSET + (m + 1) * WALL_FIELDS] = \
+            vec[WALL_OFFSET + w * WALL_FIELDS:WALL_OFFSET + (w + 1) * WALL_FIELDS]
+    return decode_state(out, layout)
+
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, 'rb') as f:
+        return [loads_state(data) for data in iter_records(f)]
+
+
+def write_corpus(positions, path=CORPUS_PATH):
+    with open(path, 'wb') as f:
+        for state in positions:
+            write_record(f, dumps_state(state))
+
+
+def decide(agent_class, state, depth):
+    """``(jugada, nodos)`` de un agente nuevo de ``agent_class`` sin límite de tiempo."""
+    agent = agent_class(depth=depth, time_limit=None)
+    agent.suppress_output = True
+    action = agent.getAction(state)
+    return action, agent.stats.nodes
+
+
+def load_reference(path=REFERENCE_PATH):
+    """``{profundidad: [(jugada, nodos), ...]}`` en el orden del corpus."""
+    with open(path) as f:
+        data = json.load(f)
+    return {int(depth): [tuple(d) for d in decisions] for depth, decisions in data.items()}
+
+
+def write_reference(positions, depths=REFERENCE_DEPTHS, path=REFERENCE_PATH):
+    from src.agents.expectimax import ExpectimaxAgent
+    data = {str(depth): [decide(ExpectimaxAgent, state, depth) for state in positions] for depth in depths}
+    with open(path, 'w') as f:
+        json.dump(data, f)
+
+
+if __name__ == '__main__':
+    positions = corpus_positions()
+    write_corpus(positions)
+    print(f"{len(positions)} posiciones en {CORPUS_PATH}")
+    write_reference(load_corpus())
+    print(f"Decisiones de referencia en {REFERENCE_PATH}")
@@ -0,0 +1,84 @@
+import pytest
+
+from src.agents.lazySmp import LazySMPAlphaBetaAgent
+from src.agents.jitExpectimax import JitExpectimaxAgent
+from src.gameClass.canonical import SYM_NONE, SYM_ALL, canonical_key, mirror_action
+from src.gameClass.game import BattleCityState
+from src.gameClass.scenarios.level1 import get_level1
+from tests.positions import load_corpus, mirrored_state, reversed_enemies
+
+
+def _initial_level1():
+    state = BattleCityState()
+    state.initialize(get_level1())
+    return state
+
+
+def _variants():
+    """Corpus, inicio de level1 y sus variantes con enemigos invertidos y reflejadas."""
+    states = []
+    for state in load_corpus() + [_initial_level1()]:
+        mirror = mirrored_state(state)
+        for variant in (state, reversed_enemies(state), mirror, mirror and reversed_enemies(mirror)):
+            if variant is not None:
+                states.append(variant)
+    return states
+
+
+VARIANTS = _variants()
+
+
+def _groups(symmetry):
+    """``{clave: [(estado, reflejado), ...]}`` de las variantes con ``symmetry``."""
+    groups = {}
+    for state in VARIANTS:
+        key, mirrored = canonical_key(state, 0, symmetry)
+        groups.setdefault(key, []).append((state, mirrored))
+    return groups
+
+
+def _canonical_action(action, mirrored):
+    return mirror_action(action) if mirrored and action is not None else action
+
+
+def test_reversed_enemies_change_the_key():
+    # En el inicio de level1 invertir los enemigos cambia qué amenaza elige la evaluación
+    state = _initial_level1()
+    swapped = reversed_enemies(state)
+    assert state.evaluate_state() != swapped.evaluate_state()
+    for symmetry in (SYM_NONE, SYM_ALL):
+        assert canonical_key(state, 0, symmetry)[0] != canonical_key(swapped, 0, symmetry)[0]
+
+
+@pytest.mark.parametrize('symmetry', [SYM_NONE, SYM_ALL])
+def test_equal_key_equal_evaluation(symmetry):
+    for members in _groups(symmetry).values():
+        assert len({state.evaluate_state() for state, _ in members}) == 1
+
+
+def _lazy_smp(state):
+    # Un solo trabajador y tabla nueva: la jugada no depende de búsquedas anteriores
+    agent = LazySMPAlphaBetaAgent(depth=2, time_limit=None, num_workers=1, symmetry=True)
+    agent.suppress_output = True
+    try:
+        return agent.getAction(state)
+    finally:
+        agent.close()
+
+
+def _jit_expectimax(state):
+    agent = JitExpectimaxAgent(depth=3, time_limit=None)
+    agent.suppress_output = True
+    return agent.getAction(state)
+
+
+@pytest.mark.parametrize('symmetry, decide', [
+    (SYM_ALL, _lazy_smp),
+    (SYM_NONE, _jit_expectimax),
+])
+def test_equal_key_equal_action(symmetry, decide):
+    shared = [members for members in _groups(symmetry).values() if len(members) > 1]
+    # Con reflejo, cada posición de level1/level2 comparte clave con su reflejo
+    assert shared or symmetry == SYM_NONE
+    for members in shared:
+        assert len({_canonical_action(decide(state), mirrored) for state, mirrored in members}) == 1
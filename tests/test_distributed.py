@@ -0,0 +1,108 @@
+import time
+import secrets
+import threading
+import multiprocessing
+from multiprocessing.connection import Client
+from pathlib import Path
+
+import pytest
+
+from experiments.distributed import Broker, run_distributed, run_worker
+from experiments.registry import PARALLEL_AGENTS
+from experiments.results import experiment_config, read_records
+from experiments.sweep import pending_tasks, run_tasks
+
+GAMES = 2
+# Campos que no dependen de quién ni cuándo juega la partida (los nodos de los
+# agentes paralelos dependen del reparto entre sus trabajadores)
+SAME_FIELDS = ('config', 'config_values', 'game_index', 'seed', 'result', 'decision_count')
+SEQUENTIAL_FIELDS = ('total_nodes',)
+
+
+def _configs():
+    return [
+        experiment_config(0, 'alphabeta', 3, None, seed=7, max_ticks=4),
+        # Agente con procesos propios: los trabajadores locales tienen que poder crearlos
+        experiment_config(1, 'alphabeta_lazysmp', 1, None, seed=7, max_workers=2, max_ticks=4),
+    ]
+
+
+def _tasks(jsonl_path):
+    tasks, layouts = pending_tasks(_configs(), GAMES, str(jsonl_path), Path.cwd())
+    return tasks, layouts
+
+
+def _fields(record):
+    fields = SAME_FIELDS
+    if record['config_values']['agent'] not in PARALLEL_AGENTS:
+        fields += SEQUENTIAL_FIELDS
+    return {f: record[f] for f in fields}
+
+
+def _by_game(records):
+    return {(r['config'], r['game_index']): _fields(r) for r in records}
+
+
+def _take_task_and_hang(address, authkey, ready):
+    conn = Client(address, authkey=authkey)
+    conn.send({'type': 'hello', 'worker': 'doomed'})
+    conn.send({'type': 'request'})
+    conn.recv()
+    ready.set()
+    time.sleep(60)
+
+
+def _wait_for(condition, timeout=10.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            pytest.fail('timeout')
+        time.sleep(0.05)
+
+
+def test_distributed_matches_local(tmp_path):
+    local_path = tmp_path / 'local.jsonl'
+    tasks, layouts = _tasks(local_path)
+    local = list(run_tasks(tasks, layouts, str(local_path)))
+
+    remote_path = tmp_path / 'remote.jsonl'
+    remote = list(run_distributed(tasks, str(remote_path), local_workers=2))
+
+    assert len(remote) == len(tasks)
+    assert _by_game(remote) == _by_game(local)
+    assert _by_game(read_records(str(remote_path))) == _by_game(local)
+
+
+def test_killed_worker_is_requeued_and_results_are_deduplicated(tmp_path):
+    path = tmp_path / 'broker.jsonl'
+    tasks, _ = _tasks(path)
+    tasks = [t for t in tasks if t[0]['agent'] == 'alphabeta']
+    authkey = secrets.token_bytes(32)
+    broker = Broker(tasks, str(path), authkey=authkey).start()
+    try:
+        ready = multiprocessing.Event()
+        doomed = multiprocessing.Process(target=_take_task_and_hang, args=(broker.address, authkey, ready),
+                                         daemon=True)
+        doomed.start()
+        assert ready.wait(10)
+        doomed.kill()
+        doomed.join()
+        _wait_for(lambda: broker.requeued == 1)
+
+        worker = threading.Thread(target=run_worker, args=(broker.address, authkey),
+                                  kwargs={'heartbeat': 0.5, 'retry': 0.1}, daemon=True)
+        worker.start()
+        records = list(broker.results())
+        assert sorted(r['game_index'] for r in records) == list(range(GAMES))
+
+        # Un resultado repetido (p.ej. de un trabajador que se daba por caído) se descarta
+        conn = Client(broker.address, authkey=authkey)
+        conn.send({'type': 'hello', 'worker': 'late'})
+        conn.send({'type': 'result', 'game_id': next(iter(broker._tasks)), 'record': dict(records[0])})
+        assert conn.recv()['type'] == 'ack'
+        conn.close()
+        assert broker.duplicates == 1
+        assert len(read_records(str(path))) == GAMES
+    finally:
+        broker.close(grace=0.5)
+    worker.join(timeout=10)
@@ -0,0 +1,33 @@
+import pytest
+
+from src.agents.expectimax import ExpectimaxAgent
+from src.agents.jitExpectimax import JitExpectimaxAgent
+from tests.positions import REFERENCE_DEPTHS, decide, load_corpus, load_reference
+
+CORPUS = load_corpus()
+REFERENCE = load_reference()
+# Posiciones en las que la búsqueda en Python es barata (comprueba que la referencia sigue al día)
+LIVE_CHECKS = 4
+
+
+def test_reference_covers_corpus():
+    for depth in REFERENCE_DEPTHS:
+        assert len(REFERENCE[depth]) == len(CORPUS)
+        # Cada profundidad completa al menos una iteración (si no, se compararía None con None)
+        assert all(action is not None and nodes > 0 for action, nodes in REFERENCE[depth])
+
+
+@pytest.mark.parametrize('depth', REFERENCE_DEPTHS)
+def test_jit_matches_expectimax_reference(depth):
+    decisions = [decide(JitExpectimaxAgent, state, depth) for state in CORPUS]
+    mismatches = [(i, expected, got) for i, (expected, got) in enumerate(zip(REFERENCE[depth], decisions))
+                  if got != expected]
+    assert not mismatches
+
+
+@pytest.mark.parametrize('depth', REFERENCE_DEPTHS)
+def test_reference_matches_python_agent(depth):
+    cheapest = sorted(range(len(CORPUS)), key=lambda i: REFERENCE[depth][i][1])[:LIVE_CHECKS]
+    for i in cheapest:
+        assert decide(ExpectimaxAgent, CORPUS[i], depth) == REFERENCE[depth][i]
+        assert decide(JitExpectimaxAgent, CORPUS[i], depth) == REFERENCE[depth][i]
@@ -0,0 +1,74 @@
+import io
+import pickle
+
+import numpy as np
+import pytest
+
+from src.gameClass.arrayState import StaticLayout, encode_state
+from src.gameClass.serialization import (
+    MAGIC, FORMAT_VERSION, SerializationError, dumps_state, loads_state, write_record, iter_records,
+)
+from tests.positions import LEVELS, playout_positions
+
+
+def _positions():
+    positions = []
+    for i, level in enumerate(LEVELS):
+        positions.extend(playout_positions(level(), seed=100 + i, count=15, every=2))
+    return positions
+
+
+POSITIONS = _positions()
+
+
+def assert_same_state(expected, actual):
+    layout = StaticLayout.from_state(expected)
+    assert StaticLayout.from_state(actual).signature == layout.signature
+    np.testing.assert_array_equal(encode_state(actual, layout)[1], encode_state(expected, layout)[1])
+    assert actual.score == expected.score
+
+
+@pytest.mark.parametrize('embed_layout', [None, True])
+def test_dumps_loads_round_trip(embed_layout):
+    for state in POSITIONS:
+        assert_same_state(state, loads_state(dumps_state(state, embed_layout=embed_layout)))
+
+
+def test_pickle_round_trip():
+    for state in POSITIONS:
+        assert_same_state(state, pickle.loads(pickle.dumps(state)))
+
+
+def test_records_round_trip():
+    f = io.BytesIO()
+    for state in POSITIONS:
+        write_record(f, dumps_state(state))
+    f.seek(0)
+    loaded = [loads_state(data) for data in iter_records(f)]
+    assert len(loaded) == len(POSITIONS)
+    for state, copy in zip(POSITIONS, loaded):
+        assert_same_state(state, copy)
+
+
+def test_truncated_record_is_rejected():
+    f = io.BytesIO()
+    write_record(f, dumps_state(POSITIONS[0]))
+    f = io.BytesIO(f.getvalue()[:-1])
+    with pytest.raises(SerializationError):
+        list(iter_records(f))
+
+
+def test_wrong_magic_is_rejected():
+    data = bytearray(dumps_state(POSITIONS[0]))
+    assert bytes(data[:len(MAGIC)]) == MAGIC
+    data[0] ^= 0xFF
+    with pytest.raises(SerializationError):
+        loads_state(bytes(data))
+
+
+def test_unknown_version_is_rejected():
+    data = bytearray(dumps_state(POSITIONS[0]))
+    assert data[len(MAGIC)] == FORMAT_VERSION
+    data[len(MAGIC)] = FORMAT_VERSION + 1
+    with pytest.raises(SerializationError):
+        loads_state(bytes(data))
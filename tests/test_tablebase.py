@@ -0,0 +1,108 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.agents.tablebase import TB_WIN, TB_LOSS, EndgameTablebase, build_tablebase, decode_entry, tb_distance, tb_move
+from src.gameClass.arrayState import ACTIONS, decode_state
+from src.gameClass.game import BattleCityState
+
+# Mapa pequeño para que la tabla se genere en segundos y la búsqueda exhaustiva sea viable
+LAYOUT = [
+    "  B  ",
+    "     ",
+    " S S ",
+    "     ",
+    "A XbX",
+]
+ROUNDS = 4
+SAMPLES_PER_DISTANCE = 3
+
+
+@pytest.fixture(scope='module')
+def tablebase(tmp_path_factory):
+    state = BattleCityState()
+    state.initialize(LAYOUT)
+    path = str(tmp_path_factory.mktemp('tablebase') / 'tiny')
+    stats = build_tablebase(state, path, rounds=ROUNDS, workers=1, verbose=False)
+    return EndgameTablebase(path), stats
+
+
+def _sample(tb, outcome):
+    """Hasta ``SAMPLES_PER_DISTANCE`` entradas resueltas con ``outcome`` por cada distancia."""
+    table = np.asarray(tb.table)
+    by_distance = {}
+    for index in np.flatnonzero((table >> 4) & 0x3 == outcome).tolist():
+        by_distance.setdefault(int(tb_distance(table[index])), []).append(index)
+    rng = random.Random(0)
+    return [i for d in sorted(by_distance)
+            for i in rng.sample(by_distance[d], min(SAMPLES_PER_DISTANCE, len(by_distance[d])))]
+
+
+def _entry_state(tb, index):
+    model = tb.model
+    vec = np.empty_like(model.template)
+    assert decode_entry(index, model.template, vec, model.cells, model.relevant, model.cell_wall, model.k, model.r)
+    return decode_state(vec, model.layout)
+
+
+def _forced(state, turns):
+    """1 si el jugador gana seguro en ``turns`` turnos, -1 si pierde seguro y 0 si no.
+
+    Búsqueda exhaustiva en el motor de Python (jugador y enemigo alternos, el
+    enemigo minimiza), con la victoria comprobada antes que la derrota. Como
+    en la tabla, el turno ``t`` incluye la jugada del jugador que lo empieza
+    (distancia 0: se gana o se pierde con esta jugada).
+    """
+    if state.isWin():
+        return 1
+    if state.isLose():
+        return -1
+    actions = state.getLegalActions(0)
+    if not actions:
+        return 0
+    best = -1
+    for action in actions:
+        best = max(best, _forced_after(state.getSuccessor(0, action), turns))
+        if best == 1:
+            break
+    return best
+
+
+def _forced_after(state, turns):
+    """Como ``_forced`` tras la jugada del jugador: mueve el enemigo."""
+    if state.isWin():
+        return 1
+    if state.isLose():
+        return -1
+    if turns == 0:
+        return 0
+    actions = state.getLegalActions(1)
+    if not actions:
+        return 0
+    worst = 1
+    for action in actions:
+        worst = min(worst, _forced(state.getSuccessor(1, action), turns - 1))
+        if worst == -1:
+            break
+    return worst
+
+
+def test_build_resolves_wins_and_losses(tablebase):
+    _, stats = tablebase
+    assert stats['wins'] > 0 and stats['losses'] > 0
+
+
+@pytest.mark.parametrize('outcome', [TB_WIN, TB_LOSS])
+def test_entries_match_exhaustive_search(tablebase, outcome):
+    tb, _ = tablebase
+    expected = 1 if outcome == TB_WIN else -1
+    for index in _sample(tb, outcome):
+        code = tb.table[index]
+        distance, move = int(tb_distance(code)), ACTIONS[int(tb_move(code))]
+        state = _entry_state(tb, index)
+        # Resultado forzado en a lo sumo ``distance`` turnos
+        assert _forced(state, distance) == expected
+        # La jugada de la tabla mantiene el resultado
+        assert _forced_after(state.getSuccessor(0, move), distance) == expected
+        assert tb.probe(state) == (outcome, distance, move)
@@ -0,0 +1,100 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.gameClass.arrayState import ACTIONS, NUM_ACTIONS, decode_state, encode_state
+from src.gameClass.game import BattleCityState
+from src.gameClass.scenarios.level1 import get_level1
+from src.gameClass.vecEnv import (
+    ENEMY_SCRIPTS, RESULT_NONE, RESULT_WIN, RESULT_LOSS, RESULT_DRAW,
+    VecBattleCityEnv, scripted_enemy_action,
+)
+
+NUM_ENVS = 8
+STEPS = 120
+# Tope corto para que haya partidas terminadas (y reinicios) durante la prueba
+MAX_TICKS = 40
+
+
+def _scalar_initial(layout):
+    state = BattleCityState()
+    state.initialize(layout)
+    return state
+
+
+def _player_action(rng, state):
+    """Jugador con guion: casi siempre una acción legal y a veces una cualquiera (quizá ilegal)."""
+    if rng.random() < 0.2:
+        return rng.randrange(NUM_ACTIONS)
+    return ACTIONS.index(rng.choice(state.getLegalActions(0)))
+
+
+def _scalar_step(env, state, action, rng, g):
+    """Un tick de ``state`` como en ``run_single_game``.
+
+    Los enemigos eligen con ``scripted_enemy_action`` sobre el estado escalar y
+    la secuencia ``rng`` de la partida ``g``: así consumen los mismos números
+    que el entorno vectorizado y la prueba compara solo el motor.
+    """
+    if ACTIONS[action] in state.getLegalActions(0):
+        state.applyTankAction(0, ACTIONS[action])
+    lay = env.layout
+    actions = np.empty(NUM_ACTIONS, dtype=np.int64)
+    for agent in range(1, len(state.getTeamBTanks()) + 1):
+        vec = encode_state(state, lay)[1]
+        b = scripted_enemy_action(vec, agent, env.scripts[g], rng, g, actions,
+                                  lay.board_size, lay.wall_grid, lay.wall_steel, lay.base_x, lay.base_y)
+        state.applyTankAction(agent, ACTIONS[b])
+    state.advanceTick()
+
+
+def _scalar_result(state, ticks):
+    if state.isWin():
+        return RESULT_WIN
+    if state.isLose():
+        return RESULT_LOSS
+    if state.isLimitTime() or ticks >= MAX_TICKS:
+        return RESULT_DRAW
+    return RESULT_NONE
+
+
+def _canonical_vec(env, vec):
+    # Decodificar y volver a codificar descarta los huecos sin usar (p.ej. balas ya eliminadas)
+    return encode_state(decode_state(vec, env.layout), env.layout)[1]
+
+
+@pytest.mark.parametrize('script', sorted(ENEMY_SCRIPTS))
+def test_vec_env_matches_scalar_games(script):
+    layout = get_level1()
+    env = VecBattleCityEnv(layout, NUM_ENVS, enemy_script=script, max_ticks=MAX_TICKS, seed=3)
+    env.reset()
+    games = [_scalar_initial(layout) for _ in range(NUM_ENVS)]
+    ticks = [0] * NUM_ENVS
+    players = [random.Random(g) for g in range(NUM_ENVS)]
+    finished = 0
+
+    for _ in range(STEPS):
+        actions = np.array([_player_action(players[g], games[g]) for g in range(NUM_ENVS)], dtype=np.int64)
+        rng = env.rng.copy()
+        illegal = [ACTIONS[a] not in games[g].getLegalActions(0) for g, a in enumerate(actions)]
+        for g, state in enumerate(games):
+            _scalar_step(env, state, actions[g], rng, g)
+            ticks[g] += 1
+
+        states, rewards, dones, info = env.step(actions)
+
+        assert list(info['illegal']) == illegal
+        assert np.array_equal(rng, env.rng)
+        for g, state in enumerate(games):
+            result = _scalar_result(state, ticks[g])
+            assert info['results'][g] == result
+            assert dones[g] == (result != RESULT_NONE)
+            assert rewards[g] == {RESULT_WIN: 1.0, RESULT_LOSS: -1.0}.get(result, 0.0)
+            if dones[g]:
+                finished += 1
+                games[g], ticks[g] = _scalar_initial(layout), 0
+            assert np.array_equal(_canonical_vec(env, states[:, g]), encode_state(games[g], env.layout)[1])
+
+    assert finished > 0
+    assert env.episodes == finished
@@ -5,6 +5,9 @@ import time
 from src.gameClass.game import BattleCityState
 from src.agents.minimax import MinimaxAgent, AlphaBetaAgent, ParallelAlphaBetaAgent
 from src.agents.expectimax import ExpectimaxAgent, ParallelExpectimaxAgent
+from src.agents.jitExpectimax import JitExpectimaxAgent
+from src.agents.lazySmp import LazySMPAlphaBetaAgent
+from src.agents.ybwc import YBWCAlphaBetaAgent
 from src.agents.enemyAgent import ScriptedEnemyAgent
 from src.gameClass.scenarios.level1 import get_level1
 from src.gameClass.scenarios.level2 import get_level2
@@ -25,7 +28,7 @@ COLORS = {
     'bullet': (255, 255, 255),
 }
 
-def draw_game(screen, game_state, action=None):
+def draw_game(screen, game_state, action=None, stats=None):
     screen.fill(COLORS['background'])
     size = game_state.getBoardSize()
 
@@ -76,6 +79,9 @@ def draw_game(screen, game_state, action=None):
     # Dibujarlos en esquina superior izquierda
     screen.blit(surf_action, (5, 5))
     screen.blit(surf_score, (5, 30))
+    # Estadísticas de la última búsqueda del agente (``SearchStats``)
+    if stats is not None:
+        screen.blit(font.render(stats.summary(), True, (180, 220, 255)), (5, 55))
 
     pygame.display.flip()
 
@@ -83,7 +89,7 @@ def main():
     pygame.init()
     # --- Parsear argumentos de línea de comandos ---
     parser = argparse.ArgumentParser(description='Visual tester para agentes de BattleCity. Selecciona algoritmo, profundidad y nivel a simular.')
-    parser.add_argument('-a', '--algorithm', choices=['minimax', 'alphabeta', 'expectimax'], default='expectimax', help='Algoritmo a usar: minimax, alphabeta, expectimax')
+    parser.add_argument('-a', '--algorithm', choices=['minimax', 'alphabeta', 'expectimax', 'expectimax_jit', 'alphabeta_lazysmp', 'alphabeta_ybwc'], default='expectimax', help='Algoritmo a usar: minimax, alphabeta, expectimax, expectimax_jit, alphabeta_lazysmp, alphabeta_ybwc')
     parser.add_argument('-d', '--depth', type=int, default=3, help='Número de profundidad (turnos completos)')
     parser.add_argument('-l', '--level', type=int, choices=[1,2,3,4], default=1, help='Nivel a simular (1-4)')
     parser.add_argument('-t', '--time', type=float, default=10.0, help='Límite de tiempo por decisión en segundos (float)')
@@ -111,6 +117,12 @@ def main():
             pass
     elif alg == 'alphabeta':
         agentA = AlphaBetaAgent(depth=depth, time_limit=time_limit)
+    elif alg == 'alphabeta_lazysmp':
+        agentA = LazySMPAlphaBetaAgent(depth=depth, time_limit=time_limit)
+    elif alg == 'alphabeta_ybwc':
+        agentA = YBWCAlphaBetaAgent(depth=depth, time_limit=time_limit)
+    elif alg == 'expectimax_jit':
+        agentA = JitExpectimaxAgent(depth=depth, time_limit=time_limit, debug=True)
     else:  # expectimax
         agentA = ExpectimaxAgent(depth=depth, time_limit=time_limit, debug=True)
     enemies = [ScriptedEnemyAgent(i+1, script_type='attack_base') for i in range(len(game_state.getTeamBTanks()))]
@@ -239,7 +251,7 @@ def main():
             pass
 
         # Dibujar estado (pasar la acción elegida por el agente 0)
-        draw_game(screen, game_state, action=actionA)
+        draw_game(screen, game_state, action=actionA, stats=getattr(agentA, 'stats', None))
         pygame.time.delay(200)
 
     pygame.quit()